@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+CSV to JSON Converter Benchmarks
+
+Generate synthetic CSV files and measure every converter in this repository
+on them: the day4 script, the day5 refactor, the day6 v3 converter and the
+v3 fast paths (streaming, JSON Lines, memory-mapped input, multi-process)
+and the optional orjson/ujson serializer backends.
+
+Every case runs in a fresh interpreter so its peak RSS is its own. Results
+are printed as a table and can be written as JSON to compare commits.
+
+Usage examples:
+  - Default dataset (100k rows x 10 columns), all cases:
+      python benchmarks/bench_converters.py
+
+  - Wider file with more quoting and unicode, save results:
+      python benchmarks/bench_converters.py --rows 500000 --columns 30 \\
+          --quote-density 0.2 --unicode-share 0.3 --json results.json
+
+  - Only some cases, best of 3 runs:
+      python benchmarks/bench_converters.py --cases v3 v3-stream --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import functools
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CONVERTER_SCRIPTS = {
+    "day4": REPO_ROOT / "day4-csv-json-converter" / "converter.py",
+    "day5": next(REPO_ROOT.glob("day5*/new-converter.py"), REPO_ROOT / "day5" / "new-converter.py"),
+    "v3": next(
+        REPO_ROOT.glob("day6*/csv_to_json_v3_prompted.py"),
+        REPO_ROOT / "day6" / "csv_to_json_v3_prompted.py",
+    ),
+}
+
+# Column value kinds and their default share of the generated columns
+DEFAULT_TYPE_MIX = "int=3,float=3,bool=1,str=3,null=0"
+
+UNICODE_WORDS = ["数据", "café", "naïve", "Ωmega", "東京", "straße", "emoji🙂", "über"]
+ASCII_WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+
+
+def parse_type_mix(spec: str) -> Dict[str, int]:
+    """Parse ``int=3,float=2,...`` into a weight per column kind."""
+    mix: Dict[str, int] = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in ("int", "float", "bool", "str", "null"):
+            raise ValueError(f"Unknown column kind in type mix: {kind}")
+        mix[kind] = int(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("Type mix must give at least one kind a positive weight")
+    return mix
+
+
+def generate_csv(
+    path: Path,
+    rows: int,
+    columns: int,
+    type_mix: Dict[str, int],
+    quote_density: float = 0.05,
+    newline_density: float = 0.01,
+    unicode_share: float = 0.1,
+    seed: int = 0,
+) -> None:
+    """
+    Write a synthetic CSV file.
+    
+    Args:
+        path: Output file
+        rows: Number of data rows
+        columns: Number of columns
+        type_mix: Relative weight of each column kind
+        quote_density: Share of text cells containing a quote and a comma
+        newline_density: Share of text cells containing an embedded newline
+        unicode_share: Share of text cells drawn from non-ASCII words
+        seed: Random seed, so the same arguments give the same file
+    """
+    rng = random.Random(seed)
+    kinds = [k for k, w in type_mix.items() for _ in range(w)]
+    column_kinds = [kinds[i % len(kinds)] for i in range(columns)]
+    
+    def text() -> str:
+        words = UNICODE_WORDS if rng.random() < unicode_share else ASCII_WORDS
+        value = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+        if rng.random() < quote_density:
+            value = f'say "{value}", then stop'
+        if rng.random() < newline_density:
+            value = value + "\nsecond line"
+        return value
+    
+    makers: Dict[str, Callable[[], str]] = {
+        "int": lambda: str(rng.randint(-100000, 1000000)),
+        "float": lambda: f"{rng.uniform(-1000, 1000):.4f}",
+        "bool": lambda: rng.choice(("true", "false")),
+        "str": text,
+        "null": lambda: "",
+    }
+    cell_makers = [makers[kind] for kind in column_kinds]
+    
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow([f"{kind}_{i}" for i, kind in enumerate(column_kinds)])
+        for _ in range(rows):
+            writer.writerow([make() for make in cell_makers])
+
+
+def load_script(name: str) -> ModuleType:
+    """Import a converter script by path; the folder names are not importable."""
+    path = CONVERTER_SCRIPTS[name]
+    spec = importlib.util.spec_from_file_location(f"bench_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered before exec so worker processes can unpickle its functions
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class StageTimer:
+    """Collect wall time per named stage."""
+    
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+    
+    def run(self, stage: str, func: Callable, *args, **kwargs):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - started
+        return result
+
+
+CaseRunner = Callable[[ModuleType, Path, Path, StageTimer], int]
+
+
+def _case_day4_like(
+    module: ModuleType, csv_path: Path, out_path: Path, timer: StageTimer, **serialize_options
+) -> int:
+    rows = timer.run("read", module.read_csv_file, str(csv_path))
+    text = timer.run("serialize", module.convert_csv_to_json_data, rows, **serialize_options)
+    timer.run("write", module.write_json_to_file, text, str(out_path))
+    return len(rows)
+
+
+def _case_v3(
+    module: ModuleType, csv_path: Path, out_path: Path, timer: StageTimer, **serialize_options
+) -> int:
+    content = timer.run("read", module.read_csv_file, csv_path)
+    rows = timer.run("parse", module.csv_to_dict_list, content)
+    schema = timer.run("infer", module.infer_schema, rows)
+    typed = timer.run("types", module.detect_and_convert_types, rows, schema)
+    text = timer.run("serialize", module.dict_list_to_json, typed, **serialize_options)
+    timer.run("write", module.write_json_file, text, out_path)
+    return len(rows)
+
+
+def _case_v3_call(func_name: str, **options) -> CaseRunner:
+    def run(module: ModuleType, csv_path: Path, out_path: Path, timer: StageTimer) -> int:
+        return timer.run("convert", getattr(module, func_name), csv_path, out_path, **options)
+    return run
+
+
+# Case name -> (converter script, runner)
+CASES: Dict[str, Tuple[str, CaseRunner]] = {
+    "day4": ("day4", _case_day4_like),
+    "day4-orjson": ("day4", functools.partial(_case_day4_like, json_backend="orjson")),
+    "day5": ("day5", _case_day4_like),
+    "v3": ("v3", _case_v3),
+    "v3-compact": ("v3", functools.partial(_case_v3, compact=True)),
+    "v3-orjson": ("v3", functools.partial(_case_v3, json_backend="orjson")),
+    "v3-ujson": ("v3", functools.partial(_case_v3, json_backend="ujson")),
+    "v3-stream": ("v3", _case_v3_call("stream_csv_to_json")),
+    "v3-stream-compact": ("v3", _case_v3_call("stream_csv_to_json", indent=None)),
+    "v3-stream-orjson": ("v3", _case_v3_call("stream_csv_to_json", json_backend="orjson")),
+    "v3-jsonl": ("v3", _case_v3_call("stream_csv_to_json", output_format="jsonl")),
+    "v3-mmap": ("v3", _case_v3_call("stream_csv_to_json", indent=None, use_mmap=True)),
+    "v3-columnar": ("v3", _case_v3_call("stream_csv_to_json", output_format="columnar")),
+    "v3-parallel": ("v3", _case_v3_call(
+        "parallel_csv_to_json", workers=os.cpu_count() or 1, indent=None
+    )),
+}
+
+
+# Cases that need an optional JSON backend; they are skipped when it is not installed
+CASE_JSON_BACKENDS = {
+    "day4-orjson": "orjson",
+    "v3-orjson": "orjson",
+    "v3-ujson": "ujson",
+    "v3-stream-orjson": "orjson",
+}
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case_in_process(case: str, csv_path: Path, out_path: Path) -> Dict[str, object]:
+    """Run one case in this process and return its measurements."""
+    script, runner = CASES[case]
+    module = load_script(script)
+    timer = StageTimer()
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = runner(module, csv_path, out_path, timer)
+    seconds = time.perf_counter() - started
+    return {
+        "case": case,
+        "rows": rows,
+        "seconds": seconds,
+        "cpu_seconds": time.process_time() - cpu_started,
+        "peak_rss": _peak_rss_bytes(),
+        "output_bytes": out_path.stat().st_size,
+        "stages": timer.stages,
+    }
+
+
+def run_case(case: str, csv_path: Path, out_path: Path) -> Dict[str, object]:
+    """Run one case in a fresh interpreter so peak RSS is measured in isolation."""
+    completed = subprocess.run(
+        [sys.executable, __file__, "--run-case", case, str(csv_path), str(out_path)],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        return {"case": case, "error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout)
+
+
+def summarize(result: Dict[str, object], input_bytes: int) -> Dict[str, object]:
+    """Add throughput figures to a case result."""
+    if "error" in result or "skipped" in result:
+        return result
+    seconds = max(result["seconds"], 1e-9)
+    result["rows_per_second"] = result["rows"] / seconds
+    result["mb_per_second"] = input_bytes / seconds / 1e6
+    return result
+
+
+def format_table(results: List[Dict[str, object]]) -> str:
+    """Render results as a fixed-width text table."""
+    lines = [f"{'case':<20}{'seconds':>9}{'rows/s':>12}{'MB/s':>8}{'peak RSS MB':>13}  stages"]
+    for r in results:
+        if "error" in r:
+            lines.append(f"{r['case']:<20}  failed: {' '.join(r['error'])}")
+            continue
+        if "skipped" in r:
+            lines.append(f"{r['case']:<20}  skipped: {r['skipped']}")
+            continue
+        rss = f"{r['peak_rss'] / 1e6:.1f}" if r["peak_rss"] else "n/a"
+        stages = ", ".join(f"{k}={v:.3f}" for k, v in r["stages"].items())
+        lines.append(
+            f"{r['case']:<20}{r['seconds']:>9.3f}{r['rows_per_second']:>12.0f}"
+            f"{r['mb_per_second']:>8.1f}{rss:>13}  {stages}"
+        )
+    return "\n".join(lines)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark the CSV to JSON converters")
+    p.add_argument("--rows", type=int, default=100_000, help="Data rows to generate (default: 100000)")
+    p.add_argument("--columns", type=int, default=10, help="Columns to generate (default: 10)")
+    p.add_argument("--type-mix", default=DEFAULT_TYPE_MIX, help=f"Column kind weights (default: {DEFAULT_TYPE_MIX})")
+    p.add_argument("--quote-density", type=float, default=0.05, help="Share of text cells with quotes")
+    p.add_argument("--newline-density", type=float, default=0.01, help="Share of text cells with newlines")
+    p.add_argument("--unicode-share", type=float, default=0.1, help="Share of non-ASCII text cells")
+    p.add_argument("--seed", type=int, default=0, help="Random seed for the dataset")
+    p.add_argument("--input", type=Path, help="Benchmark this CSV instead of generating one")
+    p.add_argument("--cases", nargs="+", choices=sorted(CASES), help="Cases to run (default: all)")
+    p.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported")
+    p.add_argument("--json", type=Path, help="Also write results to this JSON file")
+    p.add_argument("--run-case", nargs=3, metavar=("CASE", "CSV", "OUT"), help=argparse.SUPPRESS)
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    
+    if args.run_case:
+        case, csv_path, out_path = args.run_case
+        print(json.dumps(run_case_in_process(case, Path(csv_path), Path(out_path))))
+        return 0
+    
+    with tempfile.TemporaryDirectory(prefix="csv_bench_") as tmp:
+        tmp_dir = Path(tmp)
+        if args.input:
+            csv_path = args.input
+            dataset: Dict[str, object] = {"input": str(args.input)}
+        else:
+            csv_path = tmp_dir / "synthetic.csv"
+            dataset = {
+                "rows": args.rows,
+                "columns": args.columns,
+                "type_mix": args.type_mix,
+                "quote_density": args.quote_density,
+                "newline_density": args.newline_density,
+                "unicode_share": args.unicode_share,
+                "seed": args.seed,
+            }
+            generate_csv(
+                csv_path, args.rows, args.columns, parse_type_mix(args.type_mix),
+                args.quote_density, args.newline_density, args.unicode_share, args.seed,
+            )
+        input_bytes = csv_path.stat().st_size
+        dataset["bytes"] = input_bytes
+        
+        results = []
+        for case in args.cases or list(CASES):
+            backend = CASE_JSON_BACKENDS.get(case)
+            if backend and importlib.util.find_spec(backend) is None:
+                results.append({"case": case, "skipped": f"{backend} is not installed"})
+                continue
+            runs = [run_case(case, csv_path, tmp_dir / f"{case}.out") for _ in range(max(args.repeat, 1))]
+            ok = [r for r in runs if "error" not in r]
+            best = min(ok, key=lambda r: r["seconds"]) if ok else runs[0]
+            results.append(summarize(best, input_bytes))
+    
+    print(format_table(results))
+    
+    if args.json:
+        report = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dataset": dataset,
+            "results": results,
+        }
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nWritten results to {args.json}")
+    
+    return 0 if all("error" not in r for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
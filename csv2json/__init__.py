@@ -0,0 +1,73 @@
+"""
+csv2json
+CSV to JSON conversion as an importable package.
+
+A conversion is a pipeline of stages over an iterator of row dictionaries,
+each of which can be used on its own:
+
+    read        iter_csv_rows(path)                  rows with string values
+    types       convert_rows_with_schema(rows)       rows with typed values
+    serialize   serialize_rows(rows, 'jsonl')        JSON text fragments
+    write       write_json_stream(fragments, path)
+
+``Pipeline`` chains them with stages of your own:
+
+    from csv2json import Pipeline
+
+    Pipeline.from_csv('drop.csv.gz').pipe(drop_test_rows).to_file('drop.jsonl', output_format='jsonl')
+
+Modules:
+    converter   typed conversion and the ``csv2json`` command line
+    basic       the Day 4 converter, which keeps every value a string
+    columnar    columnar and Parquet output
+    streams     compressed files, standard input/output and memory maps
+    selection   ``--columns``/``--where`` projection and row filters
+    pipeline    the ``Pipeline`` class
+
+The names below are imported from their modules on first use, so importing
+the package (and ``csv2json --version``) costs next to nothing.
+"""
+
+import importlib
+
+
+__version__ = '3.1.0'
+
+# Public name -> module that defines it, imported on first access
+_LAZY_NAMES = {
+    'Pipeline': 'pipeline',
+    'iter_csv_rows': 'converter',
+    'convert_rows_with_schema': 'converter',
+    'infer_schema': 'converter',
+    'build_column_converters': 'converter',
+    'convert_row_types': 'converter',
+    'serialize_rows': 'converter',
+    'write_json_stream': 'converter',
+    'stream_csv_to_json': 'converter',
+    'parallel_csv_to_json': 'converter',
+    'convert_csv_to_json': 'converter',
+    'convert_batch': 'converter',
+    'ConversionStats': 'converter',
+    'read_columnar': 'columnar',
+    'iter_columnar_rows': 'columnar',
+    'write_columnar': 'columnar',
+    'open_csv_input': 'streams',
+    'open_output': 'streams',
+    'RowSelection': 'selection',
+    'parse_selection': 'selection',
+}
+
+__all__ = ['__version__', *_LAZY_NAMES]
+
+
+def __getattr__(name: str) -> object:
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY_NAMES))
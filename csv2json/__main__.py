@@ -0,0 +1,6 @@
+"""Run the converter as ``python -m csv2json``."""
+
+from .cli import main
+
+
+main()
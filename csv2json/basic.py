@@ -0,0 +1,529 @@
+"""
+Day 4 CSV 转 JSON 转换器：所有值保留为字符串
+
+本模块只负责不做类型转换的读取与序列化。压缩输入输出、标准输入输出与内存映射读取
+使用 streams 中的实现；增量缓存、JSON 后端选择、批量文件查找与批量调度、写出
+缓冲及共用常量使用 converter 与 constants 中的实现。
+"""
+
+import argparse
+import csv
+import os
+import sys
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from pathlib import Path
+
+from . import __version__
+from .constants import DEFAULT_BATCH_PATTERN, DEFAULT_FLUSH_SIZE, JSON_BACKENDS
+# 缓存、后端选择与批量工具原先在本模块中另有一份实现，仍可从这里导入
+from .converter import (
+    BatchSummary, ConversionCache, file_sha256, find_batch_inputs, make_json_dumps, resolve_json_backend,
+    run_batch, write_json_stream,
+)
+# 流处理工具与常量原先定义在本模块中，仍可从这里导入
+from .streams import (
+    COMPRESSION_LEVELS, COMPRESSION_MAGIC, COMPRESSION_SUFFIXES, COMPRESSIONS, DEFAULT_MMAP_BLOCK_SIZE,
+    DEFAULT_PIPE_BLOCK_SIZE, DEFAULT_PIPE_DEPTH, STDIO_PATH, PipelinedReader, PipelinedWriter,
+    detect_compression, is_stdio, iter_mmap_lines, open_compressed, open_csv_input, open_output,
+    open_stdio, output_compression,
+)
+
+
+# 未指定路径时 --cache 使用的清单文件（与 converter 的清单分开）
+DEFAULT_CACHE_MANIFEST = Path(".converter_cache.json")
+
+
+def iter_csv_rows(csv_path: str, use_mmap: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取CSV文件，不把整个文件读入内存
+    
+    Args:
+        csv_path: CSV文件的路径（可以是压缩文件）；"-" 表示标准输入
+        use_mmap: 是否通过内存映射读取（压缩文件与标准输入不适用，自动忽略）
+        
+    Yields:
+        每行一个字典
+    """
+    if use_mmap and not is_stdio(csv_path) and detect_compression(csv_path) is None:
+        yield from csv.DictReader(iter_mmap_lines(csv_path, "utf-8-sig"))
+        return
+    
+    # 使用 utf-8-sig 兼容含 BOM 的 CSV（常见于 Windows）
+    with open_csv_input(csv_path, "utf-8-sig") as file:
+        yield from csv.DictReader(file)
+
+
+def read_csv_file(csv_path: str, use_mmap: bool = False) -> List[Dict[str, Any]]:
+    """
+    读取CSV文件并返回字典列表
+    
+    gzip / bz2 / zstd 压缩的输入会自动识别并解压（见 open_csv_input）。
+    
+    Args:
+        csv_path: CSV文件的路径；"-" 表示标准输入
+        use_mmap: 是否通过内存映射读取（大文件时避免整文件拷贝；压缩文件不适用，自动忽略）
+        
+    Returns:
+        包含CSV数据的字典列表，每个字典代表一行数据
+        
+    Raises:
+        FileNotFoundError: 当CSV文件不存在时
+        UnicodeDecodeError: 当文件编码有问题时
+    """
+    try:
+        return list(iter_csv_rows(csv_path, use_mmap))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"CSV文件未找到: {csv_path}")
+    except UnicodeDecodeError as e:
+        raise UnicodeDecodeError(f"文件编码错误: {e}")
+
+
+def convert_csv_to_json_data(
+    csv_data: List[Dict[str, Any]], json_backend: str = "stdlib", compact: bool = False
+) -> str:
+    """
+    将CSV数据转换为JSON格式的字符串
+    
+    Args:
+        csv_data: CSV数据字典列表
+        json_backend: 序列化后端，见 converter.make_json_dumps
+        compact: 为True时输出紧凑JSON，否则缩进2格
+        
+    Returns:
+        JSON格式的字符串
+    """
+    return make_json_dumps(json_backend, indent=2, compact=compact)(csv_data)
+
+
+def iter_json_lines(csv_data: Iterable[Dict[str, Any]], json_backend: str = "stdlib") -> Iterator[str]:
+    """
+    将CSV数据逐行转换为 JSON Lines（NDJSON）格式
+    
+    Args:
+        csv_data: CSV数据字典的可迭代对象
+        json_backend: 序列化后端，见 converter.make_json_dumps
+        
+    Yields:
+        每行一个紧凑JSON对象，以换行符结尾
+    """
+    dumps = make_json_dumps(json_backend, compact=True)
+    for row in csv_data:
+        yield dumps(row) + "\n"
+
+
+def write_json_to_file(json_data: str, output_path: Optional[str] = None, compression: Optional[str] = None) -> bool:
+    """
+    将JSON数据写入文件
+    
+    Args:
+        json_data: 要写入的JSON字符串
+        output_path: 输出文件路径，如果为None则打印到控制台；"-" 表示写入标准输出
+        compression: 输出压缩格式，None 表示不压缩
+        
+    Returns:
+        写入成功时返回 True；写入出错时打印错误并返回 False
+    """
+    if output_path:
+        # 标准输出承载数据时，提示信息写到 stderr
+        out = sys.stderr if is_stdio(output_path) else sys.stdout
+        try:
+            with open_output(output_path, compression) as file:
+                file.write(json_data)
+            print(f"JSON数据已成功写入: {output_path}", file=out)
+        except BrokenPipeError:
+            raise
+        except IOError as e:
+            print(f"写入文件时出错: {e}", file=out)
+            return False
+    else:
+        print(json_data)
+    return True
+
+
+def write_json_lines_to_file(
+    lines: Iterable[str],
+    output_path: Optional[str] = None,
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    compression: Optional[str] = None,
+) -> bool:
+    """
+    将 JSON Lines 分批写入文件，内存占用不超过一个批次
+    
+    Args:
+        lines: 逐行的JSON文本
+        output_path: 输出文件路径，如果为None则打印到控制台；"-" 表示写入标准输出
+        flush_size: 累计多少字符后执行一次写入
+        compression: 输出压缩格式，None 表示不压缩
+        
+    Returns:
+        写入成功时返回 True；写入出错时打印错误并返回 False
+    """
+    if not output_path:
+        for line in lines:
+            print(line, end="")
+        return True
+    
+    out = sys.stderr if is_stdio(output_path) else sys.stdout
+    try:
+        write_json_stream(lines, Path(output_path), flush_size, compression)
+        print(f"JSON Lines数据已成功写入: {output_path}", file=out)
+    except BrokenPipeError:
+        raise
+    except IOError as e:
+        print(f"写入文件时出错: {e}", file=out)
+        return False
+    return True
+
+
+def convert_csv_to_json(
+    csv_path: str,
+    output_path: Optional[str] = None,
+    output_format: str = "json",
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    use_mmap: bool = False,
+    json_backend: str = "stdlib",
+    compact: bool = False,
+    compression: Optional[str] = None,
+) -> bool:
+    """
+    主要的转换函数：读取CSV文件（可以是压缩文件），转换为JSON，并输出
+    
+    JSON Lines 格式逐行读取、逐行写出，内存占用与输入大小无关，适合管道使用。
+    
+    Args:
+        csv_path: 输入CSV文件的路径；"-" 表示标准输入
+        output_path: 输出JSON文件的路径，如果为None则打印到控制台；"-" 表示写入标准输出
+        output_format: 输出格式，"json" 为JSON数组，"jsonl" 为 JSON Lines
+        flush_size: JSON Lines 模式下累计多少字符后执行一次写入
+        use_mmap: 是否通过内存映射读取输入
+        json_backend: 序列化后端，见 converter.make_json_dumps
+        compact: JSON数组模式下是否输出紧凑JSON
+        compression: 输出压缩格式，None 表示不压缩；见 output_compression
+        
+    Returns:
+        转换成功时返回 True；出错时打印错误并返回 False（输出文件可能只写了一部分）
+    """
+    try:
+        # 转换并输出结果
+        if output_format == "jsonl":
+            rows = iter_csv_rows(csv_path, use_mmap)
+            return write_json_lines_to_file(
+                iter_json_lines(rows, json_backend), output_path, flush_size, compression
+            )
+        csv_data = read_csv_file(csv_path, use_mmap)
+        json_data = convert_csv_to_json_data(csv_data, json_backend, compact)
+        return write_json_to_file(json_data, output_path, compression)
+        
+    except BrokenPipeError:
+        # 标准输出的读取方已退出（如 `| head`）：把 stdout 指向 devnull，避免退出时再次报错
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except Exception as e:
+        print(f"转换过程中出错: {e}", file=sys.stderr if is_stdio(output_path) else sys.stdout)
+        return False
+
+
+def convert_csv_to_json_cached(
+    csv_path: str,
+    output_path: str,
+    cache: ConversionCache,
+    force: bool = False,
+    output_format: str = "json",
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    use_mmap: bool = False,
+    json_backend: str = "stdlib",
+    compact: bool = False,
+    compression: Optional[str] = None,
+) -> str:
+    """
+    带增量缓存的 convert_csv_to_json：输入未变化时跳过转换
+    
+    Args:
+        csv_path: 输入CSV文件的路径
+        output_path: 输出文件路径
+        cache: 转换缓存
+        force: 为True时忽略缓存，强制重新转换
+        output_format: 输出格式，"json" 或 "jsonl"
+        flush_size: JSON Lines 模式下累计多少字符后执行一次写入
+        use_mmap: 是否通过内存映射读取输入
+        json_backend: 序列化后端，见 converter.make_json_dumps
+        compact: JSON数组模式下是否输出紧凑JSON
+        compression: 输出压缩格式，None 表示不压缩
+        
+    Returns:
+        "converted"：转换成功；"skipped"：输入未变化而跳过；"failed"：转换出错，不记入缓存
+    """
+    options = _conversion_options(output_format, resolve_json_backend(json_backend), compact, compression)
+    if not force and cache.is_fresh(Path(csv_path), Path(output_path), options):
+        cache.save()
+        return "skipped"
+    
+    # 失败的转换可能留下不完整的输出，只有成功时才记入缓存
+    if not convert_csv_to_json(
+        csv_path, output_path, output_format, flush_size, use_mmap, json_backend, compact, compression
+    ):
+        return "failed"
+    cache.record(Path(csv_path), Path(output_path), options)
+    cache.save()
+    return "converted"
+
+
+def _conversion_options(
+    output_format: str, json_backend: str, compact: bool, compression: Optional[str] = None
+) -> Dict[str, Any]:
+    """返回影响输出的转换选项，用作缓存记录的一部分"""
+    options = {"converter": "day4", "format": output_format, "json_backend": json_backend, "compact": compact}
+    if compression is not None:
+        # 仅在启用压缩时记录，旧清单中的记录依然有效
+        options["compression"] = compression
+    return options
+
+
+def _convert_file_for_batch(
+    task: Tuple[Path, Path, str, int, bool, str, bool, Optional[str]]
+) -> Tuple[int, int, int, Optional[str]]:
+    """
+    批量模式下转换单个文件；出错时返回错误信息而不是抛出异常
+    
+    Returns:
+        (行数, 输入字节数, 输出字节数, 错误信息或None)
+    """
+    csv_path, output_path, output_format, flush_size, use_mmap, json_backend, compact, compression = task
+    try:
+        csv_data = read_csv_file(str(csv_path), use_mmap)
+        if output_format == "jsonl":
+            chunks: Iterable[str] = iter_json_lines(csv_data, json_backend)
+        else:
+            chunks = [convert_csv_to_json_data(csv_data, json_backend, compact)]
+        write_json_stream(chunks, output_path, flush_size, compression)
+        return len(csv_data), csv_path.stat().st_size, output_path.stat().st_size, None
+    except Exception as e:  # one bad file must not abort the batch
+        return 0, 0, 0, str(e)
+
+
+def convert_batch(
+    source: str,
+    output_dir: Optional[str] = None,
+    pattern: str = DEFAULT_BATCH_PATTERN,
+    recursive: bool = False,
+    workers: int = 1,
+    output_format: str = "json",
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    use_mmap: bool = False,
+    cache: Optional[ConversionCache] = None,
+    force: bool = False,
+    json_backend: str = "stdlib",
+    compact: bool = False,
+    compression: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    在同一个进程（或进程池）中批量转换目录/通配符匹配到的所有CSV文件
+    
+    单个文件失败只会记录在汇总中，不会中断整个批次。提供缓存时，
+    未变化的输入会被跳过（force 为True时除外），成功的转换会写入缓存。
+    
+    Args:
+        source: 目录路径或通配符表达式
+        output_dir: 镜像输出目录；为None时输出写在输入文件旁边
+        pattern: source 为目录时使用的文件匹配模式
+        recursive: source 为目录时是否包含子目录
+        workers: 同时转换的文件数
+        output_format: 输出格式，"json" 或 "jsonl"
+        flush_size: 累计多少字符后执行一次写入
+        use_mmap: 是否通过内存映射读取输入
+        cache: 转换缓存；为None时转换所有文件
+        force: 为True时忽略缓存，强制重新转换
+        json_backend: 序列化后端，见 converter.make_json_dumps
+        compact: JSON数组模式下是否输出紧凑JSON
+        compression: 所有输出的压缩格式，None 表示不压缩；输出文件追加对应扩展名（如 a.json.gz）
+        
+    Returns:
+        汇总信息，见 converter.BatchSummary
+    """
+    base, inputs = find_batch_inputs(source, pattern, recursive)
+    json_backend = resolve_json_backend(json_backend)
+    return run_batch(
+        inputs, base, _convert_file_for_batch,
+        (output_format, flush_size, use_mmap, json_backend, compact, compression),
+        _conversion_options(output_format, json_backend, compact, compression),
+        None if output_dir is None else Path(output_dir), workers, output_format, compression, cache, force,
+    )
+
+
+def print_batch_summary(summary: BatchSummary) -> None:
+    """
+    打印批量转换的汇总信息
+    
+    Args:
+        summary: convert_batch 的返回值
+    """
+    print(f"文件数: {summary.files}（成功 {summary.converted}，未变化跳过 {summary.skipped}，"
+          f"失败 {len(summary.errors)}）")
+    print(f"行数: {summary.rows}")
+    print(f"字节: 读取 {summary.bytes_in}，写出 {summary.bytes_out}")
+    print(f"耗时: {summary.seconds:.3f} 秒")
+    for csv_path, error in summary.errors:
+        print(f"失败: {csv_path}: {error}")
+
+
+def print_csv_as_json(csv_path: str) -> None:
+    """
+    兼容性函数：保持原有接口不变
+    
+    Args:
+        csv_path: CSV文件的路径
+    """
+    convert_csv_to_json(csv_path)
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析命令行参数
+    
+    Args:
+        argv: 要解析的参数，None 表示 sys.argv[1:]
+        
+    Returns:
+        解析后的参数
+    """
+    parser = argparse.ArgumentParser(description="CSV → JSON 转换器")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument(
+        "input", nargs="?", default="test_data/sample.csv",
+        help="输入CSV文件路径，- 表示标准输入（--batch 时为目录或通配符）",
+    )
+    parser.add_argument(
+        "-o", "--output", help="输出文件路径，- 表示标准输出，省略则打印到控制台（--batch 时为镜像输出目录）"
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=["json", "jsonl"],
+        default="json",
+        help="输出格式：JSON数组或 JSON Lines（默认 json）",
+    )
+    parser.add_argument(
+        "--flush-size",
+        type=int,
+        default=DEFAULT_FLUSH_SIZE,
+        help=f"JSON Lines 模式下每次写入的字符数（默认 {DEFAULT_FLUSH_SIZE}）",
+    )
+    parser.add_argument("--compact", action="store_true", help="输出单行紧凑JSON（分隔符后不带空格）")
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default="auto",
+        help="压缩输出；auto 在输出文件名以 .gz/.bz2/.zst 结尾时压缩。压缩输入总是自动识别（默认 auto）",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=JSON_BACKENDS,
+        default="stdlib",
+        help="JSON序列化后端；auto 在已安装时使用 orjson 或 ujson（默认 stdlib）",
+    )
+    parser.add_argument("--mmap", action="store_true", help="通过内存映射读取输入文件")
+    parser.add_argument("--batch", action="store_true", help="批量转换目录或通配符匹配的所有CSV文件")
+    parser.add_argument(
+        "--pattern", default=DEFAULT_BATCH_PATTERN,
+        help=f"--batch 指定目录时的文件匹配模式（默认 {DEFAULT_BATCH_PATTERN}）",
+    )
+    parser.add_argument("--recursive", action="store_true", help="--batch 指定目录时包含子目录")
+    parser.add_argument("--workers", type=int, default=1, help="--batch 时同时转换的文件数（默认 1）")
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_CACHE_MANIFEST,
+        metavar="MANIFEST",
+        help=f"跳过自上次转换以来未变化的输入，记录保存在 MANIFEST（默认 {DEFAULT_CACHE_MANIFEST}）",
+    )
+    parser.add_argument("--force", action="store_true", help="配合 --cache：即使输入未变化也重新转换")
+    parser.add_argument("--invalidate", action="store_true", help="配合 --cache：删除所选输入的缓存记录后退出")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    命令行入口
+    
+    Args:
+        argv: 命令行参数，None 表示 sys.argv[1:]
+    """
+    args = parse_arguments(argv)
+    for option, value in (("--flush-size", args.flush_size), ("--workers", args.workers)):
+        if value <= 0:
+            print(f"错误: {option} 必须是正数")
+            sys.exit(1)
+    try:
+        json_backend = resolve_json_backend(args.json_backend)
+        if args.batch:
+            # 批量输出按格式命名，只有显式指定的压缩格式才生效
+            compression = None if args.compress == "auto" else output_compression(None, args.compress)
+        else:
+            compression = output_compression(args.output, args.compress)
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+    
+    cache = ConversionCache(args.cache) if args.cache else None
+    if (args.force or args.invalidate) and cache is None:
+        print("错误: --force 和 --invalidate 需要配合 --cache 使用")
+        sys.exit(1)
+    
+    if is_stdio(args.input) or is_stdio(args.output):
+        if args.batch:
+            print("错误: --batch 需要目录或通配符，不能使用 -")
+            sys.exit(1)
+        if cache is not None:
+            print("错误: --cache 需要文件路径，不能使用 -")
+            sys.exit(1)
+    
+    if args.invalidate:
+        if args.batch:
+            targets = find_batch_inputs(args.input, args.pattern, args.recursive)[1]
+        else:
+            targets = [Path(args.input)]
+        removed = cache.invalidate(targets)
+        cache.save()
+        print(f"已删除 {removed} 条缓存记录")
+        sys.exit(0)
+    
+    if args.batch:
+        summary = convert_batch(
+            args.input,
+            args.output,
+            args.pattern,
+            args.recursive,
+            args.workers,
+            args.output_format,
+            args.flush_size,
+            args.mmap,
+            cache,
+            args.force,
+            json_backend,
+            args.compact,
+            compression,
+        )
+        print_batch_summary(summary)
+        sys.exit(1 if summary.errors else 0)
+    
+    if cache is not None and args.output:
+        outcome = convert_csv_to_json_cached(
+            args.input, args.output, cache, args.force, args.output_format, args.flush_size, args.mmap,
+            json_backend, args.compact, compression,
+        )
+        if outcome == "skipped":
+            print(f"输入未变化，已跳过: {args.input}")
+        ok = outcome != "failed"
+    else:
+        ok = convert_csv_to_json(
+            args.input, args.output, args.output_format, args.flush_size, args.mmap,
+            json_backend, args.compact, compression,
+        )
+    if not ok:
+        sys.exit(1)
+
+
+# 主程序
+if __name__ == "__main__":
+    main()
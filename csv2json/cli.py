@@ -0,0 +1,246 @@
+"""
+Command Line
+The ``csv2json`` command.
+
+Parsing the arguments needs only argparse and the constants, so ``--help``,
+``--version`` and usage errors answer without loading the converter, which
+is imported once there is something to convert. For the same reason the
+annotations here do not use the typing module, whose import alone costs
+about as much as argparse.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from . import __version__
+from .constants import (
+    COMPRESSIONS, DEFAULT_BATCH_PATTERN, DEFAULT_CACHE_MANIFEST, DEFAULT_CHUNK_SIZE, DEFAULT_FLUSH_SIZE,
+    JSON_BACKENDS, OUTPUT_FORMATS,
+)
+
+
+def parse_arguments(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+    
+    Args:
+        argv: Arguments to parse, or None for ``sys.argv[1:]``
+        
+    Returns:
+        Parsed arguments namespace
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert CSV files to JSON format with automatic type detection",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s input.csv output.json
+  %(prog)s data/sales.csv results/sales.json
+  %(prog)s big_export.csv out.json --stream --indent 0
+  %(prog)s big_export.csv out.jsonl --stream --format jsonl
+  %(prog)s big_export.csv out.json --stream --compact --json-backend auto
+  %(prog)s big_export.csv out.json --workers 8
+  %(prog)s big_export.csv out.columnar --stream --format columnar
+  %(prog)s orders.csv big_paid.jsonl --stream --format jsonl \
+      --columns id,amount,status --where "amount>100" --where status=paid
+  %(prog)s drop.csv.gz archive/drop.jsonl.gz --stream --format jsonl
+  zcat drop.csv.gz | %(prog)s - - --format jsonl | kafka-producer
+  %(prog)s --batch drops/ converted/ --recursive --workers 8
+  %(prog)s --batch "drops/**/*.csv" --format jsonl
+  %(prog)s --batch drops/ --cache drops/.manifest.json
+  %(prog)s --batch drops/ --pattern "*.csv.gz" --compress gzip
+  %(prog)s input.csv output.json --profile --stats-json stats.json
+        """
+    )
+    
+    parser.add_argument(
+        'input_csv',
+        help='Path to the input CSV file, - for standard input (a directory or glob with --batch)'
+    )
+    
+    parser.add_argument(
+        'output_json',
+        nargs='?',
+        type=Path,
+        help='Path to the output JSON file, - for standard output '
+             '(optional mirror directory with --batch)'
+    )
+    
+    parser.add_argument(
+        '--indent',
+        type=int,
+        default=2,
+        help='JSON indentation level; 0 or less writes single-line JSON (default: 2)'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Convert row by row with constant memory instead of loading the whole file'
+    )
+    
+    parser.add_argument(
+        '--format',
+        dest='output_format',
+        choices=OUTPUT_FORMATS,
+        default='json',
+        help='Output format: a JSON array, JSON Lines, or typed column arrays in a '
+             'compact binary file (columnar) or Parquet (needs pyarrow) (default: json)'
+    )
+    
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Write single-line JSON without spaces after separators; overrides --indent'
+    )
+    
+    parser.add_argument(
+        '--json-backend',
+        choices=JSON_BACKENDS,
+        default='stdlib',
+        help='JSON serializer; auto picks orjson or ujson when installed. Fast backends '
+             'write equivalent but not byte-identical JSON (default: stdlib)'
+    )
+    
+    parser.add_argument(
+        '--compress',
+        choices=COMPRESSIONS,
+        default='auto',
+        help='Compress JSON output; auto compresses when the output name ends with '
+             '.gz, .bz2 or .zst. Compressed input is always detected (default: auto)'
+    )
+    
+    parser.add_argument(
+        '--columns',
+        metavar='NAMES',
+        help='Comma-separated columns to keep, in output order; the others are never '
+             'type-converted (default: all columns)'
+    )
+    
+    parser.add_argument(
+        '--where',
+        action='append',
+        default=[],
+        metavar='CONDITION',
+        help='Keep only rows meeting COLUMN OP VALUE: OP is =, != (exact text) or '
+             '>, >=, <, <= (numbers). Repeat to require several conditions'
+    )
+    
+    parser.add_argument(
+        '--flush-size',
+        type=int,
+        default=DEFAULT_FLUSH_SIZE,
+        help=f'Characters buffered before each write (default: {DEFAULT_FLUSH_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of worker processes; more than 1 converts chunks in parallel (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'Bytes of input per parallel work unit (default: {DEFAULT_CHUNK_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='Read the input through a memory map instead of loading it into memory'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Convert every CSV selected by a directory or glob; --workers files at a time'
+    )
+    
+    parser.add_argument(
+        '--pattern',
+        default=DEFAULT_BATCH_PATTERN,
+        help=f'File pattern used when --batch is given a directory (default: {DEFAULT_BATCH_PATTERN})'
+    )
+    
+    parser.add_argument(
+        '--recursive',
+        action='store_true',
+        help='Also scan subdirectories when --batch is given a directory'
+    )
+    
+    parser.add_argument(
+        '--cache',
+        nargs='?',
+        type=Path,
+        const=DEFAULT_CACHE_MANIFEST,
+        metavar='MANIFEST',
+        help=f'Skip inputs unchanged since their last conversion, tracked in MANIFEST '
+             f'(default: {DEFAULT_CACHE_MANIFEST})'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='With --cache, convert inputs even if they are unchanged'
+    )
+    
+    parser.add_argument(
+        '--invalidate',
+        action='store_true',
+        help='With --cache, forget the selected inputs in the manifest and exit'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print wall time, CPU time, peak memory and row/byte counts per stage'
+    )
+    
+    parser.add_argument(
+        '--stats-json',
+        type=Path,
+        metavar='PATH',
+        help='Write the per-stage stats as JSON to PATH'
+    )
+    
+    parser.add_argument(
+        '--trace-memory',
+        type=Path,
+        nargs='?',
+        const=True,
+        metavar='SNAPSHOT',
+        help='Measure per-stage peak memory with tracemalloc (slower); '
+             'optionally dump a snapshot to SNAPSHOT'
+    )
+    
+    parser.add_argument(
+        '--cprofile',
+        type=Path,
+        metavar='PATH',
+        help='Run the conversion under cProfile and dump pstats data to PATH'
+    )
+    
+    parser.add_argument(
+        '--version',
+        action='version',
+        version=f'CSV to JSON Converter {__version__}'
+    )
+    
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Entry point of the ``csv2json`` command.
+    
+    Args:
+        argv: Command line arguments, or None for ``sys.argv[1:]``
+    """
+    args = parse_arguments(argv)
+    from .converter import run
+    run(args)
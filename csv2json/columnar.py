@@ -0,0 +1,514 @@
+"""
+Columnar Output for the CSV Converter
+
+Writes typed rows as column arrays instead of JSON text, and reads them back.
+
+Two formats are supported:
+  - ``columnar``: a self-describing binary format built on the standard
+    library's ``array`` module, always available.
+  - ``parquet``: Apache Parquet through pyarrow, when pyarrow is installed.
+
+Layout of a ``columnar`` file (all numbers little-endian):
+
+    MAGIC
+    row group 0: column chunk 0, column chunk 1, ...
+    row group 1: ...
+    footer (UTF-8 JSON: columns, types, and offset/size/encoding of every chunk)
+    footer length (uint64)
+    MAGIC
+
+A column chunk holds the positions of its nulls (uint32) followed by the
+non-null values in one of these encodings, chosen per chunk from the values
+it actually holds, so a chunk always reads back exactly as written:
+
+    null     no data; every value is None
+    bool     one byte per value
+    int8, int16, int32, int64
+             integers, in the narrowest width that holds the chunk
+    float    float64 values
+    str      uint32 length (in code points) per value, then the UTF-8 text
+    dict     strings with many repeats: uint32 number of distinct strings
+             and uint32 size of their UTF-8 text, those strings as in
+             'str', then one index per value (uint8, uint16 or uint32,
+             depending on the number of distinct strings)
+    json     a JSON array of all values, nulls included; used for mixed
+             chunks and integers beyond int64
+
+Readers only read the chunks of the columns they ask for.
+"""
+
+import importlib
+import importlib.util
+import io
+import json
+import struct
+import sys
+from array import array
+from itertools import accumulate, compress
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Parquet support is optional; pyarrow takes long to import, so it is only
+# imported once a Parquet file is written or read
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+
+# Output formats written by ColumnarWriter; 'parquet' needs pyarrow
+COLUMNAR_FORMATS = ('columnar', 'parquet')
+
+# Rows buffered per row group
+DEFAULT_ROW_GROUP_SIZE = 64 * 1024
+
+# File signature at both ends of a 'columnar' file, and of a Parquet file
+MAGIC = b'CSVCOL1\n'
+PARQUET_MAGIC = b'PAR1'
+
+FORMAT_VERSION = 1
+
+_FOOTER_LENGTH = struct.Struct('<Q')
+
+# Array type codes for 32-bit unsigned integers and 64-bit floats
+_UINT32 = next(code for code in 'IL' if array(code).itemsize == 4)
+_FLOAT64 = 'd'
+
+# Integer encodings from narrowest to widest: type code and value range
+_INT_ENCODINGS = tuple(
+    (f'int{bits}', next(code for code in 'bhilq' if array(code).itemsize * 8 == bits),
+     -(1 << (bits - 1)), (1 << (bits - 1)) - 1)
+    for bits in (8, 16, 32, 64)
+)
+_INT_TYPECODES = {name: code for name, code, _, _ in _INT_ENCODINGS}
+
+# Index type codes of the 'dict' encoding, by the largest number of distinct strings they address
+_DICT_INDEX_TYPECODES = ((1 << 8, 'B'), (1 << 16, 'H'), (1 << 32, _UINT32))
+
+_PARQUET_TYPES = {'null': 'null', 'bool': 'bool_', 'int': 'int64', 'float': 'float64', 'str': 'string'}
+
+
+def _array_bytes(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _bytes_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _chunk_encoding(values: List[Any]) -> str:
+    """Pick the narrowest encoding that holds every non-null value of a chunk."""
+    kinds = {type(value) for value in values}
+    kinds.discard(type(None))
+    if not kinds:
+        return 'null'
+    if len(kinds) > 1:
+        return 'json'
+    kind = kinds.pop()
+    if kind is int:
+        present = [value for value in values if value is not None]
+        low, high = min(present), max(present)
+        for name, _, min_value, max_value in _INT_ENCODINGS:
+            if min_value <= low and high <= max_value:
+                return name
+        return 'json'
+    return {bool: 'bool', float: 'float', str: 'str'}.get(kind, 'json')
+
+
+def _dict_index_typecode(distinct: int) -> str:
+    return next(code for limit, code in _DICT_INDEX_TYPECODES if distinct <= limit)
+
+
+def _encode_strings(values: List[str]) -> Tuple[bytes, bytes]:
+    return _array_bytes(array(_UINT32, map(len, values))), ''.join(values).encode('utf-8')
+
+
+def _decode_strings(data: bytes, count: int) -> List[str]:
+    lengths = _bytes_array(_UINT32, data[:count * 4])
+    text = data[count * 4:].decode('utf-8')
+    ends = list(accumulate(lengths))
+    return list(map(text.__getitem__, map(slice, [0] + ends, ends)))
+
+
+def encode_chunk(values: List[Any]) -> Tuple[str, int, bytes]:
+    """
+    Encode the values of one column chunk.
+
+    Args:
+        values: Values of the column within one row group
+
+    Returns:
+        Encoding name, number of nulls and the encoded bytes
+    """
+    encoding = _chunk_encoding(values)
+    if encoding == 'null':
+        return encoding, len(values), b''
+    if encoding == 'json':
+        return encoding, 0, json.dumps(values, ensure_ascii=False).encode('utf-8')
+
+    null_positions = [i for i, value in enumerate(values) if value is None]
+    if null_positions:
+        values = [value for value in values if value is not None]
+    parts = [_array_bytes(array(_UINT32, null_positions))]
+    if encoding == 'bool':
+        parts.append(bytes(values))
+    elif encoding in _INT_TYPECODES:
+        parts.append(_array_bytes(array(_INT_TYPECODES[encoding], values)))
+    elif encoding == 'float':
+        parts.append(_array_bytes(array(_FLOAT64, values)))
+    else:
+        distinct = dict.fromkeys(values)
+        if len(distinct) * 2 <= len(values):
+            encoding = 'dict'
+            for index, value in enumerate(distinct):
+                distinct[value] = index
+            lengths, text = _encode_strings(list(distinct))
+            parts += [_array_bytes(array(_UINT32, [len(distinct), len(text)])), lengths, text]
+            indices = array(_dict_index_typecode(len(distinct)), map(distinct.__getitem__, values))
+            parts.append(_array_bytes(indices))
+        else:
+            parts.extend(_encode_strings(values))
+    return encoding, len(null_positions), b''.join(parts)
+
+
+def decode_chunk(encoding: str, rows: int, nulls: int, data: bytes) -> List[Any]:
+    """
+    Decode one column chunk written by ``encode_chunk``.
+
+    Args:
+        encoding: Encoding name stored in the footer
+        rows: Number of values in the chunk, nulls included
+        nulls: Number of nulls stored as positions
+        data: Encoded bytes
+
+    Returns:
+        The chunk's values
+
+    Raises:
+        ValueError: If the encoding is unknown
+    """
+    if encoding == 'null':
+        return [None] * rows
+    if encoding == 'json':
+        return json.loads(data)
+
+    offset = nulls * 4
+    null_positions = _bytes_array(_UINT32, data[:offset])
+    count = rows - nulls
+    if encoding == 'bool':
+        values: List[Any] = list(map(bool, data[offset:offset + count]))
+    elif encoding in _INT_TYPECODES:
+        values = _bytes_array(_INT_TYPECODES[encoding], data[offset:]).tolist()
+    elif encoding == 'float':
+        values = _bytes_array(_FLOAT64, data[offset:]).tolist()
+    elif encoding == 'str':
+        values = _decode_strings(data[offset:], count)
+    elif encoding == 'dict':
+        distinct, text_size = _bytes_array(_UINT32, data[offset:offset + 8])
+        offset += 8
+        strings_end = offset + distinct * 4 + text_size
+        strings = _decode_strings(data[offset:strings_end], distinct)
+        indices = _bytes_array(_dict_index_typecode(distinct), data[strings_end:])
+        values = list(map(strings.__getitem__, indices))
+    else:
+        raise ValueError(f"Unknown column encoding: {encoding}")
+
+    if not nulls:
+        return values
+    present = bytearray(b'\x01') * rows
+    for position in null_positions:
+        present[position] = 0
+    result: List[Any] = [None] * rows
+    for position, value in zip(compress(range(rows), present), values):
+        result[position] = value
+    return result
+
+
+class ColumnarWriter:
+    """
+    Buffer rows into row groups and write them as a columnar file.
+
+    Every row must have the columns of the first row (missing values are
+    written as null). Use as a context manager, or call ``close`` to write
+    the footer; a file without its footer cannot be read.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        output_format: str = 'columnar',
+        schema: Optional[Dict[str, str]] = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ) -> None:
+        """
+        Open the output file.
+
+        Args:
+            file_path: Path of the file to write
+            output_format: One of ``COLUMNAR_FORMATS``
+            schema: Column types from ``infer_schema``, stored in the footer
+                and used for the Parquet column types
+            row_group_size: Rows buffered per row group
+
+        Raises:
+            ValueError: If the format is unknown or pyarrow is missing for Parquet
+        """
+        if output_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported columnar format: {output_format}")
+        if output_format == 'parquet' and not PARQUET_AVAILABLE:
+            raise ValueError("Parquet output requires pyarrow (pip install pyarrow)")
+        self.file_path = Path(file_path)
+        self.output_format = output_format
+        self.schema = dict(schema or {})
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._columns: Optional[List[str]] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._row_groups: List[Dict[str, Any]] = []
+        self._parquet_writer = None
+        self._arrow_schema = None
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.file_path, 'wb')
+        if output_format == 'columnar':
+            self._file.write(MAGIC)
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Add rows, writing a row group whenever enough are buffered.
+
+        Raises:
+            ValueError: If a row has a column the first row does not have
+        """
+        pending = self._pending
+        for row in rows:
+            pending.append(row)
+            if len(pending) >= self.row_group_size:
+                self._flush()
+
+    def close(self) -> None:
+        """Write the remaining rows and the footer, then close the file."""
+        if self._file.closed:
+            return
+        try:
+            self._flush()
+            if self._columns is None:
+                self._columns = list(self.schema)
+            if self.output_format == 'parquet':
+                if self._parquet_writer is None:
+                    self._write_parquet_group({}, 0)
+                self._parquet_writer.close()
+            else:
+                self._write_footer()
+        finally:
+            self._file.close()
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _flush(self) -> None:
+        rows = self._pending
+        if not rows:
+            return
+        if self._columns is None:
+            self._columns = list(rows[0])
+            for name in self._columns:
+                self.schema.setdefault(name, 'null')
+        names = self._columns
+        known = set(names)
+        for number, row in enumerate(rows, self.rows_written + 1):
+            if not row.keys() <= known:
+                extra = [str(key) for key in row if key not in known]
+                raise ValueError(f"Row {number} has columns the first row does not have: {', '.join(extra)}")
+
+        columns = {name: [row.get(name) for row in rows] for name in names}
+        if self.output_format == 'parquet':
+            self._write_parquet_group(columns, len(rows))
+        else:
+            self._write_row_group(columns, len(rows))
+        self.rows_written += len(rows)
+        rows.clear()
+
+    def _write_row_group(self, columns: Dict[str, List[Any]], rows: int) -> None:
+        chunks = []
+        for name in self._columns:
+            encoding, nulls, data = encode_chunk(columns[name])
+            chunks.append({'encoding': encoding, 'offset': self._file.tell(), 'size': len(data),
+                           'nulls': nulls})
+            self._file.write(data)
+        self._row_groups.append({'rows': rows, 'columns': chunks})
+
+    def _write_footer(self) -> None:
+        footer = json.dumps({
+            'version': FORMAT_VERSION,
+            'rows': self.rows_written,
+            'columns': [{'name': name, 'type': self.schema[name]} for name in self._columns],
+            'row_groups': self._row_groups,
+        }, ensure_ascii=False).encode('utf-8')
+        self._file.write(footer)
+        self._file.write(_FOOTER_LENGTH.pack(len(footer)))
+        self._file.write(MAGIC)
+
+    def _write_parquet_group(self, columns: Dict[str, List[Any]], rows: int) -> None:
+        pyarrow = _require_pyarrow()
+        if self._parquet_writer is None:
+            self._arrow_schema = pyarrow.schema([
+                (name, getattr(pyarrow, _PARQUET_TYPES[self.schema[name]])()) for name in self._columns
+            ])
+            self._parquet_writer = pyarrow.parquet.ParquetWriter(self._file, self._arrow_schema)
+        arrays = []
+        for field in self._arrow_schema:
+            try:
+                arrays.append(pyarrow.array(columns.get(field.name, [None] * rows), type=field.type))
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, OverflowError) as e:
+                raise ValueError(
+                    f"Column '{field.name}' has values that do not fit its Parquet type "
+                    f"{field.type}; use the columnar format for mixed columns ({e})"
+                )
+        self._parquet_writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self._arrow_schema))
+
+
+def write_columnar(
+    rows: Iterable[Dict[str, Any]],
+    file_path: Path,
+    output_format: str = 'columnar',
+    schema: Optional[Dict[str, str]] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> int:
+    """
+    Write rows to a columnar file.
+
+    Args:
+        rows: Iterable of dictionaries with typed values
+        file_path: Path of the file to write
+        output_format: One of ``COLUMNAR_FORMATS``
+        schema: Column types from ``infer_schema``
+        row_group_size: Rows buffered per row group
+
+    Returns:
+        Number of rows written
+    """
+    with ColumnarWriter(file_path, output_format, schema, row_group_size) as writer:
+        writer.write_rows(rows)
+    return writer.rows_written
+
+
+def _read_footer(file: io.BufferedReader, file_path: Path) -> Dict[str, Any]:
+    size = file.seek(0, io.SEEK_END)
+    trailer_size = _FOOTER_LENGTH.size + len(MAGIC)
+    if size < len(MAGIC) + trailer_size:
+        raise ValueError(f"Not a columnar file: {file_path}")
+    file.seek(size - trailer_size)
+    trailer = file.read(trailer_size)
+    if trailer[_FOOTER_LENGTH.size:] != MAGIC:
+        raise ValueError(f"Columnar file is truncated or not a columnar file: {file_path}")
+    footer_size = _FOOTER_LENGTH.unpack_from(trailer)[0]
+    file.seek(size - trailer_size - footer_size)
+    footer = json.loads(file.read(footer_size))
+    if footer.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar file version {footer.get('version')}: {file_path}")
+    return footer
+
+
+def read_columnar_schema(file_path: Path) -> Dict[str, str]:
+    """
+    Read the column names and types of a columnar or Parquet file.
+
+    Returns:
+        Mapping of column name to column type, in column order
+    """
+    with open(file_path, 'rb') as file:
+        if file.read(len(PARQUET_MAGIC)) == PARQUET_MAGIC:
+            arrow_schema = _require_pyarrow().parquet.read_schema(file_path)
+            return {field.name: str(field.type) for field in arrow_schema}
+        return {column['name']: column['type'] for column in _read_footer(file, file_path)['columns']}
+
+
+def iter_columnar_batches(
+    file_path: Path, columns: Optional[List[str]] = None
+) -> Iterator[Dict[str, List[Any]]]:
+    """
+    Read a columnar or Parquet file one row group at a time.
+
+    Args:
+        file_path: File written by ``ColumnarWriter``
+        columns: Names of the columns to read, or None for all of them;
+            only their chunks are read from disk
+
+    Yields:
+        Mapping of column name to its values within one row group, in file
+        column order
+
+    Raises:
+        ValueError: If the file is not a columnar file or a column is unknown
+    """
+    with open(file_path, 'rb') as file:
+        if file.read(len(PARQUET_MAGIC)) == PARQUET_MAGIC:
+            parquet_file = _require_pyarrow().parquet.ParquetFile(file)
+            for group in range(parquet_file.num_row_groups):
+                yield parquet_file.read_row_group(group, columns=columns).to_pydict()
+            return
+
+        footer = _read_footer(file, file_path)
+        names = [column['name'] for column in footer['columns']]
+        unknown = [name for name in columns or [] if name not in names]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        selected = [i for i, name in enumerate(names) if columns is None or name in columns]
+        for group in footer['row_groups']:
+            batch = {}
+            for i in selected:
+                chunk = group['columns'][i]
+                file.seek(chunk['offset'])
+                batch[names[i]] = decode_chunk(
+                    chunk['encoding'], group['rows'], chunk['nulls'], file.read(chunk['size'])
+                )
+            yield batch
+
+
+def read_columnar(file_path: Path, columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+    """
+    Read a columnar or Parquet file into one list per column.
+
+    Args:
+        file_path: File written by ``ColumnarWriter``
+        columns: Names of the columns to read, or None for all of them
+
+    Returns:
+        Mapping of column name to all of its values, in the order of
+        ``columns`` or else in file column order
+    """
+    result: Dict[str, List[Any]] = {name: [] for name in columns or read_columnar_schema(file_path)}
+    for batch in iter_columnar_batches(file_path, columns):
+        for name, values in batch.items():
+            result[name].extend(values)
+    return result
+
+
+def iter_columnar_rows(file_path: Path, columns: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Read a columnar or Parquet file back as row dictionaries.
+
+    Args:
+        file_path: File written by ``ColumnarWriter``
+        columns: Names of the columns to read, or None for all of them
+
+    Yields:
+        One dictionary per row, equal to the row that was written
+    """
+    for batch in iter_columnar_batches(file_path, columns):
+        names = list(batch)
+        for values in zip(*batch.values()):
+            yield dict(zip(names, values))
+
+
+def _require_pyarrow():
+    if not PARQUET_AVAILABLE:
+        raise ValueError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+    importlib.import_module('pyarrow.parquet')
+    return importlib.import_module('pyarrow')
@@ -0,0 +1,35 @@
+"""
+Defaults and choices shared by the converters and the command line.
+
+Kept free of heavy imports so that parsing the command line does not load
+the converter.
+"""
+
+from pathlib import Path
+
+
+# Number of characters buffered before a streamed write hits the file
+DEFAULT_FLUSH_SIZE = 1024 * 1024
+
+# Target size in bytes of each byte range converted by a worker process
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+# File pattern matched inside a directory in batch mode
+DEFAULT_BATCH_PATTERN = '*.csv'
+
+# Manifest file used by --cache when no path is given
+DEFAULT_CACHE_MANIFEST = Path('.csv_to_json_cache.json')
+
+# JSON serializer backends accepted by --json-backend; 'auto' picks the
+# fastest one that is installed
+JSON_BACKENDS = ('auto', 'stdlib', 'orjson', 'ujson')
+
+# Output formats accepted by --format, with the file extension batch mode
+# gives each; the columnar ones are written by the columnar module
+OUTPUT_SUFFIXES = {'json': '.json', 'jsonl': '.jsonl', 'columnar': '.columnar', 'parquet': '.parquet'}
+OUTPUT_FORMATS = tuple(OUTPUT_SUFFIXES)
+
+# Compressed outputs get the codec's extension appended, and --compress auto
+# picks the codec from the output file's extension
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'zstd': '.zst'}
+COMPRESSIONS = ('auto', 'none') + tuple(COMPRESSION_SUFFIXES)
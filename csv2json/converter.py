@@ -0,0 +1,1892 @@
+"""
+CSV to JSON Converter
+Typed CSV to JSON conversion: schema inference, streaming, parallel and batch
+conversion, and the ``csv2json`` command line.
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import importlib
+import io
+import json
+import math
+import mmap
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from itertools import chain, islice
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from .cli import parse_arguments
+from .columnar import COLUMNAR_FORMATS, PARQUET_AVAILABLE, ColumnarWriter, write_columnar
+from .selection import RowSelection, parse_selection
+# The stream helpers and constants used to be defined here and are still importable from here
+from .constants import (
+    COMPRESSION_SUFFIXES, COMPRESSIONS, DEFAULT_BATCH_PATTERN, DEFAULT_CACHE_MANIFEST, DEFAULT_CHUNK_SIZE,
+    DEFAULT_FLUSH_SIZE, JSON_BACKENDS, OUTPUT_FORMATS, OUTPUT_SUFFIXES,
+)
+from .streams import (
+    COMPRESSION_LEVELS, COMPRESSION_MAGIC, DEFAULT_MMAP_BLOCK_SIZE,
+    DEFAULT_PIPE_BLOCK_SIZE, DEFAULT_PIPE_DEPTH, STDIO_PATH, PipelinedReader, PipelinedWriter,
+    detect_compression, is_stdio, iter_mmap_lines, open_compressed, open_csv_input, open_output,
+    open_stdio, output_compression,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module
+    resource = None
+
+
+# Number of leading rows examined when inferring the column schema
+DEFAULT_SAMPLE_SIZE = 1000
+
+# Column types reported by infer_schema
+COLUMN_TYPES = ('null', 'bool', 'int', 'float', 'str')
+
+Schema = Dict[str, str]
+
+# Fast JSON backends in the order 'auto' tries them
+_FAST_JSON_BACKENDS = ('orjson', 'ujson')
+
+# Types _has_non_finite searches inside
+_CONTAINER_TYPES = (dict, list, tuple)
+
+
+def csv_to_dict_list(csv_content: str, selection: Optional[RowSelection] = None) -> List[Dict[str, str]]:
+    """
+    Convert CSV content string to a list of dictionaries.
+    
+    Records are split by the csv module, so quoted fields keep their line
+    breaks exactly as the streaming, memory-mapped and parallel readers do.
+    
+    Args:
+        csv_content: Raw CSV content as a string
+        selection: Columns and rows to keep, or None for all of them
+        
+    Returns:
+        List of dictionaries where each dictionary represents a CSV row
+        with column headers as keys
+    """
+    lines = io.StringIO(csv_content, newline='')
+    if selection is not None:
+        return list(selection.select(csv.reader(lines)))
+    csv_reader = csv.DictReader(lines)
+    return [row for row in csv_reader]
+
+
+def dict_list_to_json(
+    data: List[Dict[str, str]],
+    indent: Optional[int] = 2,
+    json_backend: str = 'stdlib',
+    compact: bool = False,
+) -> str:
+    """
+    Convert a list of dictionaries to JSON string.
+    
+    Args:
+        data: List of dictionaries to convert
+        indent: JSON indentation level for pretty printing
+        json_backend: Serializer backend, see ``make_json_dumps``
+        compact: Write single-line JSON without spaces after separators
+        
+    Returns:
+        JSON formatted string
+    """
+    return make_json_dumps(json_backend, indent, compact)(data)
+
+
+def resolve_json_backend(name: str = 'auto') -> str:
+    """
+    Resolve a JSON backend name to a backend that can be imported.
+    
+    Args:
+        name: One of ``JSON_BACKENDS``; ``'auto'`` prefers orjson, then
+            ujson, then the standard library
+            
+    Returns:
+        Name of the backend that will be used
+        
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {name}")
+    if name == 'stdlib':
+        return name
+    
+    for candidate in (_FAST_JSON_BACKENDS if name == 'auto' else (name,)):
+        try:
+            importlib.import_module(candidate)
+        except ImportError:
+            continue
+        return candidate
+    if name == 'auto':
+        return 'stdlib'
+    raise ValueError(f"JSON backend is not installed: {name}")
+
+
+def make_json_dumps(
+    json_backend: str = 'stdlib', indent: Optional[int] = None, compact: bool = False
+) -> Callable[[Any], str]:
+    """
+    Build a function that serializes one object with the chosen backend.
+    
+    The stdlib backend matches ``json.dumps`` byte for byte. orjson and ujson
+    produce equivalent documents that may differ in whitespace and float
+    spelling (``1e16`` rather than ``1e+16``); orjson only indents by two
+    spaces, so other indent levels use the stdlib. Objects a fast backend
+    rejects, such as integers wider than 64 bits, are serialized with the
+    stdlib instead of failing the conversion. So are objects holding NaN or
+    infinity, which orjson would write as ``null``, so that every backend
+    keeps the stdlib's ``NaN`` and ``Infinity``.
+    
+    Args:
+        json_backend: One of ``JSON_BACKENDS``
+        indent: JSON indentation level, or None for single-line output
+        compact: Single-line output without spaces after separators;
+            overrides ``indent``
+            
+    Returns:
+        Function mapping an object to its JSON text
+        
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    if compact:
+        indent = None
+    separators = (',', ':') if compact else None
+    
+    def stdlib_dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=indent, ensure_ascii=False, separators=separators)
+    
+    backend = resolve_json_backend(json_backend)
+    if backend == 'orjson' and indent in (None, 2):
+        orjson = importlib.import_module('orjson')
+        option = orjson.OPT_INDENT_2 if indent else 0
+        
+        def orjson_dumps(obj: Any) -> str:
+            try:
+                text = orjson.dumps(obj, option=option)
+            except TypeError:
+                return stdlib_dumps(obj)
+            # Non-finite floats come out as null; only then is the object searched for them
+            if b'null' in text and _has_non_finite(obj):
+                return stdlib_dumps(obj)
+            return text.decode('utf-8')
+        
+        return orjson_dumps
+    if backend == 'ujson':
+        ujson = importlib.import_module('ujson')
+        
+        def ujson_dumps(obj: Any) -> str:
+            try:
+                return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                                   indent=indent or 0)
+            except (TypeError, OverflowError):
+                return stdlib_dumps(obj)
+        
+        return ujson_dumps
+    return stdlib_dumps
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """Return True if ``obj`` holds NaN or an infinite float at any depth."""
+    if isinstance(obj, dict):
+        obj = (obj,)
+    elif not isinstance(obj, (list, tuple)):
+        return isinstance(obj, float) and not math.isfinite(obj)
+    isfinite = math.isfinite
+    for item in obj:
+        # Rows are searched in place, so a list of rows costs no call per row
+        for value in (item.values() if type(item) is dict else (item,)):
+            kind = type(value)
+            if kind is float:
+                if not isfinite(value):
+                    return True
+            elif kind in _CONTAINER_TYPES and _has_non_finite(value):
+                return True
+    return False
+
+
+def detect_and_convert_types(
+    data: List[Dict[str, str]], schema: Optional[Schema] = None
+) -> List[Dict[str, Any]]:
+    """
+    Detect and convert data types in dictionary values from strings to appropriate types.
+    
+    Args:
+        data: List of dictionaries with string values
+        schema: Column types from ``infer_schema``; inferred from ``data`` if omitted
+        
+    Returns:
+        List of dictionaries with properly typed values
+    """
+    if not data:
+        return data
+    
+    if schema is None:
+        schema = infer_schema(data)
+    
+    # Rows from csv.DictReader share one key order, which allows converting
+    # whole columns at a time; anything else is converted row by row.
+    keys = tuple(data[0])
+    if any(tuple(row) != keys for row in data):
+        converters = build_column_converters(schema)
+        return [convert_row_types(row, converters) for row in data]
+    
+    columns = [
+        convert_column([row[key] for row in data], schema.get(key))
+        for key in keys
+    ]
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def convert_column(values: List[Optional[str]], column_type: Optional[str]) -> List[Any]:
+    """
+    Convert all values of one column, optimized for its inferred type.
+    
+    The whole column is first converted with a bulk path for its type; if
+    any value does not fit, the column is converted cell by cell instead.
+    Either way the result equals ``[_convert_value(v) for v in values]``.
+    
+    Args:
+        values: String values of a single column
+        column_type: Type from ``infer_schema``, or None if unknown
+        
+    Returns:
+        Converted values in the same order
+    """
+    bulk = _COLUMN_BULK_CONVERTERS.get(column_type)
+    if bulk is not None:
+        try:
+            return bulk(values)
+        except (ValueError, TypeError, KeyError):
+            pass
+    return list(map(_COLUMN_CONVERTERS.get(column_type, _convert_value), values))
+
+
+def convert_row_types(
+    row: Dict[str, str], converters: Optional[Dict[str, Callable[[Any], Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Convert the values of a single CSV row to their appropriate types.
+    
+    Args:
+        row: Dictionary with string values
+        converters: Per-column converters from ``build_column_converters``;
+            columns without one use the generic per-cell detection
+            
+    Returns:
+        Dictionary with properly typed values
+    """
+    if not converters:
+        return {key: _convert_value(value) for key, value in row.items()}
+    get = converters.get
+    return {key: get(key, _convert_value)(value) for key, value in row.items()}
+
+
+def convert_rows_with_schema(
+    rows: Iterable[Dict[str, str]], sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily convert rows, inferring the schema from the first ``sample_size`` rows.
+    
+    Args:
+        rows: Iterable of dictionaries with string values
+        sample_size: Number of leading rows used for schema inference
+        
+    Yields:
+        Dictionaries with properly typed values
+    """
+    rows = iter(rows)
+    sample = list(islice(rows, sample_size))
+    converters = build_column_converters(infer_schema(sample, sample_size))
+    for row in chain(sample, rows):
+        yield convert_row_types(row, converters)
+
+
+def infer_schema(data: List[Dict[str, str]], sample_size: int = DEFAULT_SAMPLE_SIZE) -> Schema:
+    """
+    Infer one type per column from the first ``sample_size`` rows.
+    
+    A column is ``'null'`` if every sampled value is empty, ``'float'`` if
+    it mixes integers and floats, ``'str'`` if it mixes any other types, and
+    otherwise the single type its non-empty values share.
+    
+    Args:
+        data: List of dictionaries with string values
+        sample_size: Number of leading rows to examine
+        
+    Returns:
+        Mapping of column name to one of ``COLUMN_TYPES``
+    """
+    seen: Dict[str, set] = {}
+    for row in islice(data, sample_size):
+        for key, value in row.items():
+            types = seen.setdefault(key, set())
+            converted = _convert_value(value) if isinstance(value, str) else value
+            if converted is not None:
+                types.add(_TYPE_NAMES.get(type(converted), 'str'))
+    
+    schema: Schema = {}
+    for key, types in seen.items():
+        if not types:
+            schema[key] = 'null'
+        elif len(types) == 1:
+            schema[key] = types.pop()
+        elif types == {'int', 'float'}:
+            schema[key] = 'float'
+        else:
+            schema[key] = 'str'
+    return schema
+
+
+def build_column_converters(schema: Schema) -> Dict[str, Callable[[Any], Any]]:
+    """
+    Pick a specialized converter for every column of a schema.
+    
+    Each converter gives exactly the result of ``_convert_value`` for any
+    input; it is only optimized for values of the inferred type and falls
+    back to ``_convert_value`` when a value does not fit.
+    
+    Args:
+        schema: Mapping of column name to column type
+        
+    Returns:
+        Mapping of column name to converter function
+    """
+    return {key: _COLUMN_CONVERTERS.get(column_type, _convert_value)
+            for key, column_type in schema.items()}
+
+
+def iter_json_array_fragments(
+    rows: Iterable[Dict[str, Any]],
+    indent: Optional[int] = None,
+    json_backend: str = 'stdlib',
+    compact: bool = False,
+) -> Iterator[str]:
+    """
+    Serialize rows into JSON array fragments, one row at a time.
+    
+    With the stdlib backend, joining the fragments yields exactly the same
+    text as ``dict_list_to_json(list(rows), indent)``, but only one row is
+    held in memory at any time.
+    
+    Args:
+        rows: Iterable of dictionaries to serialize
+        indent: JSON indentation level, or None for single-line output
+        json_backend: Serializer backend, see ``make_json_dumps``
+        compact: Single-line output without spaces after separators
+        
+    Yields:
+        Consecutive pieces of the JSON array text
+    """
+    if compact:
+        indent = None
+    dumps = make_json_dumps(json_backend, indent, compact)
+    return _join_json_array((_dump_json_row(row, indent, dumps) for row in rows), indent, compact)
+
+
+def _json_array_delimiters(indent: Optional[int], compact: bool = False) -> Tuple[str, str, str]:
+    """Return the opening, separator and closing text json.dumps uses for arrays."""
+    if compact:
+        return '[', ',', ']'
+    if indent is None:
+        return '[', ', ', ']'
+    return '[\n', ',\n', '\n]'
+
+
+def _dump_json_row(
+    row: Dict[str, Any], indent: Optional[int], dumps: Optional[Callable[[Any], str]] = None
+) -> str:
+    """Serialize one row exactly as it appears inside a json.dumps array."""
+    if dumps is None:
+        dumps = make_json_dumps('stdlib', indent)
+    row_json = dumps(row)
+    if indent:
+        row_indent = ' ' * indent
+        row_json = row_indent + row_json.replace('\n', '\n' + row_indent)
+    return row_json
+
+
+def _join_json_array(
+    items: Iterable[str], indent: Optional[int], compact: bool = False
+) -> Iterator[str]:
+    """Wrap already serialized array items in the JSON array delimiters."""
+    opening, separator, closing = _json_array_delimiters(indent, compact)
+    first = True
+    for item in items:
+        if first:
+            yield opening + item
+            first = False
+        else:
+            yield separator + item
+    
+    yield '[]' if first else closing
+
+
+def _convert_value(value: str) -> Union[str, int, float, bool, None]:
+    """
+    Convert a string value to its most appropriate type.
+    
+    Args:
+        value: String value to convert
+        
+    Returns:
+        Converted value with appropriate type
+    """
+    if value is None or value.strip() == '':
+        return None
+    
+    value = value.strip()
+    
+    # Boolean detection
+    if value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    
+    # Integer detection
+    try:
+        if '.' not in value and 'e' not in value.lower():
+            return int(value)
+    except ValueError:
+        pass
+    
+    # Float detection
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    # Return as string if no conversion possible
+    return value
+
+
+def _convert_null(value: Optional[str]) -> Any:
+    """Convert a value from a column expected to be empty."""
+    if value is None or not value.strip():
+        return None
+    return _convert_value(value)
+
+
+def _convert_bool(value: Optional[str]) -> Any:
+    """Convert a value from a column expected to hold booleans."""
+    try:
+        return _BOOL_LITERALS[value]
+    except KeyError:
+        return _convert_value(value)
+
+
+def _convert_int(value: Optional[str]) -> Any:
+    """Convert a value from a column expected to hold integers."""
+    try:
+        # int() only accepts strings that _convert_value also reads as int
+        return int(value)
+    except (ValueError, TypeError):
+        return _convert_value(value)
+
+
+def _convert_float(value: Optional[str]) -> Any:
+    """Convert a value from a column expected to hold floats."""
+    if value is not None and ('.' in value or 'e' in value or 'E' in value):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return _convert_value(value)
+
+
+def _convert_text(value: Optional[str]) -> Any:
+    """Convert a value from a column expected to hold plain text."""
+    if value is None:
+        return None
+    stripped = value.strip()
+    if not stripped:
+        return None
+    head = stripped[0]
+    # Anything that could parse as a bool or number takes the slow path
+    if head in _NON_TEXT_HEADS or head.isdecimal():
+        return _convert_value(value)
+    return stripped
+
+
+_TYPE_NAMES = {bool: 'bool', int: 'int', float: 'float', str: 'str'}
+
+_BOOL_LITERALS = {
+    'true': True, 'True': True, 'TRUE': True,
+    'false': False, 'False': False, 'FALSE': False,
+}
+
+# First characters of values that int()/float() or the bool check may accept
+_NON_TEXT_HEADS = frozenset('+-.tTfFiInN')
+
+_COLUMN_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'null': _convert_null,
+    'bool': _convert_bool,
+    'int': _convert_int,
+    'float': _convert_float,
+    'str': _convert_text,
+}
+
+
+_COLUMN_BULK_CONVERTERS: Dict[str, Callable[[List[Any]], List[Any]]] = {
+    'bool': lambda values: list(map(_BOOL_LITERALS.__getitem__, values)),
+    'int': lambda values: list(map(int, values)),
+    'float': lambda values: [float(v) if '.' in v else _convert_float(v) for v in values],
+}
+
+
+def format_schema(schema: Schema) -> str:
+    """
+    Render a schema as a short human-readable string.
+    
+    Args:
+        schema: Mapping of column name to column type
+        
+    Returns:
+        Text such as ``"name:str, age:int"``
+    """
+    return ', '.join(f"{key}:{column_type}" for key, column_type in schema.items())
+
+
+def iter_jsonl_lines(
+    rows: Iterable[Dict[str, Any]], json_backend: str = 'stdlib'
+) -> Iterator[str]:
+    """
+    Serialize rows as JSON Lines: one compact JSON object per line.
+    
+    Args:
+        rows: Iterable of dictionaries to serialize
+        json_backend: Serializer backend, see ``make_json_dumps``
+        
+    Yields:
+        One newline-terminated JSON object per row
+    """
+    dumps = make_json_dumps(json_backend, compact=True)
+    for row in rows:
+        yield dumps(row) + '\n'
+
+
+def read_csv_file(file_path: Path) -> str:
+    """
+    Read CSV file content with proper error handling.
+    
+    Args:
+        file_path: Path to the CSV file
+        
+    Returns:
+        CSV file content as string, with its line endings kept for the csv module
+        
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        PermissionError: If there are insufficient permissions to read the file
+        UnicodeDecodeError: If the file encoding is not supported
+    """
+    try:
+        with open_csv_input(file_path, 'utf-8') as file:
+            return file.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"CSV file not found: {file_path}")
+    except PermissionError:
+        raise PermissionError(f"Permission denied to read file: {file_path}")
+    except UnicodeDecodeError:
+        if is_stdio(file_path):
+            raise
+        # Try with different encoding
+        try:
+            with open_csv_input(file_path, 'latin-1') as file:
+                return file.read()
+        except UnicodeDecodeError:
+            raise UnicodeDecodeError(
+                f"Unable to decode file {file_path}. Please check file encoding."
+            )
+
+
+def iter_csv_rows(
+    file_path: Path,
+    encoding: str = 'utf-8',
+    use_mmap: bool = False,
+    selection: Optional[RowSelection] = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Lazily read CSV rows from a file without loading it into memory.
+    
+    Compressed files are decompressed on the fly, see ``open_csv_input``.
+    
+    Args:
+        file_path: Path to the CSV file
+        encoding: Text encoding used to decode the file
+        use_mmap: Read through ``iter_mmap_lines`` instead of a buffered file;
+            ignored for compressed files, which cannot be mapped
+        selection: Columns and rows to keep, or None for all of them; rows
+            are filtered and projected before their dictionaries are built
+            
+    Yields:
+        One dictionary per CSV row with column headers as keys
+        
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        PermissionError: If there are insufficient permissions to read the file
+        ValueError: If the selection names a column the header lacks
+    """
+    try:
+        if use_mmap and not is_stdio(file_path) and detect_compression(file_path) is None:
+            file = None
+        else:
+            file = open_csv_input(file_path, encoding)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"CSV file not found: {file_path}")
+    except PermissionError:
+        raise PermissionError(f"Permission denied to read file: {file_path}")
+    
+    read = csv.DictReader if selection is None else lambda lines: selection.select(csv.reader(lines))
+    if file is None:
+        yield from read(iter_mmap_lines(file_path, encoding))
+        return
+    with file:
+        yield from read(file)
+
+
+def _input_encodings(file_path: Path) -> Tuple[str, ...]:
+    # Standard input cannot be read a second time, so it gets no latin-1 retry
+    return ('utf-8',) if is_stdio(file_path) else ('utf-8', 'latin-1')
+
+
+def read_csv_rows_mmap(file_path: Path, selection: Optional[RowSelection] = None) -> List[Dict[str, str]]:
+    """
+    Read all CSV rows from a memory-mapped file.
+    
+    Decodes as UTF-8 and falls back to latin-1, like ``read_csv_file``.
+    
+    Args:
+        file_path: Path to the CSV file
+        selection: Columns and rows to keep, or None for all of them
+        
+    Returns:
+        List of dictionaries where each dictionary represents a CSV row
+    """
+    try:
+        return list(iter_csv_rows(file_path, 'utf-8', True, selection))
+    except UnicodeDecodeError:
+        return list(iter_csv_rows(file_path, 'latin-1', True, selection))
+
+
+def write_json_file(json_content: str, file_path: Path, compression: Optional[str] = None) -> None:
+    """
+    Write JSON content to file with proper error handling.
+    
+    Args:
+        json_content: JSON content as string
+        file_path: Path where to write the JSON file
+        compression: Codec name from ``COMPRESSION_SUFFIXES``, or None
+        
+    Raises:
+        PermissionError: If there are insufficient permissions to write the file
+        OSError: If there are other OS-level issues writing the file
+    """
+    try:
+        # Create parent directories if they don't exist
+        if not is_stdio(file_path):
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open_output(file_path, compression) as file:
+            file.write(json_content)
+    except PermissionError:
+        raise PermissionError(f"Permission denied to write file: {file_path}")
+    except BrokenPipeError:
+        raise
+    except OSError as e:
+        raise OSError(f"Error writing to file {file_path}: {e}")
+
+
+def write_json_stream(
+    fragments: Iterable[str],
+    file_path: Path,
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    compression: Optional[str] = None,
+) -> None:
+    """
+    Write JSON text fragments to a file as they are produced.
+    
+    Fragments are collected until roughly ``flush_size`` characters are
+    pending and then written with a single call, so memory stays bounded
+    while the number of write calls stays small.
+    
+    Args:
+        fragments: Iterable of JSON text pieces, written in order
+        file_path: Path where to write the JSON file
+        flush_size: Number of buffered characters that triggers a write
+        compression: Codec name from ``COMPRESSION_SUFFIXES``, or None
+        
+    Raises:
+        PermissionError: If there are insufficient permissions to write the file
+        OSError: If there are other OS-level issues writing the file
+    """
+    try:
+        if not is_stdio(file_path):
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with open_output(file_path, compression) as file:
+            pending: List[str] = []
+            pending_size = 0
+            for fragment in fragments:
+                pending.append(fragment)
+                pending_size += len(fragment)
+                if pending_size >= flush_size:
+                    file.write(''.join(pending))
+                    pending.clear()
+                    pending_size = 0
+            if pending:
+                file.write(''.join(pending))
+    except PermissionError:
+        raise PermissionError(f"Permission denied to write file: {file_path}")
+    except BrokenPipeError:
+        raise
+    except OSError as e:
+        raise OSError(f"Error writing to file {file_path}: {e}")
+
+
+def serialize_rows(
+    rows: Iterable[Dict[str, Any]],
+    output_format: str = 'json',
+    indent: Optional[int] = 2,
+    json_backend: str = 'stdlib',
+    compact: bool = False,
+) -> Iterator[str]:
+    """
+    Serialize rows as fragments of the requested output format.
+    
+    Args:
+        rows: Iterable of dictionaries to serialize
+        output_format: ``'json'`` for a JSON array or ``'jsonl'`` for JSON Lines
+        indent: JSON indentation level for the ``'json'`` format
+        json_backend: Serializer backend, see ``make_json_dumps``
+        compact: Single-line ``'json'`` output without spaces after separators
+        
+    Returns:
+        Iterator over text fragments of the serialized document
+        
+    Raises:
+        ValueError: If the output format is not supported
+    """
+    if output_format == 'json':
+        return iter_json_array_fragments(rows, indent, json_backend, compact)
+    if output_format == 'jsonl':
+        return iter_jsonl_lines(rows, json_backend)
+    raise ValueError(f"Unsupported output format: {output_format}")
+
+
+def stream_csv_to_json(
+    input_path: Path,
+    output_path: Path,
+    indent: Optional[int] = 2,
+    output_format: str = 'json',
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    use_mmap: bool = False,
+    json_backend: str = 'stdlib',
+    compact: bool = False,
+    compression: Optional[str] = None,
+    selection: Optional[RowSelection] = None,
+) -> int:
+    """
+    Convert a CSV file to JSON row by row with constant memory usage.
+    
+    If the input is not valid UTF-8 the conversion is restarted with
+    latin-1, matching the fallback in ``read_csv_file``. Standard input
+    (``STDIO_PATH``) cannot be re-read and must be UTF-8.
+    
+    Args:
+        input_path: Path to input CSV file
+        output_path: Path to output JSON file
+        indent: JSON indentation level, or None for single-line output
+        output_format: One of ``OUTPUT_FORMATS``
+        flush_size: Number of buffered characters that triggers a write
+        use_mmap: Read the input through a memory map
+        json_backend: Serializer backend, see ``make_json_dumps``
+        compact: Single-line JSON without spaces after separators
+        compression: Codec that compresses JSON output, or None
+        selection: Columns and rows to keep, or None for all of them
+        
+    Returns:
+        Number of rows written
+        
+    Raises:
+        ValueError: If compression is requested for a columnar format, or
+            the selection names a column the header lacks
+    """
+    encodings = _input_encodings(input_path)
+    if output_format in COLUMNAR_FORMATS:
+        if compression is not None:
+            raise ValueError(f"{output_format} output cannot be compressed")
+        for encoding in encodings:
+            try:
+                return write_columnar_stream(
+                    iter_csv_rows(input_path, encoding, use_mmap, selection), output_path, output_format
+                )
+            except UnicodeDecodeError:
+                if encoding == encodings[-1]:
+                    raise
+    
+    row_count = 0
+    
+    def counted(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal row_count
+        for row in rows:
+            row_count += 1
+            yield row
+    
+    for encoding in encodings:
+        row_count = 0
+        typed_rows = convert_rows_with_schema(iter_csv_rows(input_path, encoding, use_mmap, selection))
+        try:
+            fragments = serialize_rows(
+                counted(typed_rows), output_format, indent, json_backend, compact
+            )
+            write_json_stream(fragments, output_path, flush_size, compression)
+            return row_count
+        except UnicodeDecodeError:
+            if encoding == encodings[-1]:
+                raise
+    return row_count
+
+
+def write_columnar_stream(
+    rows: Iterable[Dict[str, str]],
+    output_path: Path,
+    output_format: str = 'columnar',
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+) -> int:
+    """
+    Type-convert rows and write them to a columnar file one row group at a time.
+    
+    The schema is inferred from the first ``sample_size`` rows, as in
+    ``convert_rows_with_schema``, and stored in the file.
+    
+    Args:
+        rows: Iterable of dictionaries with string values
+        output_path: Path of the file to write
+        output_format: One of ``COLUMNAR_FORMATS``
+        sample_size: Number of leading rows used for schema inference
+        
+    Returns:
+        Number of rows written
+    """
+    rows = iter(rows)
+    sample = list(islice(rows, sample_size))
+    schema = infer_schema(sample, sample_size)
+    converters = build_column_converters(schema)
+    with ColumnarWriter(output_path, output_format, schema) as writer:
+        writer.write_rows(convert_row_types(row, converters) for row in chain(sample, rows))
+    return writer.rows_written
+
+
+def find_record_boundaries(file_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+    """
+    Split a CSV file into byte ranges that start and end on record boundaries.
+    
+    A newline only ends a record when it is outside a quoted field, i.e. when
+    an even number of quote characters precede it within the current record.
+    Quotes are counted with ``bytes.count`` over slices of a memory map, so
+    the scan runs at memory speed. This holds for UTF-8 and latin-1, where
+    ``"`` and ``\\n`` never occur inside multi-byte characters.
+    
+    Args:
+        file_path: Path to the CSV file
+        chunk_size: Approximate size in bytes of each range
+        
+    Returns:
+        Offsets ``[header_end, b1, ..., file_size]``; the header record spans
+        ``[0, header_end)`` and each data range spans two consecutive offsets
+    """
+    with open(file_path, 'rb') as file:
+        size = file.seek(0, io.SEEK_END)
+        if size == 0:
+            return [0]
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            boundaries = [_find_record_end(data, 0, 0)]
+            while boundaries[-1] < size:
+                start = boundaries[-1]
+                boundaries.append(_find_record_end(data, start, start + chunk_size))
+            return boundaries
+
+
+def _find_record_end(data: mmap.mmap, start: int, target: int) -> int:
+    """Return the offset just past the first record end at or after ``target``."""
+    size = len(data)
+    if target >= size:
+        return size
+    in_quotes = _count_quotes(data, start, target) & 1
+    pos = target
+    while True:
+        newline = data.find(b'\n', pos)
+        if newline == -1:
+            return size
+        in_quotes ^= _count_quotes(data, pos, newline) & 1
+        if not in_quotes:
+            return newline + 1
+        pos = newline + 1
+
+
+def _count_quotes(data: mmap.mmap, start: int, end: int, block_size: int = 1024 * 1024) -> int:
+    """Count quote characters in ``data[start:end]`` one bounded slice at a time."""
+    return sum(
+        data[pos:min(pos + block_size, end)].count(b'"')
+        for pos in range(start, end, block_size)
+    )
+
+
+def _convert_chunk(
+    task: Tuple[str, int, int, List[str], str, str, Optional[int], str, bool, Optional[RowSelection]]
+) -> Tuple[int, str]:
+    """
+    Parse, type-convert and serialize one byte range in a worker process.
+    
+    Returns:
+        Number of rows and the serialized rows, without array delimiters
+    """
+    path, start, end, header, encoding, output_format, indent, json_backend, compact, selection = task
+    with open(path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(encoding)
+    
+    lines = io.StringIO(text, newline='')
+    if selection is None:
+        rows: Iterable[Dict[str, Any]] = csv.DictReader(lines, fieldnames=header)
+    else:
+        rows = selection.bind(header).apply(csv.reader(lines))
+    typed_rows = list(convert_rows_with_schema(rows))
+    if output_format == 'jsonl':
+        return len(typed_rows), ''.join(iter_jsonl_lines(typed_rows, json_backend))
+    if compact:
+        indent = None
+    dumps = make_json_dumps(json_backend, indent, compact)
+    separator = _json_array_delimiters(indent, compact)[1]
+    return len(typed_rows), separator.join(_dump_json_row(row, indent, dumps) for row in typed_rows)
+
+
+def parallel_csv_to_json(
+    input_path: Path,
+    output_path: Path,
+    workers: int,
+    indent: Optional[int] = 2,
+    output_format: str = 'json',
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    json_backend: str = 'stdlib',
+    compact: bool = False,
+    compression: Optional[str] = None,
+    selection: Optional[RowSelection] = None,
+) -> int:
+    """
+    Convert a CSV file to JSON using a pool of worker processes.
+    
+    The file is split into record-aligned byte ranges which are parsed,
+    type-converted and serialized in parallel, then written in their original
+    order. At most two ranges per worker are in flight, so memory stays
+    bounded by ``chunk_size`` rather than by the file size. The output is
+    identical to ``stream_csv_to_json``.
+    
+    Args:
+        input_path: Path to input CSV file
+        output_path: Path to output JSON file
+        workers: Number of worker processes
+        indent: JSON indentation level, or None for single-line output
+        output_format: ``'json'`` or ``'jsonl'``
+        flush_size: Number of buffered characters that triggers a write
+        chunk_size: Approximate size in bytes of each range
+        json_backend: Serializer backend, see ``make_json_dumps``
+        compact: Single-line JSON without spaces after separators
+        compression: Codec that compresses the output, or None
+        selection: Columns and rows to keep, or None for all of them; each
+            worker applies it to its own range
+            
+    Returns:
+        Number of rows written
+        
+    Raises:
+        ValueError: For a columnar output format or a compressed input, whose
+            byte offsets cannot be split into ranges, or a selection that
+            names a column the header lacks
+    """
+    if output_format not in ('json', 'jsonl'):
+        raise ValueError(f"Parallel conversion writes json or jsonl, not {output_format}")
+    json_backend = resolve_json_backend(json_backend)
+    try:
+        if detect_compression(input_path) is not None:
+            raise ValueError(f"Parallel conversion needs an uncompressed input, use --stream: {input_path}")
+        boundaries = find_record_boundaries(input_path, chunk_size)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"CSV file not found: {input_path}")
+    except PermissionError:
+        raise PermissionError(f"Permission denied to read file: {input_path}")
+    
+    with open(input_path, 'rb') as file:
+        header_bytes = file.read(boundaries[0])
+    
+    # Imported here: multiprocessing costs more startup time than the rest of the module
+    from concurrent.futures import ProcessPoolExecutor
+    
+    row_count = 0
+    
+    def chunk_texts(pool: 'ProcessPoolExecutor', encoding: str, header: List[str]) -> Iterator[str]:
+        nonlocal row_count
+        tasks = (
+            (str(input_path), start, end, header, encoding, output_format, indent,
+             json_backend, compact, selection)
+            for start, end in zip(boundaries, boundaries[1:])
+        )
+        pending: deque = deque()
+        for task in tasks:
+            pending.append(pool.submit(_convert_chunk, task))
+            if len(pending) >= 2 * workers:
+                count, text = pending.popleft().result()
+                row_count += count
+                if text:
+                    yield text
+        while pending:
+            count, text = pending.popleft().result()
+            row_count += count
+            if text:
+                yield text
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for encoding in ('utf-8', 'latin-1'):
+            row_count = 0
+            try:
+                header_text = header_bytes.decode(encoding)
+                header = next(csv.reader(io.StringIO(header_text, newline='')), [])
+                if selection is not None:
+                    selection.bind(header)  # report unknown columns before any worker starts
+                texts = chunk_texts(pool, encoding, header)
+                if output_format == 'jsonl':
+                    fragments: Iterable[str] = texts
+                else:
+                    fragments = _join_json_array(texts, None if compact else indent, compact)
+                write_json_stream(fragments, output_path, flush_size, compression)
+                return row_count
+            except UnicodeDecodeError:
+                if encoding == 'latin-1':
+                    raise
+    return row_count
+
+
+class ConversionCache:
+    """
+    On-disk manifest of converted inputs, used to skip unchanged files.
+    
+    Each entry maps an input path to its size, mtime and SHA-256, the
+    output-affecting options and the output file written for it. An input
+    whose size and mtime still match, converted with the same options to an
+    output that is still in place, is fresh after a few ``stat`` calls. If
+    only the mtime changed, the content hash decides.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, manifest_path: Path = DEFAULT_CACHE_MANIFEST) -> None:
+        self.manifest_path = manifest_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+            if manifest.get('version') == self.VERSION:
+                self.entries = manifest.get('entries', {})
+        except (FileNotFoundError, ValueError):
+            pass
+    
+    @staticmethod
+    def _key(input_path: Path) -> str:
+        return str(Path(input_path).resolve())
+    
+    def is_fresh(self, input_path: Path, output_path: Path, options: Dict[str, Any]) -> bool:
+        """
+        Check whether ``output_path`` is an up-to-date conversion of ``input_path``.
+        
+        Args:
+            input_path: CSV file to be converted
+            output_path: Output file the conversion would write
+            options: Output-affecting converter options
+            
+        Returns:
+            True if the conversion can be skipped
+        """
+        entry = self.entries.get(self._key(input_path))
+        if entry is None or entry['options'] != options or entry['output'] != str(output_path):
+            return False
+        try:
+            input_stat = os.stat(input_path)
+            output_stat = os.stat(output_path)
+        except OSError:
+            return False
+        if (output_stat.st_size, output_stat.st_mtime_ns) != (entry['output_size'], entry['output_mtime_ns']):
+            return False
+        if input_stat.st_size != entry['size']:
+            return False
+        if input_stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+        # Touched but possibly unchanged: let the content decide
+        if file_sha256(input_path) != entry['sha256']:
+            return False
+        entry['mtime_ns'] = input_stat.st_mtime_ns
+        self.dirty = True
+        return True
+    
+    def record(self, input_path: Path, output_path: Path, options: Dict[str, Any]) -> None:
+        """
+        Remember a successful conversion.
+        
+        Args:
+            input_path: CSV file that was converted
+            output_path: Output file that was written
+            options: Output-affecting converter options
+        """
+        input_stat = os.stat(input_path)
+        output_stat = os.stat(output_path)
+        self.entries[self._key(input_path)] = {
+            'size': input_stat.st_size,
+            'mtime_ns': input_stat.st_mtime_ns,
+            'sha256': file_sha256(input_path),
+            'options': options,
+            'output': str(output_path),
+            'output_size': output_stat.st_size,
+            'output_mtime_ns': output_stat.st_mtime_ns,
+        }
+        self.dirty = True
+    
+    def invalidate(self, input_paths: Optional[Iterable[Path]] = None) -> int:
+        """
+        Forget cached conversions.
+        
+        Args:
+            input_paths: Inputs to forget, or None to clear the whole manifest
+            
+        Returns:
+            Number of entries removed
+        """
+        if input_paths is None:
+            removed = len(self.entries)
+            self.entries.clear()
+        else:
+            removed = sum(self.entries.pop(self._key(p), None) is not None for p in input_paths)
+        self.dirty = self.dirty or removed > 0
+        return removed
+    
+    def save(self) -> None:
+        """Write the manifest atomically if it changed."""
+        if not self.dirty:
+            return
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': self.VERSION, 'entries': self.entries}, file)
+        os.replace(temp_path, self.manifest_path)
+        self.dirty = False
+
+
+def file_sha256(file_path: Path, block_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 of a file without loading it into memory.
+    
+    Args:
+        file_path: Path to the file
+        block_size: Number of bytes hashed at a time
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def conversion_options(
+    indent: Optional[int],
+    output_format: str,
+    json_backend: str = 'stdlib',
+    compact: bool = False,
+    compression: Optional[str] = None,
+    selection: Optional[RowSelection] = None,
+) -> Dict[str, Any]:
+    """
+    Collect the options that change the converter's output, for cache keys.
+    
+    Args:
+        indent: JSON indentation level, or None for single-line output
+        output_format: One of ``OUTPUT_FORMATS``
+        json_backend: Resolved serializer backend name
+        compact: Single-line JSON without spaces after separators
+        compression: Output codec, or None
+        selection: Columns and rows kept, or None
+        
+    Returns:
+        Dictionary identifying the output a conversion produces
+    """
+    options = {'converter': 'csv_to_json_v3', 'indent': indent, 'format': output_format,
+               'json_backend': json_backend, 'compact': compact}
+    if compression is not None:
+        # Only when set, so manifests written before compression support stay valid
+        options['compression'] = compression
+    if selection is not None:
+        options['columns'] = None if selection.columns is None else list(selection.columns)
+        options['where'] = [str(condition) for condition in selection.conditions]
+    return options
+
+
+@dataclass
+class BatchSummary:
+    """Aggregate result of a batch conversion."""
+    files: int = 0
+    skipped: int = 0
+    rows: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    seconds: float = 0.0
+    errors: List[Tuple[Path, str]] = field(default_factory=list)
+    
+    @property
+    def converted(self) -> int:
+        return self.files - self.skipped - len(self.errors)
+
+
+def find_batch_inputs(
+    source: str, pattern: str = DEFAULT_BATCH_PATTERN, recursive: bool = False
+) -> Tuple[Path, List[Path]]:
+    """
+    Resolve a directory or glob expression to the CSV files it selects.
+    
+    Args:
+        source: Directory to scan, or a glob such as ``drops/**/*.csv``
+        pattern: File pattern used when ``source`` is a directory
+        recursive: Also scan subdirectories when ``source`` is a directory
+        
+    Returns:
+        The base directory inputs are relative to, and the sorted input files
+    """
+    source_path = Path(source)
+    if source_path.is_dir():
+        matches = source_path.rglob(pattern) if recursive else source_path.glob(pattern)
+        return source_path, sorted(p for p in matches if p.is_file())
+    
+    files = sorted(Path(p) for p in glob.glob(source, recursive=True) if os.path.isfile(p))
+    if not files:
+        return Path(source).parent, []
+    base = Path(os.path.commonpath([str(p.parent) for p in files]))
+    return base, files
+
+
+def batch_output_path(
+    input_path: Path,
+    base: Path,
+    output_dir: Optional[Path],
+    output_format: str = 'json',
+    compression: Optional[str] = None,
+) -> Path:
+    """
+    Choose where the converted form of a batch input is written.
+    
+    A compression extension of the input is dropped, so ``a.csv.gz``
+    becomes ``a.json``; an output codec adds its own, as in ``a.json.gz``.
+    
+    Args:
+        input_path: CSV file being converted
+        base: Base directory returned by ``find_batch_inputs``
+        output_dir: Root of a mirror tree, or None to write next to the input
+        output_format: One of ``OUTPUT_FORMATS``, which picks the file extension
+        compression: Output codec, or None
+        
+    Returns:
+        Path of the output file
+    """
+    suffix = OUTPUT_SUFFIXES[output_format] + COMPRESSION_SUFFIXES.get(compression, '')
+    if input_path.suffix in COMPRESSION_SUFFIXES.values():
+        input_path = input_path.with_suffix('')
+    if output_dir is None:
+        return input_path.with_suffix(suffix)
+    return (output_dir / input_path.relative_to(base)).with_suffix(suffix)
+
+
+def _convert_batch_file(
+    task: Tuple[Path, Path, Optional[int], str, int, bool, str, bool, Optional[str], Optional[RowSelection]]
+) -> Tuple[int, int, int, Optional[str]]:
+    """
+    Convert one batch file, reporting failures instead of raising.
+    
+    Returns:
+        Rows written, input bytes, output bytes and an error message or None
+    """
+    (input_path, output_path, indent, output_format, flush_size, use_mmap, json_backend, compact,
+     compression, selection) = task
+    try:
+        rows = stream_csv_to_json(
+            input_path, output_path, indent, output_format, flush_size, use_mmap,
+            json_backend, compact, compression, selection
+        )
+        return rows, input_path.stat().st_size, output_path.stat().st_size, None
+    except Exception as e:  # one bad file must not abort the batch
+        return 0, 0, 0, str(e)
+
+
+def convert_batch(
+    inputs: List[Path],
+    base: Path,
+    output_dir: Optional[Path] = None,
+    workers: int = 1,
+    indent: Optional[int] = 2,
+    output_format: str = 'json',
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    use_mmap: bool = False,
+    cache: Optional[ConversionCache] = None,
+    force: bool = False,
+    json_backend: str = 'stdlib',
+    compact: bool = False,
+    compression: Optional[str] = None,
+    selection: Optional[RowSelection] = None,
+) -> BatchSummary:
+    """
+    Convert many CSV files in one process or a process pool.
+    
+    Every file is converted with ``stream_csv_to_json``. A file that fails is
+    recorded in the summary and the remaining files are still converted.
+    With a cache, inputs it reports as fresh are skipped unless ``force``
+    is set, and every successful conversion is recorded and saved.
+    
+    Args:
+        inputs: CSV files to convert
+        base: Base directory the inputs are relative to
+        output_dir: Root of a mirror tree, or None to write next to each input
+        workers: Number of files converted concurrently
+        indent: JSON indentation level, or None for single-line output
+        output_format: One of ``OUTPUT_FORMATS``
+        flush_size: Number of buffered characters that triggers a write
+        use_mmap: Read inputs through a memory map
+        cache: Manifest of earlier conversions, or None to convert everything
+        force: Convert even the inputs the cache reports as fresh
+        json_backend: Serializer backend, see ``make_json_dumps``
+        compact: Single-line JSON without spaces after separators
+        compression: Codec that compresses every output, or None
+        selection: Columns and rows to keep in every file, or None for all;
+            a file whose header lacks a selected column is reported as failed
+            
+    Returns:
+        Aggregate counts, elapsed time and per-file errors
+    """
+    json_backend = resolve_json_backend(json_backend)
+    return run_batch(
+        inputs, base, _convert_batch_file,
+        (indent, output_format, flush_size, use_mmap, json_backend, compact, compression, selection),
+        conversion_options(indent, output_format, json_backend, compact, compression, selection),
+        output_dir, workers, output_format, compression, cache, force,
+    )
+
+
+def run_batch(
+    inputs: List[Path],
+    base: Path,
+    convert_file: Callable[[Tuple[Any, ...]], Tuple[int, int, int, Optional[str]]],
+    file_args: Tuple[Any, ...],
+    options: Dict[str, Any],
+    output_dir: Optional[Path] = None,
+    workers: int = 1,
+    output_format: str = 'json',
+    compression: Optional[str] = None,
+    cache: Optional[ConversionCache] = None,
+    force: bool = False,
+) -> BatchSummary:
+    """
+    Run a per-file conversion over batch inputs, shared by both converters.
+    
+    Each input that is not skipped as fresh becomes the task
+    ``(input_path, output_path, *file_args)``, which ``convert_file`` turns
+    into rows written, input bytes, output bytes and an error message or
+    None. Only successful conversions are recorded in the cache.
+    
+    Args:
+        inputs: CSV files to convert
+        base: Base directory the inputs are relative to
+        convert_file: Picklable function converting one task; it must report
+            failures instead of raising
+        file_args: Options passed to ``convert_file`` after the two paths
+        options: Output-affecting options stored in the cache
+        output_dir: Root of a mirror tree, or None to write next to each input
+        workers: Number of files converted concurrently
+        output_format: One of ``OUTPUT_FORMATS``, which picks the output extension
+        compression: Codec that compresses every output, or None
+        cache: Manifest of earlier conversions, or None to convert everything
+        force: Convert even the inputs the cache reports as fresh
+        
+    Returns:
+        Aggregate counts, elapsed time and per-file errors
+    """
+    started = time.perf_counter()
+    summary = BatchSummary(files=len(inputs))
+    tasks = []
+    for path in inputs:
+        output_path = batch_output_path(path, base, output_dir, output_format, compression)
+        if cache is not None and not force and cache.is_fresh(path, output_path, options):
+            summary.skipped += 1
+            continue
+        tasks.append((path, output_path, *file_args))
+    
+    if workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            results = list(pool.map(convert_file, tasks, chunksize=chunksize))
+    else:
+        results = [convert_file(task) for task in tasks]
+    
+    for task, (rows, bytes_in, bytes_out, error) in zip(tasks, results):
+        if error is not None:
+            summary.errors.append((task[0], error))
+            continue
+        summary.rows += rows
+        summary.bytes_in += bytes_in
+        summary.bytes_out += bytes_out
+        if cache is not None:
+            cache.record(task[0], task[1], options)
+    if cache is not None:
+        cache.save()
+    summary.seconds = time.perf_counter() - started
+    return summary
+
+
+def format_batch_summary(summary: BatchSummary) -> str:
+    """
+    Render a batch summary as a short report.
+    
+    Args:
+        summary: Result of ``convert_batch``
+        
+    Returns:
+        Multi-line text with totals followed by one line per failed file
+    """
+    lines = [
+        f"Files: {summary.files} ({summary.converted} converted, "
+        f"{summary.skipped} unchanged, {len(summary.errors)} failed)",
+        f"Rows: {summary.rows}",
+        f"Bytes: {summary.bytes_in} read, {summary.bytes_out} written",
+        f"Seconds: {summary.seconds:.3f}",
+    ]
+    lines.extend(f"Failed: {path}: {error}" for path, error in summary.errors)
+    return '\n'.join(lines)
+
+
+@dataclass
+class StageStats:
+    """Measurements of one conversion stage."""
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_memory: Optional[int] = None
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+
+
+@dataclass
+class ConversionStats:
+    """
+    Per-stage timing and memory of a conversion.
+    
+    Pass an instance to ``convert_csv_to_json`` and read ``stages`` afterwards.
+    While ``tracemalloc`` is tracing, ``peak_memory`` is the peak of Python
+    allocations during the stage; otherwise it is the process peak RSS so far.
+    """
+    stages: List[StageStats] = field(default_factory=list)
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """
+        Measure the enclosed block as one stage.
+        
+        Args:
+            name: Stage name, e.g. ``'read'`` or ``'serialize'``
+            
+        Yields:
+            The stage record, so the block can fill in ``rows`` and ``bytes``
+        """
+        record = StageStats(name)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_seconds = time.perf_counter() - wall_started
+            record.cpu_seconds = time.process_time() - cpu_started
+            record.peak_memory = tracemalloc.get_traced_memory()[1] if tracing else _peak_rss()
+            self.stages.append(record)
+    
+    @property
+    def wall_seconds(self) -> float:
+        return sum(stage.wall_seconds for stage in self.stages)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stats as plain JSON-serializable data."""
+        return {
+            'wall_seconds': self.wall_seconds,
+            'stages': [asdict(stage) for stage in self.stages],
+        }
+    
+    def format(self) -> str:
+        """Render the stats as a fixed-width table."""
+        lines = [f"{'stage':<16}{'wall s':>9}{'cpu s':>9}{'peak MB':>10}{'rows':>11}{'bytes':>13}"]
+        for stage in self.stages:
+            peak = f"{stage.peak_memory / 1e6:.1f}" if stage.peak_memory is not None else '-'
+            rows = stage.rows if stage.rows is not None else '-'
+            size = stage.bytes if stage.bytes is not None else '-'
+            lines.append(
+                f"{stage.name:<16}{stage.wall_seconds:>9.3f}{stage.cpu_seconds:>9.3f}"
+                f"{peak:>10}{rows:>11}{size:>13}"
+            )
+        lines.append(f"{'total':<16}{self.wall_seconds:>9.3f}")
+        return '\n'.join(lines)
+
+
+def _peak_rss() -> Optional[int]:
+    """Return the peak resident set size of this process in bytes, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _file_size(file_path: Path) -> Optional[int]:
+    try:
+        return os.stat(file_path).st_size
+    except OSError:
+        return None
+
+
+def convert_csv_to_json(
+    input_path: Path,
+    output_path: Path,
+    indent: Optional[int] = 2,
+    stream: bool = False,
+    output_format: str = 'json',
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_mmap: bool = False,
+    stats: Optional[ConversionStats] = None,
+    json_backend: str = 'stdlib',
+    compact: bool = False,
+    compression: Optional[str] = None,
+    selection: Optional[RowSelection] = None,
+) -> None:
+    """
+    Convert CSV file to JSON file with type detection.
+    
+    The input may be gzip, bz2 or zstd compressed; see ``open_csv_input``.
+    
+    Args:
+        input_path: Path to input CSV file, or ``STDIO_PATH`` for standard input
+        output_path: Path to output JSON file, or ``STDIO_PATH`` for standard output
+        indent: JSON indentation level, or None for single-line output
+        stream: Convert row by row instead of loading the whole file; always
+            on when reading or writing ``STDIO_PATH``
+        output_format: ``'json'`` for a JSON array, ``'jsonl'`` for JSON Lines,
+            or ``'columnar'``/``'parquet'`` for column arrays (see csv_columnar)
+        flush_size: Number of buffered characters that triggers a write
+        workers: Number of worker processes; more than one enables parallel
+            mode, which writes JSON formats only
+        chunk_size: Approximate size in bytes of each range in parallel mode
+        use_mmap: Read the input through a memory map instead of into one string
+        stats: Receives per-stage timings and memory. Streaming and parallel
+            modes interleave the stages, so they record a single stage
+        json_backend: Serializer backend, see ``make_json_dumps``
+        compact: Single-line JSON without spaces after separators
+        compression: Codec that compresses JSON output, or None; see
+            ``output_compression``
+        selection: Columns and rows to keep, or None for all of them; see
+            ``csv2json.selection``
+    """
+    if stats is None:
+        stats = ConversionStats()
+    # Standard output carries the data, so notes go to stderr; pipes are always streamed
+    out = sys.stderr if is_stdio(output_path) else sys.stdout
+    stream = stream or is_stdio(input_path) or is_stdio(output_path)
+    try:
+        if workers > 1:
+            with stats.stage('parallel') as stage:
+                row_count = parallel_csv_to_json(
+                    input_path, output_path, workers, indent, output_format, flush_size, chunk_size,
+                    json_backend, compact, compression, selection
+                )
+                stage.rows, stage.bytes = row_count, _file_size(input_path)
+            print(f"Converted {row_count} rows from CSV with {workers} workers: {input_path}", file=out)
+            print(f"Successfully wrote JSON file: {output_path}", file=out)
+            return
+        
+        if stream:
+            with stats.stage('stream') as stage:
+                row_count = stream_csv_to_json(
+                    input_path, output_path, indent, output_format, flush_size, use_mmap,
+                    json_backend, compact, compression, selection
+                )
+                stage.rows, stage.bytes = row_count, _file_size(input_path)
+            print(f"Streamed {row_count} rows from CSV: {input_path}", file=out)
+            kind = output_format if output_format in COLUMNAR_FORMATS else 'JSON'
+            print(f"Successfully wrote {kind} file: {output_path}", file=out)
+            return
+        
+        # Read CSV file and convert it to a dictionary list
+        if use_mmap:
+            with stats.stage('read+parse') as stage:
+                dict_data = read_csv_rows_mmap(input_path, selection)
+                stage.rows, stage.bytes = len(dict_data), _file_size(input_path)
+            print(f"Successfully read CSV file: {input_path}", file=out)
+        else:
+            with stats.stage('read') as stage:
+                csv_content = read_csv_file(input_path)
+                stage.bytes = _file_size(input_path)
+            print(f"Successfully read CSV file: {input_path}", file=out)
+            with stats.stage('parse') as stage:
+                dict_data = csv_to_dict_list(csv_content, selection)
+                stage.rows = len(dict_data)
+        print(f"Converted {len(dict_data)} rows from CSV", file=out)
+        
+        # Infer column types, then convert
+        with stats.stage('type-detect') as stage:
+            schema = infer_schema(dict_data)
+            typed_data = detect_and_convert_types(dict_data, schema)
+            stage.rows = len(typed_data)
+        print(f"Inferred schema: {format_schema(schema)}", file=out)
+        print("Applied type detection and conversion", file=out)
+        
+        # Convert to JSON and write JSON file
+        if output_format in COLUMNAR_FORMATS:
+            if compression is not None:
+                raise ValueError(f"{output_format} output cannot be compressed")
+            with stats.stage('serialize+write') as stage:
+                write_columnar(typed_data, output_path, output_format, schema)
+                stage.rows, stage.bytes = len(typed_data), _file_size(output_path)
+            print(f"Successfully wrote {output_format} file: {output_path}", file=out)
+            return
+        if output_format == 'jsonl':
+            with stats.stage('serialize+write') as stage:
+                write_json_stream(
+                    iter_jsonl_lines(typed_data, json_backend), output_path, flush_size, compression
+                )
+                stage.rows, stage.bytes = len(typed_data), _file_size(output_path)
+        else:
+            with stats.stage('serialize') as stage:
+                json_content = dict_list_to_json(typed_data, indent, json_backend, compact)
+                stage.rows = len(typed_data)
+            with stats.stage('write') as stage:
+                write_json_file(json_content, output_path, compression)
+                stage.bytes = _file_size(output_path)
+        print(f"Successfully wrote JSON file: {output_path}", file=out)
+    
+    except BrokenPipeError:
+        # The reader of standard output went away (e.g. `| head`); point stdout
+        # at devnull so the interpreter's final flush does not fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except (FileNotFoundError, PermissionError, UnicodeDecodeError, OSError, EOFError) as e:
+        # EOFError: a compressed input that ends early
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except csv.Error as e:
+        print(f"CSV parsing error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except json.JSONEncodeError as e:
+        print(f"JSON encoding error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Main function to handle command line execution.
+    
+    Args:
+        argv: Command line arguments, or None for ``sys.argv[1:]``
+    """
+    run(parse_arguments(argv))
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Carry out the conversion requested on the command line.
+    
+    Args:
+        args: Arguments returned by ``parse_arguments``
+    """
+    
+    indent = args.indent if args.indent > 0 else None
+    for option, value in (('--flush-size', args.flush_size), ('--workers', args.workers),
+                          ('--chunk-size', args.chunk_size)):
+        if value <= 0:
+            print(f"Error: {option} must be a positive number", file=sys.stderr)
+            sys.exit(1)
+    if args.batch:
+        # Stats and profiles cover the stages of a single conversion
+        for option, value in (('--profile', args.profile), ('--stats-json', args.stats_json),
+                              ('--trace-memory', args.trace_memory), ('--cprofile', args.cprofile)):
+            if value:
+                print(f"Error: {option} profiles a single conversion and cannot be used with --batch",
+                      file=sys.stderr)
+                sys.exit(1)
+    
+    try:
+        json_backend = resolve_json_backend(args.json_backend)
+        if args.batch:
+            # Batch outputs are named after their format, so only an explicit codec applies
+            compression = None if args.compress == 'auto' else output_compression(Path(), args.compress)
+        else:
+            compression = output_compression(args.output_json or Path(), args.compress)
+        selection = parse_selection(args.columns, args.where)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if compression is not None and args.output_format in COLUMNAR_FORMATS:
+        print(f"Error: --compress applies to json and jsonl output, not {args.output_format}",
+              file=sys.stderr)
+        sys.exit(1)
+    if args.output_format == 'parquet' and not PARQUET_AVAILABLE:
+        print("Error: --format parquet requires pyarrow (pip install pyarrow)", file=sys.stderr)
+        sys.exit(1)
+    if args.output_format in COLUMNAR_FORMATS and args.workers > 1 and not args.batch:
+        print(f"Error: --workers converts a single file to json or jsonl only, "
+              f"not {args.output_format}", file=sys.stderr)
+        sys.exit(1)
+    
+    cache = ConversionCache(args.cache) if args.cache else None
+    if (args.force or args.invalidate) and cache is None:
+        print("Error: --force and --invalidate require --cache", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.batch:
+        base, inputs = find_batch_inputs(args.input_csv, args.pattern, args.recursive)
+        if args.invalidate:
+            removed = cache.invalidate(inputs)
+            cache.save()
+            print(f"Invalidated {removed} cached conversions")
+            return
+        if not inputs:
+            print(f"Error: No CSV files matched: {args.input_csv}", file=sys.stderr)
+            sys.exit(1)
+        summary = convert_batch(
+            inputs,
+            base,
+            output_dir=args.output_json,
+            workers=args.workers,
+            indent=indent,
+            output_format=args.output_format,
+            flush_size=args.flush_size,
+            use_mmap=args.mmap,
+            cache=cache,
+            force=args.force,
+            json_backend=json_backend,
+            compact=args.compact,
+            compression=compression,
+            selection=selection,
+        )
+        print(format_batch_summary(summary))
+        sys.exit(1 if summary.errors else 0)
+    
+    input_csv = Path(args.input_csv)
+    if args.invalidate:
+        removed = cache.invalidate([input_csv])
+        cache.save()
+        print(f"Invalidated {removed} cached conversions")
+        return
+    
+    if args.output_json is None:
+        print("Error: Output JSON path is required unless --batch is used", file=sys.stderr)
+        sys.exit(1)
+    
+    if cache is not None and (is_stdio(input_csv) or is_stdio(args.output_json)):
+        print("Error: --cache needs file paths, not -", file=sys.stderr)
+        sys.exit(1)
+    if is_stdio(args.output_json) and args.output_format in COLUMNAR_FORMATS:
+        print(f"Error: {args.output_format} output needs a file, not -", file=sys.stderr)
+        sys.exit(1)
+    if is_stdio(input_csv) and args.workers > 1:
+        print("Error: --workers needs an input file, not -", file=sys.stderr)
+        sys.exit(1)
+    
+    # Validate input file exists; standard input needs no checks
+    if not is_stdio(input_csv) and not input_csv.exists():
+        print(f"Error: Input file does not exist: {input_csv}", file=sys.stderr)
+        sys.exit(1)
+    
+    # Validate input file is a file (not a directory)
+    if not is_stdio(input_csv) and not input_csv.is_file():
+        print(f"Error: Input path is not a file: {input_csv}", file=sys.stderr)
+        sys.exit(1)
+    
+    options = conversion_options(indent, args.output_format, json_backend, args.compact, compression,
+                                 selection)
+    if cache is not None and not args.force and cache.is_fresh(input_csv, args.output_json, options):
+        cache.save()
+        print(f"Up to date, skipped: {input_csv}")
+        return
+    
+    # Convert CSV to JSON
+    stats = ConversionStats()
+    if args.trace_memory:
+        tracemalloc.start()
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    convert_csv_to_json(
+        input_csv,
+        args.output_json,
+        indent=indent,
+        stream=args.stream,
+        output_format=args.output_format,
+        flush_size=args.flush_size,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        use_mmap=args.mmap,
+        stats=stats,
+        json_backend=json_backend,
+        compact=args.compact,
+        compression=compression,
+        selection=selection,
+    )
+    
+    out = sys.stderr if is_stdio(args.output_json) else sys.stdout
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f"Wrote cProfile stats: {args.cprofile}", file=out)
+    if isinstance(args.trace_memory, Path):
+        tracemalloc.take_snapshot().dump(str(args.trace_memory))
+        print(f"Wrote tracemalloc snapshot: {args.trace_memory}", file=out)
+    if args.trace_memory:
+        tracemalloc.stop()
+    if args.profile:
+        print(stats.format(), file=sys.stderr)
+    if args.stats_json:
+        args.stats_json.write_text(json.dumps(stats.as_dict(), indent=2), encoding='utf-8')
+    
+    if cache is not None:
+        cache.record(input_csv, args.output_json, options)
+        cache.save()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
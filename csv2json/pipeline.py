@@ -0,0 +1,168 @@
+"""
+Conversion Pipeline
+Compose the reader, type-converter and serializer stages of a conversion.
+
+A stage is any callable that takes an iterable of row dictionaries and
+returns one. Stages run lazily, one row at a time, so a pipeline holds a
+single row in memory unless a stage buffers; type inference buffers the
+rows it samples.
+
+    from csv2json import Pipeline
+    
+    def paid_only(rows):
+        return (row for row in rows if row['status'] == 'paid')
+        
+    Pipeline.from_csv('orders.csv').pipe(paid_only).to_file('paid.json')
+"""
+
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+from .converter import (
+    DEFAULT_FLUSH_SIZE, DEFAULT_SAMPLE_SIZE, convert_rows_with_schema, iter_csv_rows, serialize_rows,
+    write_json_stream,
+)
+from .selection import parse_selection
+
+
+Row = Dict[str, Any]
+Stage = Callable[[Iterable[Row]], Iterable[Row]]
+
+
+def type_converter(sample_size: int = DEFAULT_SAMPLE_SIZE) -> Stage:
+    """
+    Return the stage that converts string values to typed values.
+    
+    Args:
+        sample_size: Number of leading rows used for schema inference
+        
+    Returns:
+        Stage wrapping ``convert_rows_with_schema``
+    """
+    return partial(convert_rows_with_schema, sample_size=sample_size)
+
+
+class Pipeline:
+    """
+    Rows from a source passed through a chain of stages.
+    
+    ``pipe`` returns a new pipeline and leaves the original unchanged.
+    Nothing is read until the pipeline is iterated or written, and a
+    pipeline over a file or generator can be consumed only once.
+    """
+    
+    def __init__(self, source: Iterable[Row], stages: Sequence[Stage] = ()) -> None:
+        self.source = source
+        self.stages = tuple(stages)
+    
+    @classmethod
+    def from_csv(
+        cls,
+        file_path: Union[str, Path],
+        encoding: str = 'utf-8',
+        use_mmap: bool = False,
+        infer_types: bool = True,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        columns: Union[str, Sequence[str], None] = None,
+        where: Sequence[str] = (),
+    ) -> 'Pipeline':
+        """
+        Start a pipeline that reads a CSV file, see ``iter_csv_rows``.
+        
+        Args:
+            file_path: Path to the CSV file, compressed or not, or ``-``
+                for standard input
+            encoding: Text encoding used to decode the file; unlike the
+                command line there is no latin-1 retry
+            use_mmap: Read the file through a memory map
+            infer_types: Add the ``type_converter`` stage; without it every
+                value stays a string
+            sample_size: Number of leading rows used for schema inference
+            columns: Columns to keep, as a sequence or comma-separated names;
+                None keeps all of them
+            where: Conditions such as ``'amount>100'`` that kept rows meet,
+                see ``csv2json.selection``. Unlike a stage, they are tested
+                before a row becomes a dictionary
+                
+        Returns:
+            New pipeline
+            
+        Raises:
+            ValueError: If a condition is invalid
+        """
+        selection = parse_selection(columns, where)
+        pipeline = cls(iter_csv_rows(Path(file_path), encoding, use_mmap, selection))
+        return pipeline.pipe(type_converter(sample_size)) if infer_types else pipeline
+    
+    def pipe(self, *stages: Stage) -> 'Pipeline':
+        """Return a pipeline with ``stages`` appended."""
+        return Pipeline(self.source, self.stages + stages)
+    
+    def __iter__(self) -> Iterator[Row]:
+        rows: Iterable[Row] = self.source
+        for stage in self.stages:
+            rows = stage(rows)
+        return iter(rows)
+    
+    def serialize(
+        self,
+        output_format: str = 'json',
+        indent: Optional[int] = 2,
+        json_backend: str = 'stdlib',
+        compact: bool = False,
+    ) -> Iterator[str]:
+        """
+        Serialize the rows as text fragments, see ``serialize_rows``.
+        
+        Raises:
+            ValueError: If the output format is not ``'json'`` or ``'jsonl'``
+        """
+        return serialize_rows(self, output_format, indent, json_backend, compact)
+    
+    def to_string(
+        self,
+        output_format: str = 'json',
+        indent: Optional[int] = 2,
+        json_backend: str = 'stdlib',
+        compact: bool = False,
+    ) -> str:
+        """Serialize the rows into one string."""
+        return ''.join(self.serialize(output_format, indent, json_backend, compact))
+    
+    def to_file(
+        self,
+        file_path: Union[str, Path],
+        output_format: str = 'json',
+        indent: Optional[int] = 2,
+        json_backend: str = 'stdlib',
+        compact: bool = False,
+        compression: Optional[str] = None,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+    ) -> int:
+        """
+        Serialize the rows and write them to a file as they are produced.
+        
+        Args:
+            file_path: Path of the file to write, or ``-`` for standard output
+            output_format: ``'json'`` or ``'jsonl'``
+            indent: JSON indentation level for the ``'json'`` format
+            json_backend: Serializer backend, see ``make_json_dumps``
+            compact: Single-line JSON without spaces after separators
+            compression: Codec name from ``COMPRESSION_SUFFIXES``, or None
+            flush_size: Number of buffered characters that triggers a write
+            
+        Returns:
+            Number of rows written
+        """
+        row_count = 0
+        
+        def counted(rows: Iterable[Row]) -> Iterator[Row]:
+            nonlocal row_count
+            for row in rows:
+                row_count += 1
+                yield row
+        
+        fragments = serialize_rows(counted(self), output_format, indent, json_backend, compact)
+        write_json_stream(fragments, Path(file_path), flush_size, compression)
+        return row_count
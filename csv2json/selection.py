@@ -0,0 +1,305 @@
+"""
+Row Selection
+Project and filter CSV rows before they become dictionaries.
+
+A selection names the columns to keep and the conditions a row must meet:
+
+    amount>100      numeric comparison; also >=, < and <=
+    status=paid     exact text match; also !=
+
+Names are resolved against the header once. Rows are then read as plain
+lists from ``csv.reader``, conditions are tested on those lists, and only
+the rows that pass are turned into dictionaries, holding only the selected
+columns. Type inference, conversion and serialization never see the
+columns or rows that were dropped.
+
+A cell that is not a number never meets a numeric comparison. With NumPy
+installed, numeric comparisons are evaluated on whole batches of rows.
+"""
+
+import importlib.util
+import operator
+import re
+from dataclasses import dataclass
+from itertools import compress, islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# NumPy is optional and slow to import, so it is only imported once a
+# selection with a numeric condition is applied
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+
+# Rows whose numeric conditions NumPy evaluates together
+DEFAULT_FILTER_BATCH_SIZE = 4096
+
+# Comparison operators of a condition; two-character ones first so that
+# 'a>=1' is not read as 'a' > '=1'
+OPERATORS = ('!=', '>=', '<=', '=', '>', '<')
+
+# Operators that compare numbers; the others compare text
+NUMERIC_OPERATORS = ('>=', '<=', '>', '<')
+
+_COMPARE = {
+    '=': operator.eq, '!=': operator.ne,
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+}
+
+_CONDITION = re.compile('(.*?)(' + '|'.join(map(re.escape, OPERATORS)) + ')(.*)', re.DOTALL)
+
+_NAN = float('nan')
+
+Record = List[Optional[str]]
+
+
+@dataclass(frozen=True)
+class Condition:
+    """
+    One ``COLUMN OP VALUE`` test, see ``parse_condition``.
+    
+    Attributes:
+        column: Header name of the tested column
+        op: One of ``OPERATORS``
+        value: Text the cell is compared with
+        number: ``value`` as a float for the operators in ``NUMERIC_OPERATORS``
+    """
+    column: str
+    op: str
+    value: str
+    number: Optional[float] = None
+    
+    def __str__(self) -> str:
+        return f'{self.column}{self.op}{self.value}'
+
+
+@dataclass(frozen=True)
+class RowSelection:
+    """
+    Columns to keep and conditions to meet, independent of any header.
+    
+    Selections are immutable and picklable, so worker processes can apply
+    them; ``bind`` resolves one against a header.
+    
+    Attributes:
+        columns: Names of the columns to keep, in output order, or None for all
+        conditions: Conditions a row must all meet
+    """
+    columns: Optional[Tuple[str, ...]] = None
+    conditions: Tuple[Condition, ...] = ()
+    
+    def bind(self, header: Sequence[str]) -> 'BoundSelection':
+        """
+        Resolve the selection against a header.
+        
+        Raises:
+            ValueError: If a column or condition names a column the header lacks
+        """
+        return BoundSelection(self, header)
+    
+    def select(self, records: Iterable[Record]) -> Iterator[Dict[Any, Any]]:
+        """
+        Apply the selection to ``csv.reader`` records whose first record is the header.
+        
+        Yields:
+            Dictionaries of the rows that meet every condition
+        """
+        records = iter(records)
+        header = next(records, None)
+        if header is not None:
+            yield from self.bind(header).apply(records)
+    
+    def __str__(self) -> str:
+        parts = [] if self.columns is None else [','.join(self.columns)]
+        return ' '.join(parts + [f'where {condition}' for condition in self.conditions])
+
+
+class BoundSelection:
+    """
+    A ``RowSelection`` resolved to positions in one header.
+    
+    Rows come out like ``csv.DictReader`` rows: blank records are skipped,
+    missing cells are None, and without a column list every header name is
+    kept and surplus cells are listed under the key None.
+    """
+    
+    def __init__(self, selection: RowSelection, header: Sequence[str]) -> None:
+        header = list(header)
+        # The last of two equal names wins, as in csv.DictReader
+        positions = {name: index for index, name in enumerate(header)}
+        names = list(selection.columns or ()) + [condition.column for condition in selection.conditions]
+        missing = [name for name in dict.fromkeys(names) if name not in positions]
+        if missing:
+            raise ValueError(
+                f"Unknown column{'s' if len(missing) > 1 else ''} {', '.join(map(repr, missing))}; "
+                f"the header has {', '.join(map(repr, header))}"
+            )
+        self.selection = selection
+        self.width = len(header)
+        self.make_row = _row_factory(header, selection.columns, positions)
+        self.text_tests: List[Callable[[Record], bool]] = []
+        self.numeric_tests: List[Tuple[int, Callable[[Any, Any], Any], float]] = []
+        for condition in selection.conditions:
+            index, compare = positions[condition.column], _COMPARE[condition.op]
+            if condition.number is None:
+                self.text_tests.append(_text_test(index, compare, condition.value))
+            else:
+                self.numeric_tests.append((index, compare, condition.number))
+    
+    def apply(
+        self, records: Iterable[Record], batch_size: int = DEFAULT_FILTER_BATCH_SIZE
+    ) -> Iterator[Dict[Any, Any]]:
+        """
+        Filter and project ``csv.reader`` records that follow the header.
+        
+        Args:
+            records: Data records as lists of cells
+            batch_size: Records per NumPy evaluation of the numeric conditions
+            
+        Yields:
+            Dictionaries of the rows that meet every condition
+        """
+        records = self._padded(records)
+        if self.numeric_tests and NUMPY_AVAILABLE:
+            records = self._numeric_batches(records, batch_size)
+            tests = self.text_tests
+        else:
+            tests = self.text_tests + [
+                _numeric_test(index, compare, number) for index, compare, number in self.numeric_tests
+            ]
+        make_row = self.make_row
+        if not tests:
+            yield from map(make_row, records)
+            return
+        for record in records:
+            for test in tests:
+                if not test(record):
+                    break
+            else:
+                yield make_row(record)
+    
+    def _padded(self, records: Iterable[Record]) -> Iterator[Record]:
+        width = self.width
+        for record in records:
+            if len(record) >= width:
+                yield record
+            elif record:
+                yield record + [None] * (width - len(record))
+    
+    def _numeric_batches(self, records: Iterator[Record], batch_size: int) -> Iterator[Record]:
+        import numpy
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            mask = numpy.ones(len(batch), dtype=bool)
+            for index, compare, number in self.numeric_tests:
+                mask &= compare(_float_column(numpy, [record[index] for record in batch]), number)
+            yield from compress(batch, mask.tolist())
+
+
+def _row_factory(
+    header: List[str], columns: Optional[Tuple[str, ...]], positions: Dict[str, int]
+) -> Callable[[Record], Dict[Any, Any]]:
+    """Return the function that turns a padded record into a row dictionary."""
+    if columns is None:
+        width = len(header)
+        
+        def make_row(record: Record) -> Dict[Any, Any]:
+            row: Dict[Any, Any] = dict(zip(header, record))
+            if len(record) > width:
+                row[None] = record[width:]
+            return row
+        return make_row
+    
+    if len(columns) == 1:
+        name, index = columns[0], positions[columns[0]]
+        return lambda record: {name: record[index]}
+    getter = itemgetter(*(positions[name] for name in columns))
+    return lambda record: dict(zip(columns, getter(record)))
+
+
+def _text_test(index: int, compare: Callable[[Any, Any], Any], value: str) -> Callable[[Record], bool]:
+    return lambda record: compare(record[index], value)
+
+
+def _numeric_test(index: int, compare: Callable[[Any, Any], Any], number: float) -> Callable[[Record], bool]:
+    return lambda record: compare(_as_float(record[index]), number)
+
+
+def _as_float(cell: Optional[str]) -> float:
+    """Return a cell as a float, or NaN, which fails every comparison, if it is not a number."""
+    try:
+        return float(cell)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _float_column(numpy: Any, cells: List[Optional[str]]) -> Any:
+    """Convert cells to a float64 array, with NaN for cells that are not numbers."""
+    try:
+        return numpy.array(cells, dtype=float)
+    except (TypeError, ValueError):  # some cell is not a number; convert one by one
+        return numpy.fromiter(map(_as_float, cells), dtype=float, count=len(cells))
+
+
+def parse_condition(expression: str) -> Condition:
+    """
+    Parse a ``COLUMN OP VALUE`` condition such as ``amount>100`` or ``status=paid``.
+    
+    The operator is the first one in the expression, so values may contain
+    operator characters but column names may not. Spaces around the column
+    and the value are ignored.
+    
+    Args:
+        expression: Condition text
+        
+    Returns:
+        Parsed condition
+        
+    Raises:
+        ValueError: If there is no operator or column, or a numeric operator
+            has a value that is not a number
+    """
+    match = _CONDITION.fullmatch(expression)
+    if match is None or not match.group(1).strip():
+        raise ValueError(
+            f"Invalid condition {expression!r}; expected COLUMN OP VALUE with OP one of "
+            f"{' '.join(OPERATORS)}"
+        )
+    column, op, value = match.group(1).strip(), match.group(2), match.group(3).strip()
+    number = None
+    if op in NUMERIC_OPERATORS:
+        number = _as_float(value)
+        if number != number:
+            raise ValueError(f"Invalid condition {expression!r}; {op} needs a number, not {value!r}")
+    return Condition(column, op, value, number)
+
+
+def parse_selection(
+    columns: Union[str, Sequence[str], None] = None, where: Iterable[str] = ()
+) -> Optional[RowSelection]:
+    """
+    Build a selection from a column list and condition strings.
+    
+    Args:
+        columns: Comma-separated column names or a sequence of names, or
+            None to keep every column
+        where: Conditions a row must all meet, see ``parse_condition``
+        
+    Returns:
+        The selection, or None if it would keep every row and column
+        
+    Raises:
+        ValueError: If the column list is empty or a condition is invalid
+    """
+    names = None
+    if columns is not None:
+        if isinstance(columns, str):
+            columns = columns.split(',')
+        names = tuple(dict.fromkeys(name.strip() for name in columns if name.strip()))
+        if not names:
+            raise ValueError("The column list names no columns")
+    conditions = tuple(parse_condition(expression) for expression in where)
+    if names is None and not conditions:
+        return None
+    return RowSelection(names, conditions)
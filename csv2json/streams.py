@@ -0,0 +1,392 @@
+"""
+Stream helpers shared by the converters
+
+Opening inputs and outputs: gzip, bz2 and zstd files recognized by their
+magic bytes and (de)compressed in a background thread, ``-`` for standard
+input and output, and memory-mapped reading of large files. The optional
+zstandard package is imported only when a zstd stream is opened.
+"""
+
+import bz2
+import codecs
+import gzip
+import importlib.util
+import io
+import mmap
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, TextIO, Union
+
+from .constants import COMPRESSION_SUFFIXES, COMPRESSIONS
+
+
+# Compressed inputs are recognized by their leading bytes
+COMPRESSION_MAGIC = {'gzip': b'\x1f\x8b', 'bz2': b'BZh', 'zstd': b'\x28\xb5\x2f\xfd'}
+
+# Output compression levels; gzip's default of 9 costs several times the CPU of 6
+# for a few percent smaller files
+COMPRESSION_LEVELS = {'gzip': 6, 'bz2': 9, 'zstd': 3}
+
+# Bytes passed between a (de)compression thread and the converter at a time,
+# and how many such blocks may wait in between
+DEFAULT_PIPE_BLOCK_SIZE = 1024 * 1024
+DEFAULT_PIPE_DEPTH = 4
+
+# Input or output path that stands for standard input or output
+STDIO_PATH = '-'
+
+# Bytes decoded at a time when reading a memory-mapped CSV file
+DEFAULT_MMAP_BLOCK_SIZE = 1024 * 1024
+
+
+def detect_compression(file_path: Path) -> Optional[str]:
+    """
+    Recognize a gzip, bz2 or zstd file by its leading bytes.
+    
+    The content decides, not the name: ``x.csv.gz`` holding plain text is
+    read as plain text.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Codec name from ``COMPRESSION_SUFFIXES``, or None for uncompressed data
+    """
+    with open(file_path, 'rb') as file:
+        return _compression_from_magic(file.read(4))
+
+
+def _compression_from_magic(head: bytes) -> Optional[str]:
+    return next((name for name, magic in COMPRESSION_MAGIC.items() if head.startswith(magic)), None)
+
+
+def is_stdio(file_path: Union[str, Path]) -> bool:
+    """Return True if a path is ``STDIO_PATH``, i.e. standard input or output."""
+    return str(file_path) == STDIO_PATH
+
+
+def open_stdio(mode: str = 'rb', buffer_size: int = DEFAULT_PIPE_BLOCK_SIZE) -> BinaryIO:
+    """
+    Open standard input (``'rb'``) or output (``'wb'``) as a binary stream.
+    
+    The stream bypasses ``sys.stdin``/``sys.stdout`` and their text layer
+    and has a ``buffer_size`` buffer, so a pipe is read and written in large
+    blocks. Writes block while the pipe is full, which holds a fast producer
+    back to the pace of a slow consumer. Closing the stream flushes it but
+    leaves the file descriptor open.
+    
+    Args:
+        mode: ``'rb'`` or ``'wb'``
+        buffer_size: Size of the stream's buffer in bytes
+        
+    Returns:
+        Buffered binary stream
+    """
+    if mode == 'rb':
+        return io.BufferedReader(io.FileIO(sys.stdin.fileno(), 'rb', closefd=False), buffer_size)
+    # Text already printed to sys.stdout must come first
+    sys.stdout.flush()
+    return io.BufferedWriter(io.FileIO(sys.stdout.fileno(), 'wb', closefd=False), buffer_size)
+
+
+def output_compression(file_path: Optional[Path], compress: str = 'auto') -> Optional[str]:
+    """
+    Resolve a ``--compress`` choice for an output file.
+    
+    Args:
+        file_path: Path of the output file; None (printing to the console)
+            is never compressed by ``'auto'``
+        compress: One of ``COMPRESSIONS``; ``'auto'`` compresses when the file
+            name ends with a codec's extension, such as ``out.json.gz``
+        
+    Returns:
+        Codec name, or None to write uncompressed output
+        
+    Raises:
+        ValueError: If the choice is unknown or its codec is not installed
+    """
+    if compress not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compress}")
+    if compress == 'auto':
+        suffix = Path(file_path).suffix if file_path else ''
+        compress = next((name for name, ext in COMPRESSION_SUFFIXES.items() if ext == suffix), 'none')
+    if compress == 'none':
+        return None
+    if compress == 'zstd' and importlib.util.find_spec('zstandard') is None:
+        raise ValueError("zstd compression requires the zstandard package (pip install zstandard)")
+    return compress
+
+
+def open_compressed(
+    file_path: Union[Path, BinaryIO], compression: str, mode: str = 'rb'
+) -> BinaryIO:
+    """
+    Open a binary stream that decompresses (``'rb'``) or compresses (``'wb'``) a file.
+    
+    Args:
+        file_path: Path to the file, or a binary file object, which is left
+            open when the returned stream is closed
+        compression: Codec name from ``COMPRESSION_SUFFIXES``
+        mode: ``'rb'`` or ``'wb'``
+        
+    Returns:
+        Binary file object over the uncompressed data
+        
+    Raises:
+        ValueError: If the codec is unknown or not installed
+    """
+    level = COMPRESSION_LEVELS.get(compression)
+    if compression == 'gzip':
+        return gzip.open(file_path, mode, compresslevel=level)
+    if compression == 'bz2':
+        return bz2.open(file_path, mode, compresslevel=level)
+    if compression != 'zstd':
+        raise ValueError(f"Unknown compression: {compression}")
+    zstandard = _import_zstandard()
+    owned = isinstance(file_path, (str, Path))
+    raw = open(file_path, mode) if owned else file_path
+    if mode == 'rb':
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=owned)
+    return zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=owned)
+
+
+def _import_zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd files require the zstandard package (pip install zstandard)") from None
+    return zstandard
+
+
+class PipelinedReader(io.RawIOBase):
+    """
+    Read a binary stream in a background thread, ahead of the consumer.
+    
+    zlib, bz2 and zstandard release the GIL while they inflate, so the next
+    blocks are decompressed while the current one is parsed. At most
+    ``depth`` blocks wait in between, which bounds memory.
+    """
+    
+    def __init__(
+        self, source: BinaryIO, block_size: int = DEFAULT_PIPE_BLOCK_SIZE, depth: int = DEFAULT_PIPE_DEPTH
+    ) -> None:
+        super().__init__()
+        self._source = source
+        self._blocks: queue.Queue = queue.Queue(maxsize=depth)
+        self._block = memoryview(b'')
+        self._offset = 0
+        self._eof = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, args=(block_size,), daemon=True)
+        self._thread.start()
+    
+    def _produce(self, block_size: int) -> None:
+        try:
+            while not self._stop.is_set():
+                block = self._source.read(block_size)
+                self._put(block)
+                if not block:
+                    return
+        except BaseException as e:  # handed to the consumer, which raises it
+            self._put(e)
+    
+    def _put(self, item: Any) -> None:
+        # Wait for room, but give up once the reader is closed
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._block):
+            if self._eof:
+                return 0
+            item = self._blocks.get()
+            if isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._block, self._offset = memoryview(item), 0
+        count = min(len(buffer), len(self._block) - self._offset)
+        buffer[:count] = self._block[self._offset:self._offset + count]
+        self._offset += count
+        return count
+    
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+class PipelinedWriter(io.RawIOBase):
+    """
+    Write to a binary stream from a background thread.
+    
+    The counterpart of ``PipelinedReader`` for output: blocks are compressed
+    while the next ones are serialized. At most ``depth`` blocks wait, so a
+    slow sink slows the producer down instead of growing memory. A write
+    error is raised by the next ``write`` or by ``close``.
+    """
+    
+    def __init__(self, sink: BinaryIO, depth: int = DEFAULT_PIPE_DEPTH) -> None:
+        super().__init__()
+        self._sink = sink
+        self._blocks: queue.Queue = queue.Queue(maxsize=depth)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+    
+    def _consume(self) -> None:
+        while True:
+            block = self._blocks.get()
+            if block is None:
+                return
+            if self._error is None:
+                try:
+                    self._sink.write(block)
+                except BaseException as e:  # raised in the producer's thread
+                    self._error = e
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        if self._error is not None:
+            raise self._error
+        self._blocks.put(bytes(data))
+        return len(data)
+    
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._blocks.put(None)
+        self._thread.join()
+        try:
+            self._sink.close()
+        except BaseException as e:
+            self._error = self._error or e
+        super().close()
+        if self._error is not None:
+            raise self._error
+
+
+def open_csv_input(file_path: Path, encoding: str = 'utf-8', newline: Optional[str] = '') -> TextIO:
+    """
+    Open a CSV file for reading text, decompressing gzip, bz2 or zstd input.
+    
+    Compressed input is recognized by its magic bytes and inflated in a
+    background thread by ``PipelinedReader``, so no decompressed copy is
+    written to disk. ``STDIO_PATH`` reads standard input, see ``open_stdio``.
+    
+    Args:
+        file_path: Path to the CSV file, compressed or not
+        encoding: Text encoding used to decode the file
+        newline: Newline handling as for ``open``; ``''`` suits the csv module
+        
+    Returns:
+        Text file object
+    """
+    if is_stdio(file_path):
+        source = open_stdio('rb')
+        compression = _compression_from_magic(source.peek(4)[:4])
+    else:
+        compression = detect_compression(file_path)
+        if compression is None:
+            return open(file_path, 'r', encoding=encoding, newline=newline)
+        source = file_path
+    if compression is not None:
+        source = io.BufferedReader(PipelinedReader(open_compressed(source, compression)), DEFAULT_PIPE_BLOCK_SIZE)
+    return io.TextIOWrapper(source, encoding=encoding, newline=newline)
+
+
+@contextmanager
+def open_output(file_path: Path, compression: Optional[str] = None) -> Iterator[TextIO]:
+    """
+    Open an output file for writing UTF-8 text, compressing it if requested.
+    
+    Compression runs in a background thread, see ``PipelinedWriter``.
+    ``STDIO_PATH`` writes to standard output, see ``open_stdio``.
+    
+    Args:
+        file_path: Path of the file to write
+        compression: Codec name from ``COMPRESSION_SUFFIXES``, or None
+        
+    Yields:
+        Text file object, flushed and closed when the context exits
+    """
+    target = open_stdio('wb') if is_stdio(file_path) else open(file_path, 'wb')
+    text = None
+    try:
+        if compression is None:
+            text = io.TextIOWrapper(target, encoding='utf-8')
+        else:
+            compressor = PipelinedWriter(open_compressed(target, compression, 'wb'))
+            text = io.TextIOWrapper(io.BufferedWriter(compressor, DEFAULT_PIPE_BLOCK_SIZE), encoding='utf-8')
+        yield text
+    finally:
+        try:
+            if text is not None:
+                text.close()
+        finally:
+            target.close()
+
+
+def iter_mmap_lines(
+    file_path: Path, encoding: str = 'utf-8', block_size: int = DEFAULT_MMAP_BLOCK_SIZE
+) -> Iterator[str]:
+    """
+    Read text lines from a memory-mapped file.
+    
+    The file is decoded in blocks of about ``block_size`` bytes, each cut
+    after a newline, directly from the mapping. No full-file bytes or str
+    copy is ever built, and lines keep their original endings so the csv
+    module sees the same input as with ``open(..., newline='')``.
+    
+    Args:
+        file_path: Path to the text file
+        encoding: Text encoding used to decode the file
+        block_size: Approximate number of bytes decoded at a time
+        
+    Yields:
+        Lines of the file, including their line endings
+        
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        PermissionError: If there are insufficient permissions to read the file
+    """
+    try:
+        file = open(file_path, 'rb')
+    except FileNotFoundError:
+        raise FileNotFoundError(f"CSV file not found: {file_path}")
+    except PermissionError:
+        raise PermissionError(f"Permission denied to read file: {file_path}")
+    
+    with file:
+        size = file.seek(0, io.SEEK_END)
+        if size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            start = 0
+            while start < size:
+                end = data.rfind(b'\n', start, start + block_size) + 1
+                if end <= start:
+                    # A single line longer than block_size; extend to its end
+                    end = data.find(b'\n', start + block_size) + 1 or size
+                with memoryview(data)[start:end] as block:
+                    text = decoder.decode(block, end == size)
+                yield from io.StringIO(text, newline='')
+                start = end
+
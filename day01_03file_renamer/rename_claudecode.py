@@ -3,65 +3,883 @@
 File Renamer Script
 
 This script renames files in a specified directory by replacing the 'report_' prefix 
-with 'summary_' for all .txt files.
+with 'summary_' for all .txt files, optionally in all subdirectories too.
+
+Every run first builds a rename plan that skips collisions and orders chains and
+cycles, so no existing file is ever overwritten. With --journal the plan and its
+progress are recorded, so an interrupted run can be finished with --resume or
+undone with --rollback. With --rules the renames follow an ordered list of
+match -> rewrite rules read from a JSON, TOML or YAML file instead. With --watch
+the directory is renamed once and then watched, and new files are renamed as
+they land.
+
+The functions here form a library API: they return RenameResult records and
+show them only through the reporter they are given (see rename_report).
 """
 
 import argparse
+import json
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from rename_report import (
+    CONFLICT, FAILED, PLANNED, RENAMED, REPORTERS, SKIPPED, RenameResult, RenameSummary, Reporter, make_reporter
+)
+from rename_rules import RuleSet, load_rules
+from rename_watch import DEFAULT_DEBOUNCE, InotifyWatcher, open_watcher
+
 
+# Number of renames handed to a worker thread at a time with --jobs
+RENAME_BATCH_SIZE = 256
 
-def find_txt_files(directory: Path) -> List[Path]:
+# Completed renames appended to the journal between two fsync calls
+JOURNAL_SYNC_INTERVAL = 8192
+
+
+def scan_directory(
+    directory: Path, suffix: str = ".txt", recursive: bool = False, errors: Optional[List[Tuple[str, str]]] = None
+) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Walk a directory tree with os.scandir, one directory at a time.
+    
+    File types come from the type cached in each directory entry, so no extra
+    stat call is made per file on filesystems that report it. Between
+    directories only the stack of pending subdirectories is kept, so memory is
+    bounded by the largest single directory rather than by the whole tree.
+    Each directory is fully read before it is yielded, so renaming its files
+    never races with the scan.
+    
+    Args:
+        directory: Path object representing the root directory
+        suffix: Only file names ending with this suffix are reported
+        recursive: Also descend into subdirectories (symlinks are not followed)
+        errors: Receives (directory path, error message) for each directory
+            that cannot be read; such directories are skipped either way
+        
+    Yields:
+        Tuples of (directory path, sorted names of its matching files)
+    """
+    pending = [os.fspath(directory)]
+    while pending:
+        current = pending.pop()
+        names = []
+        subdirectories = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif entry.name.endswith(suffix) and entry.is_file():
+                        names.append(entry.name)
+        except OSError as e:
+            if errors is not None:
+                errors.append((current, str(e)))
+            continue
+        
+        # Pop subdirectories in name order so the walk is deterministic
+        pending.extend(sorted(subdirectories, reverse=True))
+        if names:
+            names.sort()
+            yield current, names
+
+
+def find_txt_files(directory: Path, recursive: bool = False) -> List[Path]:
     """
     Find all .txt files in the specified directory.
     
     Args:
         directory: Path object representing the target directory
+        recursive: Also search all subdirectories
         
     Returns:
         List of Path objects for all .txt files found
     """
-    return list(directory.glob("*.txt"))
+    return [Path(dir_path, name) for dir_path, names in scan_directory(directory, ".txt", recursive)
+            for name in names]
 
 
-def rename_files_with_prefix(directory: Path, old_prefix: str = "report_", new_prefix: str = "summary_") -> None:
+@dataclass
+class RenamePlan:
+    """
+    Renames to perform, checked and ordered before any file is touched.
+    
+    The first ``serial_count`` steps form chains and cycles whose targets are
+    vacated by earlier steps, so they must run one after another. The
+    remaining steps touch no name used by any other step and may run in any
+    order or concurrently.
     """
-    Rename files by replacing the old prefix with the new prefix.
+    root: str
+    steps: List[Tuple[str, str]] = field(default_factory=list)
+    serial_count: int = 0
+    conflicts: List[Tuple[str, str, str]] = field(default_factory=list)
+    scanned: int = 0
+    scan_errors: List[Tuple[str, str]] = field(default_factory=list)
+    
+    def parking_steps(self, undo: bool = False) -> Dict[int, int]:
+        """
+        Find the steps that park a file of a cycle under a temporary name.
+        
+        A parking step moves a file into a name that a later step moves it
+        out of again, so together they make one rename. Found from the steps
+        alone, so it works on plans read back from a journal.
+        
+        Args:
+            undo: Describe the steps as undone, where the later step parks
+            
+        Returns:
+            Each parking step mapped to the step that moves the file on
+        """
+        sources = {self.steps[step_id][0]: step_id for step_id in range(self.serial_count)}
+        parking = {}
+        for step_id in range(self.serial_count):
+            moved_on = sources.get(self.steps[step_id][1])
+            if moved_on is not None and moved_on > step_id:
+                parking[step_id] = moved_on
+        if undo:
+            return {moved_on: step_id for step_id, moved_on in parking.items()}
+        return parking
+    
+    def renames(self) -> Iterator[Tuple[str, str]]:
+        """Yield the renames the steps make, without the detours through temporary names."""
+        parking = self.parking_steps()
+        parked_from = {moved_on: self.steps[step_id][0] for step_id, moved_on in parking.items()}
+        for step_id, (old, new) in enumerate(self.steps):
+            if step_id not in parking:
+                yield parked_from.get(step_id, old), new
+
+
+def build_rename_plan(
+    root: str, renames: Iterable[Tuple[str, str]], exists: Callable[[str], bool] = os.path.lexists
+) -> RenamePlan:
+    """
+    Check and order a set of renames.
+    
+    A rename is rejected as a conflict when its target is claimed by an
+    earlier rename, when the target already exists and is not itself renamed
+    away, or when it would land on a file whose own rename was rejected.
+    Renames whose target is another rename's source are ordered so the target
+    is vacated first; cycles (a -> b -> a) are broken with a temporary name.
+    
+    Args:
+        root: Directory the renames were planned for
+        renames: Pairs of (old path, new path)
+        exists: Predicate telling whether a path is already taken
+        
+    Returns:
+        The ordered plan and its conflicts
+    """
+    plan = RenamePlan(root)
+    targets: Dict[str, str] = {}
+    claimed: Set[str] = set()
+    rejected = []
+    for old, new in renames:
+        if old == new:
+            continue
+        if new in claimed:
+            plan.conflicts.append((old, new, "target is claimed by another rename"))
+            rejected.append(old)
+            continue
+        claimed.add(new)
+        targets[old] = new
+    
+    # Reject renames onto existing files, then everything that would overwrite a file left in place
+    sources_by_target = {new: old for old, new in targets.items()}
+    for old, new in targets.items():
+        if new not in targets and exists(new):
+            plan.conflicts.append((old, new, "target already exists"))
+            rejected.append(old)
+    while rejected:
+        for old in rejected:
+            targets.pop(old, None)
+        blocked = []
+        for old in rejected:
+            upstream = sources_by_target.pop(old, None)
+            if upstream is not None and upstream in targets:
+                plan.conflicts.append((upstream, targets[upstream], "target is not renamed away"))
+                blocked.append(upstream)
+        rejected = blocked
+    
+    # Chains start at a source that is nobody's target; run each from its end backwards
+    new_targets = set(targets.values())
+    ordered = set()
+    for head in targets:
+        if head in new_targets or targets[head] not in targets:
+            continue
+        chain = [head]
+        while targets[chain[-1]] in targets:
+            chain.append(targets[chain[-1]])
+        for old in reversed(chain):
+            plan.steps.append((old, targets[old]))
+        ordered.update(chain)
+    
+    # What is left with a renamed target lies on a cycle; park one file under a temporary name
+    for start in targets:
+        if start in ordered or targets[start] not in targets:
+            continue
+        cycle = [start]
+        while targets[cycle[-1]] != start:
+            cycle.append(targets[cycle[-1]])
+        temporary = _temporary_name(start, exists)
+        plan.steps.append((start, temporary))
+        for old in reversed(cycle[1:]):
+            plan.steps.append((old, targets[old]))
+        plan.steps.append((temporary, targets[start]))
+        ordered.update(cycle)
+    
+    plan.serial_count = len(plan.steps)
+    plan.steps.extend((old, new) for old, new in targets.items() if old not in ordered)
+    return plan
+
+
+def _temporary_name(path: str, exists: Callable[[str], bool]) -> str:
+    """Return an unused hidden name next to ``path`` for parking it during a cycle."""
+    directory, name = os.path.split(path)
+    attempt = 0
+    candidate = os.path.join(directory, f".{name}.renaming-{attempt}")
+    while exists(candidate):
+        attempt += 1
+        candidate = os.path.join(directory, f".{name}.renaming-{attempt}")
+    return candidate
+
+
+def plan_renames(directory: Path, rules: RuleSet, recursive: bool = False) -> RenamePlan:
+    """
+    Plan the renames a rule set makes in a directory.
+    
+    Each file name is checked against all rules at once by the compiled rule
+    set. Targets are checked against the directory listing read by the scan,
+    so planning costs no stat call per file.
     
     Args:
         directory: Path object representing the target directory
-        old_prefix: The prefix to be replaced (default: "report_")
-        new_prefix: The prefix to replace with (default: "summary_")
+        rules: Compiled rename rules, which also select the file suffix
+        recursive: Also plan renames in all subdirectories
+        
+    Returns:
+        The checked and ordered plan
     """
-    # Find all .txt files in the directory
-    txt_files = find_txt_files(directory)
+    root = os.path.abspath(directory)
+    suffix = rules.suffix
+    rewrite = rules.rewrite
+    listings: Dict[str, Set[str]] = {}
+    renames = []
+    scanned = 0
+    scan_errors: List[Tuple[str, str]] = []
+    for dir_path, names in scan_directory(root, suffix, recursive, scan_errors):
+        scanned += len(names)
+        listings[dir_path] = set(names)
+        # Plain concatenation: os.path.join costs more than the rename planning itself
+        dir_prefix = dir_path + os.sep
+        for name in names:
+            new_name = rewrite(name, dir_path)
+            if new_name is not None:
+                if os.sep != "/":
+                    new_name = new_name.replace("/", os.sep)
+                renames.append((dir_prefix + name, dir_prefix + new_name))
     
-    if not txt_files:
-        print(f"No .txt files found in directory: {directory}")
-        return
+    def exists(path: str) -> bool:
+        dir_path, _, name = path.rpartition(os.sep)
+        if name.endswith(suffix) and dir_path in listings:
+            return name in listings[dir_path]
+        return os.path.lexists(path)
+    
+    plan = build_rename_plan(root, renames, exists)
+    plan.scanned = scanned
+    plan.scan_errors = scan_errors
+    return plan
+
+
+def plan_prefix_renames(
+    directory: Path, old_prefix: str = "report_", new_prefix: str = "summary_", recursive: bool = False
+) -> RenamePlan:
+    """
+    Plan the prefix renames for all .txt files in a directory.
+    
+    Args:
+        directory: Path object representing the target directory
+        old_prefix: The prefix to be replaced
+        new_prefix: The prefix to replace with
+        recursive: Also plan renames in all subdirectories
+        
+    Returns:
+        The checked and ordered plan
+    """
+    return plan_renames(directory, RuleSet.from_prefix(old_prefix, new_prefix), recursive)
+
+
+class RenameJournal:
+    """
+    Append-only JSON Lines journal of a rename plan and its progress.
+    
+    The whole plan is written and synced before the first rename. Completed
+    renames are then appended in batches and synced every
+    ``JOURNAL_SYNC_INTERVAL`` renames, so journaling adds almost nothing to the
+    cost of each rename. Renames that completed after the last sync are
+    recognized on resume because their source is gone and their target exists.
+    """
+    
+    VERSION = 1
     
-    renamed_count = 0
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._file: Optional[TextIO] = None
+        self._unsynced = 0
+    
+    def start(self, plan: RenamePlan) -> None:
+        """
+        Create the journal and write the plan to it.
+        
+        Raises:
+            FileExistsError: If the journal already exists
+        """
+        self._file = open(self.path, "x", encoding="utf-8")
+        self._write({"journal": self.VERSION, "root": plan.root, "serial": plan.serial_count})
+        # Steps are numbered by their position; chunks keep encoding cost per step low
+        for start in range(0, len(plan.steps), RENAME_BATCH_SIZE * 16):
+            self._write({"steps": plan.steps[start:start + RENAME_BATCH_SIZE * 16]})
+        self._write({"planned": len(plan.steps)})
+        self.sync()
+    
+    def reopen(self) -> None:
+        """Open an existing journal to append further progress."""
+        self._file = open(self.path, "a", encoding="utf-8")
+    
+    def record(self, event: str, step_ids: List[int], flush: bool = False) -> None:
+        """
+        Append completed steps under ``event`` (``'done'`` or ``'undone'``).
+        
+        Args:
+            event: Name of the event
+            step_ids: Steps the event applies to
+            flush: Hand the record to the OS immediately, for ordered steps
+        """
+        if not step_ids:
+            return
+        self._write({event: step_ids})
+        self._unsynced += len(step_ids)
+        if self._unsynced >= JOURNAL_SYNC_INTERVAL:
+            self.sync()
+        elif flush:
+            self._file.flush()
     
-    # Process each .txt file
-    for file_path in txt_files:
-        filename = file_path.name
+    def close(self, status: Optional[str] = None) -> None:
+        """
+        Append a final status, if any, sync and close.
         
-        # Check if the file has the target prefix
-        if filename.startswith(old_prefix):
-            # Create new filename by replacing the prefix
-            new_filename = new_prefix + filename[len(old_prefix):]
-            new_file_path = file_path.parent / new_filename
+        Args:
+            status: ``'committed'`` or ``'rolled_back'``, or None to leave the
+                run open for a later resume or rollback
+        """
+        if status is not None:
+            self._write({status: True})
+        self.sync()
+        self._file.close()
+        self._file = None
+    
+    def sync(self) -> None:
+        """Flush buffered records and fsync them to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+    
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+    
+    @classmethod
+    def load(cls, path: Path) -> Tuple[RenamePlan, Set[int], str]:
+        """
+        Read a journal back.
+        
+        A torn last line, left by a crash in the middle of a write, is ignored.
+        
+        Args:
+            path: Journal file
+            
+        Returns:
+            The plan, the ids of steps currently applied and the journal status:
+            ``'incomplete'`` (plan not fully written, nothing renamed),
+            ``'running'``, ``'committed'`` or ``'rolled_back'``
             
+        Raises:
+            ValueError: If the file is not a rename journal
+        """
+        plan: Optional[RenamePlan] = None
+        applied: Set[int] = set()
+        status = "incomplete"
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if plan is None:
+                    if record.get("journal") != cls.VERSION:
+                        raise ValueError(f"Not a rename journal: {path}")
+                    plan = RenamePlan(record["root"], serial_count=record["serial"])
+                elif "steps" in record:
+                    plan.steps.extend((old, new) for old, new in record["steps"])
+                elif "planned" in record:
+                    status = "running"
+                elif "done" in record:
+                    applied.update(record["done"])
+                elif "undone" in record:
+                    applied.difference_update(record["undone"])
+                elif "committed" in record:
+                    status = "committed"
+                elif "rolled_back" in record:
+                    status = "rolled_back"
+        if plan is None:
+            raise ValueError(f"Not a rename journal: {path}")
+        return plan, applied, status
+
+
+def reconcile_applied(plan: RenamePlan, applied: Set[int]) -> Set[int]:
+    """
+    Add the steps that completed after the journal was last written.
+    
+    Independent steps touch names no other step uses, so a missing source
+    and a present target prove they ran. Ordered steps are journaled one at
+    a time, so only the first unrecorded one can have run unrecorded.
+    
+    Args:
+        plan: Plan read from the journal
+        applied: Step ids the journal records as applied
+        
+    Returns:
+        Step ids that are actually applied on disk
+    """
+    def ran(step_id: int) -> bool:
+        old, new = plan.steps[step_id]
+        return os.path.lexists(new) and not os.path.lexists(old)
+    
+    applied = set(applied)
+    for step_id in range(plan.serial_count):
+        if step_id not in applied:
+            if ran(step_id):
+                applied.add(step_id)
+            break
+    applied.update(step_id for step_id in range(plan.serial_count, len(plan.steps))
+                   if step_id not in applied and ran(step_id))
+    return applied
+
+
+def _rename_file(old: str, new: str, check_target: bool = False) -> RenameResult:
+    """
+    Rename one file, recording the outcome instead of raising.
+    
+    A missing target directory, for rules that move files into
+    subdirectories, is created on the first failed attempt.
+    """
+    started = time.perf_counter()
+    try:
+        if check_target and os.path.lexists(new):
+            return RenameResult(old, new, FAILED, "target already exists")
+        try:
+            os.rename(old, new)
+        except FileNotFoundError:
+            if not os.path.lexists(old):
+                raise
+            os.makedirs(new.rpartition(os.sep)[0], exist_ok=True)
+            os.rename(old, new)
+        return RenameResult(old, new, RENAMED, None, time.perf_counter() - started)
+    except OSError as e:
+        return RenameResult(old, new, FAILED, str(e), time.perf_counter() - started)
+
+
+def execute_rename_plan(
+    plan: RenamePlan,
+    jobs: int = 1,
+    journal: Optional[RenameJournal] = None,
+    applied: Iterable[int] = (),
+    undo: bool = False,
+    check_targets: bool = False,
+    reporter: Optional[Reporter] = None,
+) -> List[RenameResult]:
+    """
+    Run the steps of a plan, or undo applied ones.
+    
+    Ordered steps run one at a time in the calling thread and stop at the
+    first failure, since every later step of a chain depends on it.
+    Independent steps run in batches, on a thread pool when ``jobs`` > 1,
+    and are reported in plan order. A file of a cycle parked under a
+    temporary name gets one result, for the step that moves it on, under
+    its original name.
+    
+    Args:
+        plan: Plan to execute
+        jobs: Number of threads issuing renames concurrently
+        journal: Journal receiving progress, or None
+        applied: Steps already applied; skipped, or the only ones undone
+        undo: Reverse the applied steps instead of running the others
+        check_targets: Refuse to overwrite existing targets; needed when the
+            tree may have changed since planning
+        reporter: Receives each result as it is produced
+        
+    Returns:
+        One result per rename run, in plan order
+    """
+    applied = set(applied)
+    event = "undone" if undo else "done"
+    serial_ids = range(plan.serial_count)
+    independent_ids = range(plan.serial_count, len(plan.steps))
+    if undo:
+        # Undo in reverse: independent steps first, then the chains from their last step
+        serial_ids = [i for i in reversed(serial_ids) if i in applied]
+        independent_ids = [i for i in independent_ids if i in applied]
+    else:
+        serial_ids = [i for i in serial_ids if i not in applied]
+        independent_ids = [i for i in independent_ids if i not in applied]
+    
+    reporter = reporter if reporter is not None else Reporter()
+    results: List[RenameResult] = []
+    
+    def paths(step_id: int) -> Tuple[str, str]:
+        old, new = plan.steps[step_id]
+        return (new, old) if undo else (old, new)
+    
+    parking = plan.parking_steps(undo)
+    parked_from = {moved_on: paths(step_id)[0] for step_id, moved_on in parking.items()}
+    
+    def run_batch(batch: List[int]) -> List[RenameResult]:
+        return [_rename_file(*paths(step_id), check_targets) for step_id in batch]
+    
+    for position, step_id in enumerate(serial_ids):
+        result = _rename_file(*paths(step_id), check_targets)
+        if step_id in parked_from:
+            result.old = parked_from[step_id]
+        if step_id not in parking or result.status != RENAMED:
+            results.append(result)
+            reporter.result(result)
+        if result.status != RENAMED:
+            for skipped_id in serial_ids[position + 1:]:
+                if skipped_id in parking:
+                    continue
+                old, new = paths(skipped_id)
+                result = RenameResult(parked_from.get(skipped_id, old), new, SKIPPED,
+                                      "skipped, an earlier rename in its chain failed")
+                results.append(result)
+                reporter.result(result)
+            break
+        if journal is not None:
+            journal.record(event, [step_id], flush=True)
+    
+    batches = [independent_ids[i:i + RENAME_BATCH_SIZE]
+               for i in range(0, len(independent_ids), RENAME_BATCH_SIZE)]
+    pool = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        outcomes = pool.map(run_batch, batches) if pool is not None else map(run_batch, batches)
+        for batch, batch_results in zip(batches, outcomes):
+            if journal is not None:
+                journal.record(event, [step_id for step_id, result in zip(batch, batch_results)
+                                       if result.status == RENAMED])
+            results.extend(batch_results)
+            for result in batch_results:
+                reporter.result(result)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return results
+
+
+def conflict_results(plan: RenamePlan) -> List[RenameResult]:
+    """
+    Return the renames that were rejected while planning, as results.
+    
+    Args:
+        plan: Plan whose conflicts are returned
+        
+    Returns:
+        One CONFLICT result per rejected rename
+    """
+    return [RenameResult(old, new, CONFLICT, reason) for old, new, reason in plan.conflicts]
+
+
+def scan_error_results(plan: RenamePlan) -> List[RenameResult]:
+    """
+    Return the directories that could not be scanned while planning, as results.
+    
+    Args:
+        plan: Plan whose scan errors are returned
+        
+    Returns:
+        One FAILED result per unreadable directory, naming it as both paths
+    """
+    return [RenameResult(path, path, FAILED, f"cannot scan directory: {error}") for path, error in plan.scan_errors]
+
+
+def rename_files(
+    directory: Path,
+    rules: RuleSet,
+    recursive: bool = False,
+    jobs: int = 1,
+    dry_run: bool = False,
+    journal_path: Optional[Path] = None,
+    reporter: Optional[Reporter] = None,
+) -> RenameSummary:
+    """
+    Rename files according to a set of rename rules.
+    
+    All renames are planned first: directory entries are streamed with
+    os.scandir, collisions with existing or other renamed files are rejected
+    as conflicts, and chains and cycles are ordered. The plan is then
+    executed, optionally on a thread pool, which hides the round-trip of each
+    rename on network filesystems. Results follow plan order, so they are the
+    same for every run.
+    
+    Args:
+        directory: Path object representing the target directory
+        rules: Compiled rename rules
+        recursive: Also rename files in all subdirectories
+        jobs: Number of threads issuing renames concurrently
+        dry_run: Only plan, rename nothing; planned renames get PLANNED results
+        journal_path: Record the plan and its progress here so an interrupted
+            run can be resumed or rolled back
+        reporter: Presents the results as they are produced; by default
+            nothing is shown
+        
+    Returns:
+        Unreadable directories and conflicts first, then one result per
+        planned rename
+        
+    Raises:
+        FileExistsError: If the journal already exists
+    """
+    started = time.perf_counter()
+    reporter = reporter if reporter is not None else Reporter()
+    if journal_path is not None and not dry_run and os.path.lexists(journal_path):
+        raise FileExistsError(f"Journal already exists, use --resume or --rollback: {journal_path}")
+    plan = plan_renames(directory, rules, recursive)
+    summary = RenameSummary(plan.root, scanned=plan.scanned, suffix=rules.suffix, dry_run=dry_run)
+    
+    if not plan.scanned and not plan.scan_errors:
+        reporter.message(f"No {rules.suffix} files found in directory: {directory}")
+        return summary
+    
+    reporter.start(plan.root, len(plan.steps) - len(plan.parking_steps()))
+    summary.results = scan_error_results(plan) + conflict_results(plan)
+    for result in summary.results:
+        reporter.result(result)
+    
+    if dry_run:
+        for old, new in plan.renames():
+            result = RenameResult(old, new, PLANNED)
+            summary.results.append(result)
+            reporter.result(result)
+    else:
+        journal = None
+        if journal_path is not None:
+            journal = RenameJournal(journal_path)
             try:
-                # Rename the file
-                file_path.rename(new_file_path)
-                print(f"Renamed: '{filename}' -> '{new_filename}'")
-                renamed_count += 1
-            except OSError as e:
-                print(f"Error renaming '{filename}': {e}")
+                journal.start(plan)
+            except FileExistsError:
+                raise FileExistsError(f"Journal already exists, use --resume or --rollback: {journal_path}")
+        status = None
+        try:
+            summary.results.extend(execute_rename_plan(plan, jobs, journal, reporter=reporter))
+            status = "committed"
+        finally:
+            if journal is not None:
+                journal.close(status)
+    
+    summary.elapsed = time.perf_counter() - started
+    reporter.finish(summary)
+    return summary
+
+
+def rename_files_with_prefix(
+    directory: Path,
+    old_prefix: str = "report_",
+    new_prefix: str = "summary_",
+    recursive: bool = False,
+    jobs: int = 1,
+    dry_run: bool = False,
+    journal_path: Optional[Path] = None,
+    reporter: Optional[Reporter] = None,
+) -> RenameSummary:
+    """
+    Rename .txt files by replacing the old prefix with the new prefix.
+    
+    Args:
+        directory: Path object representing the target directory
+        old_prefix: The prefix to be replaced (default: "report_")
+        new_prefix: The prefix to replace with (default: "summary_")
+        recursive: Also rename files in all subdirectories
+        jobs: Number of threads issuing renames concurrently
+        dry_run: Only plan, rename nothing
+        journal_path: Record the plan and its progress here so an interrupted
+            run can be resumed or rolled back
+        reporter: Presents the results as they are produced
+        
+    Returns:
+        The results of the run, see rename_files
+    """
+    return rename_files(directory, RuleSet.from_prefix(old_prefix, new_prefix), recursive, jobs, dry_run,
+                        journal_path, reporter)
+
+
+def resume_from_journal(
+    journal_path: Path, jobs: int = 1, rollback: bool = False, reporter: Optional[Reporter] = None
+) -> RenameSummary:
+    """
+    Finish an interrupted run recorded in a journal, or roll it back.
+    
+    Args:
+        journal_path: Journal written by an earlier run
+        jobs: Number of threads issuing renames concurrently
+        rollback: Restore the original names instead of finishing the plan
+        reporter: Presents the results as they are produced
+        
+    Returns:
+        One result per step run or undone; none if there was nothing to do
+        
+    Raises:
+        OSError: If the journal cannot be read
+        ValueError: If the file is not a rename journal
+    """
+    reporter = reporter if reporter is not None else Reporter()
+    plan, applied, status = RenameJournal.load(journal_path)
+    summary = RenameSummary(plan.root, undo=rollback)
+    
+    if status == "rolled_back":
+        reporter.message(f"Journal was already rolled back: {journal_path}")
+        return summary
+    if status == "incomplete":
+        reporter.message(f"Journal has no complete plan, nothing was renamed; delete it to start over: {journal_path}")
+        return summary
+    if status == "committed" and not rollback:
+        reporter.message(f"Journal is already complete: {journal_path}")
+        return summary
+    
+    started = time.perf_counter()
+    applied = reconcile_applied(plan, applied)
+    journal = RenameJournal(journal_path)
+    journal.reopen()
+    status = None
+    try:
+        # Record what the reconcile found, so a rollback interrupted later still knows it
+        journal.record("done", sorted(applied))
+        
+        pending = applied if rollback else set(range(len(plan.steps))) - applied
+        reporter.start(plan.root, len(pending.difference(plan.parking_steps(rollback))))
+        summary.results = execute_rename_plan(
+            plan, jobs, journal, applied, undo=rollback, check_targets=True, reporter=reporter
+        )
+        if all(result.status == RENAMED for result in summary.results):
+            status = "rolled_back" if rollback else "committed"
+    finally:
+        journal.close(status)
     
-    print(f"\nTotal files renamed: {renamed_count}")
+    summary.elapsed = time.perf_counter() - started
+    reporter.finish(summary)
+    return summary
+
+
+def rename_new_files(
+    paths: Iterable[str],
+    rules: RuleSet,
+    root: str,
+    jobs: int = 1,
+    produced: Optional[Set[str]] = None,
+    reporter: Optional[Reporter] = None,
+) -> List[RenameResult]:
+    """
+    Plan and run the renames for a batch of files reported by a watcher.
+    
+    Args:
+        paths: Paths of new or changed files
+        rules: Compiled rename rules
+        root: Watched directory, for labels
+        jobs: Number of threads issuing renames concurrently
+        produced: Targets of earlier renames; their own events are skipped once
+            so a rule whose result matches again cannot loop. Updated in place.
+        reporter: Presents the results as they are produced
+        
+    Returns:
+        Conflicts first, then one result per rename
+    """
+    if produced is None:
+        produced = set()
+    reporter = reporter if reporter is not None else Reporter()
+    renames = []
+    for path in paths:
+        if path in produced:
+            produced.discard(path)
+            continue
+        dir_path, _, name = path.rpartition(os.sep)
+        try:
+            new_name = rules.rewrite(name, dir_path)
+        except OSError:  # gone before its {mtime} could be read
+            continue
+        if new_name is not None:
+            if os.sep != "/":
+                new_name = new_name.replace("/", os.sep)
+            renames.append((path, dir_path + os.sep + new_name))
+    if not renames:
+        return []
+    
+    # Files may have been renamed or removed since their event, so check the disk, not a listing
+    plan = build_rename_plan(root, ((old, new) for old, new in renames if os.path.lexists(old)))
+    reporter.start(root, len(plan.steps) - len(plan.parking_steps()))
+    results = conflict_results(plan)
+    for result in results:
+        reporter.result(result)
+    produced.update(new for old, new in plan.steps if new.endswith(rules.suffix))
+    results.extend(execute_rename_plan(plan, jobs, check_targets=True, reporter=reporter))
+    return results
+
+
+def watch_and_rename(
+    directory: Path,
+    rules: RuleSet,
+    recursive: bool = False,
+    jobs: int = 1,
+    debounce: float = DEFAULT_DEBOUNCE,
+    poll: bool = False,
+    reporter: Optional[Reporter] = None,
+) -> None:
+    """
+    Rename the files in a directory, then keep renaming new files as they land.
+    
+    The watcher is started before the initial pass, so files that land during
+    it are not missed. New files are then handled in debounced batches (see
+    rename_watch), each planned and checked like a full run. Stops on Ctrl+C.
+    
+    Args:
+        directory: Path object representing the target directory
+        rules: Compiled rename rules
+        recursive: Also rename and watch files in all subdirectories
+        jobs: Number of threads issuing renames concurrently
+        debounce: Quiet time that closes a batch of events, in seconds
+        poll: Poll the directory even where inotify is available
+        reporter: Presents the results as they are produced
+    """
+    root = os.path.abspath(directory)
+    reporter = reporter if reporter is not None else Reporter()
+    with open_watcher(root, rules.suffix, recursive, debounce, poll, reporter) as watcher:
+        summary = rename_files(directory, rules, recursive, jobs, reporter=reporter)
+        # The first pass's own renames come back as events; skip them like a batch's
+        produced: Set[str] = {result.new for result in summary.results
+                              if result.status == RENAMED and result.new.endswith(rules.suffix)}
+        
+        mode = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+        reporter.message(f"\nWatching {directory} for new {rules.suffix} files ({mode}), press Ctrl+C to stop...")
+        try:
+            for batch in watcher.batches():
+                started = time.perf_counter()
+                results = rename_new_files(batch, rules, root, jobs, produced, reporter)
+                renamed_count = sum(1 for result in results if result.status == RENAMED)
+                failed_count = sum(1 for result in results if result.status in (FAILED, SKIPPED))
+                if renamed_count or failed_count:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    failed = f", {failed_count} failed" if failed_count else ""
+                    reporter.message(f"Batch of {len(batch)} new files: {renamed_count} renamed{failed} in {elapsed:.1f}ms")
+        except KeyboardInterrupt:
+            reporter.message("\nStopped watching.")
 
 
 def validate_directory(directory_path: str) -> Path:
@@ -99,20 +917,134 @@ def main() -> None:
     
     parser.add_argument(
         "directory",
+        nargs="?",
         type=validate_directory,
         help="Path to the directory containing files to rename"
     )
     
+    parser.add_argument(
+        "-r", "--recursive",
+        action="store_true",
+        help="Also rename files in all subdirectories"
+    )
+    
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Number of threads renaming concurrently, useful on network filesystems (default: 1)"
+    )
+    
+    parser.add_argument(
+        "-n", "--dry-run",
+        action="store_true",
+        help="Print the rename plan and its conflicts without renaming anything"
+    )
+    
+    parser.add_argument(
+        "--rules",
+        type=Path,
+        metavar="FILE",
+        help="Rename with the ordered match -> rewrite rules in FILE (.json, .toml or .yaml) "
+             "instead of replacing 'report_' with 'summary_'"
+    )
+    
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        metavar="PATH",
+        help="Record the plan and progress in PATH so the run can be resumed or rolled back"
+    )
+    
+    parser.add_argument(
+        "--report",
+        choices=REPORTERS,
+        default="console",
+        help="How to show results: a line per file (console), only totals (quiet), "
+             "a progress bar (progress) or JSON lines on stdout (json) (default: console)"
+    )
+    
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After renaming, keep watching the directory and rename new files as they land"
+    )
+    
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        metavar="SECONDS",
+        help=f"With --watch, quiet time that closes a batch of new files (default: {DEFAULT_DEBOUNCE:g})"
+    )
+    
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="With --watch, poll the directory instead of using inotify"
+    )
+    
+    recovery = parser.add_mutually_exclusive_group()
+    recovery.add_argument(
+        "--resume",
+        type=Path,
+        metavar="JOURNAL",
+        help="Finish the interrupted run recorded in JOURNAL"
+    )
+    recovery.add_argument(
+        "--rollback",
+        type=Path,
+        metavar="JOURNAL",
+        help="Restore the original names of the run recorded in JOURNAL"
+    )
+    
     # Parse command-line arguments
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.debounce < 0:
+        parser.error("--debounce must not be negative")
+    if args.watch and (args.dry_run or args.journal or args.resume or args.rollback):
+        parser.error("--watch cannot be combined with --dry-run, --journal, --resume or --rollback")
+    
+    reporter = make_reporter(args.report)
+    
+    if args.resume or args.rollback:
+        try:
+            resume_from_journal(args.resume or args.rollback, args.jobs, bool(args.rollback), reporter)
+        except (OSError, ValueError) as e:
+            print(f"Error reading journal: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if args.directory is None:
+        parser.error("a directory is required unless --resume or --rollback is given")
+    
+    if args.rules is not None:
+        try:
+            rules = load_rules(args.rules)
+        except (OSError, ValueError) as e:
+            print(f"Error loading rules: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        rules = RuleSet.from_prefix("report_", "summary_")
     
-    print(f"Processing directory: {args.directory}")
-    print("Looking for .txt files with 'report_' prefix...")
-    print("-" * 50)
+    reporter.message(f"Processing directory: {args.directory}")
+    if args.rules is not None:
+        reporter.message(f"Looking for {rules.suffix} files matching {len(rules.rules)} rules from {args.rules}...")
+    else:
+        reporter.message("Looking for .txt files with 'report_' prefix...")
+    reporter.message("-" * 50)
     
     # Execute the renaming process
-    rename_files_with_prefix(args.directory)
+    if args.watch:
+        watch_and_rename(args.directory, rules, args.recursive, args.jobs, args.debounce, args.poll, reporter)
+        return
+    try:
+        rename_files(args.directory, rules, args.recursive, args.jobs, args.dry_run, args.journal, reporter)
+    except FileExistsError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
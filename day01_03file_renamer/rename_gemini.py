@@ -9,18 +9,27 @@ def rename_files(directory: Path) -> None:
     Args:
         directory: The path to the directory containing the files.
     """
-    # Find all .txt files in the specified directory
-    for file_path in directory.glob('*.txt'):
-        if file_path.is_file() and file_path.name.startswith('report_'):
-            # Construct the new file name
-            new_name = file_path.name.replace('report_', 'summary_', 1)
-            new_file_path = file_path.with_name(new_name)
-
-            # Rename the file
-            os.rename(file_path, new_file_path)
-
-            # Print the renaming information
-            print(f"Renamed: '{file_path.name}' to '{new_name}'")
+    # Find all .txt files in the specified directory; read the listing first so
+    # renames do not race with the scan, and use the file type cached by scandir
+    with os.scandir(directory) as entries:
+        names = sorted(entry.name for entry in entries
+                       if entry.name.endswith('.txt') and entry.name.startswith('report_') and entry.is_file())
+
+    for name in names:
+        # Construct the new file name
+        new_name = name.replace('report_', 'summary_', 1)
+        new_path = os.path.join(directory, new_name)
+
+        # os.rename silently replaces an existing file on POSIX, so never rename onto one
+        if os.path.lexists(new_path):
+            print(f"Skipped: '{name}', '{new_name}' already exists")
+            continue
+
+        # Rename the file
+        os.rename(os.path.join(directory, name), new_path)
+
+        # Print the renaming information
+        print(f"Renamed: '{name}' to '{new_name}'")
 
 def main():
     """
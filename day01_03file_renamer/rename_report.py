@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Rename Report
+
+Structured results of the renamer and the reporters that present them.
+
+Every rename, conflict and failure is a RenameResult record. The library
+functions in rename_claudecode return them and hand each one to a reporter as
+it is produced: ConsoleReporter prints the familiar per-file lines,
+QuietReporter only the totals, ProgressReporter a progress bar and
+JsonLinesReporter one JSON object per file for other programs. The base
+Reporter shows nothing, which is the default and fastest choice for library
+use.
+"""
+
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, TextIO
+
+
+# Result statuses
+RENAMED = "renamed"
+FAILED = "failed"
+SKIPPED = "skipped"
+CONFLICT = "conflict"
+PLANNED = "planned"
+
+# Names accepted by make_reporter, also the choices of the CLI's --report
+REPORTERS = ("console", "quiet", "progress", "json")
+
+# Minimum seconds between two redraws of the progress bar
+PROGRESS_INTERVAL = 0.1
+
+
+class RenameResult:
+    """
+    Outcome of one planned rename.
+
+    Slotted, since a large run creates one per file.
+
+    Attributes:
+        old: Path the file had
+        new: Path the file was (or would be) renamed to
+        status: One of RENAMED, FAILED, SKIPPED (an earlier rename of its chain
+            failed), CONFLICT (rejected while planning) or PLANNED (dry run)
+        error: Error message or conflict reason, None on success
+        elapsed: Seconds spent in the rename call, 0.0 if none was made
+    """
+    __slots__ = ("old", "new", "status", "error", "elapsed")
+
+    def __init__(self, old: str, new: str, status: str, error: Optional[str] = None, elapsed: float = 0.0) -> None:
+        self.old = old
+        self.new = new
+        self.status = status
+        self.error = error
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return (f"RenameResult(old={self.old!r}, new={self.new!r}, status={self.status!r}, "
+                f"error={self.error!r}, elapsed={self.elapsed!r})")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the result as a plain dictionary, e.g. for JSON."""
+        return {"old": self.old, "new": self.new, "status": self.status, "error": self.error,
+                "elapsed": self.elapsed}
+
+
+@dataclass
+class RenameSummary:
+    """All results of a run, with what it scanned and how long it took."""
+    root: str
+    results: List[RenameResult] = field(default_factory=list)
+    scanned: int = 0
+    elapsed: float = 0.0
+    suffix: str = ".txt"
+    dry_run: bool = False
+    undo: bool = False
+
+    def count(self, status: str) -> int:
+        """Return the number of results with the given status."""
+        return sum(1 for result in self.results if result.status == status)
+
+
+def relative_label(path: str, base: str) -> str:
+    """Return ``path`` relative to ``base`` when it lies below it, else unchanged."""
+    prefix = base.rstrip(os.sep) + os.sep
+    return path[len(prefix):] if path.startswith(prefix) else path
+
+
+class Reporter:
+    """
+    Base reporter; every hook does nothing.
+
+    Subclasses override the hooks they need. ``message`` receives the
+    human-readable notes of a run, such as headers and watch batches.
+    """
+
+    def start(self, root: str, total: int) -> None:
+        """Called once the plan is known, before the first result."""
+
+    def result(self, result: RenameResult) -> None:
+        """Called for each result, in plan order."""
+
+    def finish(self, summary: RenameSummary) -> None:
+        """Called at the end of a run."""
+
+    def message(self, text: str) -> None:
+        """Show a note about the run."""
+
+
+class QuietReporter(Reporter):
+    """Print only the notes and totals of a run."""
+
+    def message(self, text: str) -> None:
+        print(text)
+
+    def finish(self, summary: RenameSummary) -> None:
+        failed = summary.count(FAILED) + summary.count(SKIPPED)
+        conflicts = summary.count(CONFLICT)
+        if summary.dry_run:
+            print(f"\nTotal files to rename: {summary.count(PLANNED)}")
+        else:
+            print(f"\nTotal files {'restored' if summary.undo else 'renamed'}: {summary.count(RENAMED)}")
+        if failed:
+            print(f"Total files failed: {failed}")
+        if conflicts:
+            print(f"Total conflicts: {conflicts}")
+        if summary.scanned and not summary.dry_run:
+            print(f"Scanned {summary.scanned} {summary.suffix} files in {summary.elapsed:.2f}s "
+                  f"({summary.scanned / max(summary.elapsed, 1e-9):.0f} files/s)")
+
+
+class ConsoleReporter(QuietReporter):
+    """Print one line per file, then the totals."""
+
+    def __init__(self) -> None:
+        self._root = ""
+
+    def start(self, root: str, total: int) -> None:
+        self._root = root
+
+    def result(self, result: RenameResult) -> None:
+        old_label = relative_label(result.old, self._root)
+        new_dir, _, new_label = result.new.rpartition(os.sep)
+        if result.status == CONFLICT or new_dir != result.old.rpartition(os.sep)[0]:
+            new_label = relative_label(result.new, self._root)
+        if result.status == RENAMED:
+            print(f"Renamed: '{old_label}' -> '{new_label}'")
+        elif result.status == PLANNED:
+            print(f"Would rename: '{old_label}' -> '{relative_label(result.new, self._root)}'")
+        elif result.status == CONFLICT:
+            print(f"Skipped '{old_label}' -> '{new_label}': {result.error}")
+        else:
+            print(f"Error renaming '{old_label}': {result.error}")
+
+
+class ProgressReporter(QuietReporter):
+    """Draw a progress bar on stderr, then print the totals."""
+
+    def __init__(self, stream: Optional[TextIO] = None, width: int = 30) -> None:
+        self.stream = stream if stream is not None else sys.stderr
+        self.width = width
+        self._total = 0
+        self._done = 0
+        self._failed = 0
+        self._drawn_at = 0.0
+
+    def start(self, root: str, total: int) -> None:
+        self._total = total
+        self._done = 0
+        self._failed = 0
+        self._draw()
+
+    def result(self, result: RenameResult) -> None:
+        if result.status == CONFLICT:
+            return
+        self._done += 1
+        if result.status in (FAILED, SKIPPED):
+            self._failed += 1
+        if time.monotonic() - self._drawn_at >= PROGRESS_INTERVAL:
+            self._draw()
+
+    def finish(self, summary: RenameSummary) -> None:
+        if self._total:
+            self._draw()
+            self.stream.write("\n")
+            self.stream.flush()
+        super().finish(summary)
+
+    def _draw(self) -> None:
+        self._drawn_at = time.monotonic()
+        filled = self.width * self._done // self._total if self._total else self.width
+        failed = f", {self._failed} failed" if self._failed else ""
+        self.stream.write(f"\r[{'#' * filled}{'.' * (self.width - filled)}] {self._done}/{self._total}{failed}")
+        self.stream.flush()
+
+
+class JsonLinesReporter(Reporter):
+    """
+    Write one JSON object per result, then one ``{"summary": {...}}`` object.
+
+    Notes go to stderr so the stream stays machine-readable.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        self.stream = stream if stream is not None else sys.stdout
+
+    def result(self, result: RenameResult) -> None:
+        self.stream.write(json.dumps(result.as_dict(), ensure_ascii=False) + "\n")
+
+    def finish(self, summary: RenameSummary) -> None:
+        totals = {status: summary.count(status) for status in (RENAMED, FAILED, SKIPPED, CONFLICT, PLANNED)}
+        totals.update(scanned=summary.scanned, elapsed=round(summary.elapsed, 6))
+        self.stream.write(json.dumps({"summary": totals}) + "\n")
+        self.stream.flush()
+
+    def message(self, text: str) -> None:
+        print(text, file=sys.stderr)
+
+
+def make_reporter(name: str) -> Reporter:
+    """
+    Create a reporter by name.
+
+    Args:
+        name: One of REPORTERS
+
+    Returns:
+        The reporter
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == "console":
+        return ConsoleReporter()
+    if name == "quiet":
+        return QuietReporter()
+    if name == "progress":
+        return ProgressReporter()
+    if name == "json":
+        return JsonLinesReporter()
+    raise ValueError(f"Unknown reporter: {name} (choose from {', '.join(REPORTERS)})")
@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+Rename Rules
+
+Ordered match -> rewrite rules for the file renamer, loaded from a JSON, TOML or
+YAML file and compiled once into a combined matcher.
+
+A rule matches a file name either by a literal ``prefix`` or by a regular
+expression ``match`` (which must match the whole name). The first rule in file
+order that matches wins. Its result is built from ``replace`` (a new prefix for
+prefix rules) or from a ``rewrite`` template, then optionally case-normalized.
+Rewrites may contain '/' to move the file into subdirectories, which are
+created as needed.
+
+Example (TOML):
+
+    suffix = ".txt"
+
+    [[rules]]
+    match = 'report_(?P<y>\\d{4})_(?P<m>\\d{2})_(?P<d>\\d{2})\\.txt'
+    rewrite = "{y}/{m}/{d}/summary.txt"
+
+    [[rules]]
+    prefix = "report_"
+    replace = "summary_"
+    case = "lower"
+
+Template fields: named groups, numbered groups ({0} is the first group),
+{name} (whole file name), {stem}, {ext} (with the dot), {rest} (the name after
+a prefix rule's prefix) and {mtime} (modification time as a datetime, e.g.
+{mtime:%Y/%m/%d}; only read for rules that use it).
+"""
+
+import datetime
+import json
+import os
+import re
+import string
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Set, Tuple
+
+
+# Suffix scanned for when a rules file does not set one
+DEFAULT_SUFFIX = ".txt"
+
+# Values accepted for a rule's "case" key
+CASE_MODES = ("lower", "upper")
+
+# Key under which a prefix trie node keeps the rules ending there; never a name character
+_RULES_KEY = ""
+
+# Characters that end the literal lead of a regular expression
+_REGEX_METACHARACTERS = set(".^$*+?{}[]\\|()")
+
+# Template fields every rule provides, besides its capture groups
+_BASE_FIELDS = {"name", "stem", "ext", "mtime"}
+
+# Constructs that refer to groups by number and so break when expressions are combined
+_NUMBERED_GROUP_REFERENCE = re.compile(r"\\[1-9]|\(\?\(\d")
+
+
+@dataclass
+class RenameRule:
+    """One compiled match -> rewrite rule."""
+    index: int
+    prefix: Optional[str] = None
+    pattern: Optional[Pattern[str]] = None
+    replace: Optional[str] = None
+    template: Optional[str] = None
+    case: Optional[str] = None
+    uses_mtime: bool = False
+
+    def apply(self, name: str, dir_path: str, match: Optional[re.Match] = None) -> str:
+        """
+        Build the new relative path for a name this rule matched.
+
+        Args:
+            name: File name that matched
+            dir_path: Directory containing the file
+            match: Regular expression match, for ``match`` rules
+
+        Returns:
+            New path relative to the file's directory, using '/' separators
+        """
+        if self.template is None:
+            result = self.replace + name[len(self.prefix):]
+        else:
+            stem, ext = os.path.splitext(name)
+            fields: Dict[str, Any] = {"name": name, "stem": stem, "ext": ext}
+            if self.prefix is not None:
+                fields["rest"] = name[len(self.prefix):]
+            if self.uses_mtime:
+                fields["mtime"] = datetime.datetime.fromtimestamp(os.stat(os.path.join(dir_path, name)).st_mtime)
+            groups: Tuple[Any, ...] = ()
+            if match is not None:
+                groups = match.groups()
+                fields.update(match.groupdict())
+            result = self.template.format(*groups, **fields)
+
+        if self.case == "lower":
+            return result.lower()
+        if self.case == "upper":
+            return result.upper()
+        return result
+
+
+class _LiteralIndex:
+    """
+    Aho-Corasick automaton over the literals that rules require somewhere in a name.
+
+    One pass over a name reports every rule whose literal it contains, in
+    time bounded by the name's length whatever the number of literals.
+    """
+
+    def __init__(self, literals: List[Tuple[str, int]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[List[int]] = [[]]
+        for literal, rule_id in literals:
+            state = 0
+            for char in literal:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(rule_id)
+
+        # Breadth-first: each state falls back to its longest proper suffix in the automaton
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+                queue.append(next_state)
+
+    def search(self, text: str) -> List[int]:
+        """Return the ids of the rules whose literal occurs in ``text``."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found: List[int] = []
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.extend(outputs[state])
+        return found
+
+
+class RuleSet:
+    """
+    Ordered rename rules compiled into a single matcher.
+
+    Prefix rules, and regular expressions that start with a literal lead, are
+    indexed in a prefix trie: one walk along the name finds every rule whose
+    prefix it has, in time bounded by the longest prefix rather than the
+    number of rules. Other expressions that require some literal text, such
+    as ``.*_draft\\.txt``, are indexed by that literal in an Aho-Corasick
+    automaton, which finds every literal in a name in one pass. Only those
+    candidates' expressions are tried, so throughput stays flat as rules are
+    added. Expressions without any required literal are combined into one
+    alternation and checked in a single match call; the few that cannot be
+    combined, such as those with numbered backreferences, are tried on every
+    name.
+    """
+
+    def __init__(self, rules: List[RenameRule], suffix: str = DEFAULT_SUFFIX) -> None:
+        self.rules = rules
+        self.suffix = suffix
+        # Nested dicts rather than node objects keep the per-character walk cheap
+        self._trie: Dict[str, Any] = {}
+        self._always: List[int] = []
+        literals = []
+        alternatives = []
+        for rule in rules:
+            lead = rule.prefix if rule.pattern is None else _literal_lead(rule.pattern)
+            if lead:
+                node = self._trie
+                for char in lead:
+                    node = node.setdefault(char, {})
+                node.setdefault(_RULES_KEY, []).append(rule.index)
+                continue
+            literal = _required_literal(rule.pattern)
+            if literal:
+                literals.append((literal, rule.index))
+                continue
+            # Wrapping each expression in a named group tells which alternative matched
+            alternative = _combinable(rule)
+            if alternative is None:
+                self._always.append(rule.index)
+            else:
+                alternatives.append(alternative)
+
+        self._literals = _LiteralIndex(literals) if literals else None
+        self._floating: Optional[Pattern[str]] = re.compile("|".join(alternatives)) if alternatives else None
+
+    @classmethod
+    def from_prefix(cls, old_prefix: str, new_prefix: str, suffix: str = DEFAULT_SUFFIX) -> "RuleSet":
+        """
+        Build the single-rule set equivalent to a plain prefix rename.
+
+        Args:
+            old_prefix: The prefix to be replaced
+            new_prefix: The prefix to replace with
+            suffix: Only file names ending with this suffix are renamed
+
+        Returns:
+            Compiled rule set
+        """
+        return cls([RenameRule(0, prefix=old_prefix, replace=new_prefix)], suffix)
+
+    def rewrite(self, name: str, dir_path: str = "") -> Optional[str]:
+        """
+        Apply the first matching rule to a file name.
+
+        Args:
+            name: File name to rename
+            dir_path: Directory containing the file, for {mtime}
+
+        Returns:
+            New path relative to the file's directory, or None if no rule matches
+        """
+        candidates = list(self._always)
+        node = self._trie
+        for char in name:
+            node = node.get(char)
+            if node is None:
+                break
+            if _RULES_KEY in node:
+                candidates.extend(node[_RULES_KEY])
+        if self._literals is not None:
+            # A literal occurring twice reports its rule twice; trying it again is harmless
+            candidates.extend(self._literals.search(name))
+
+        floating_match = self._floating.fullmatch(name) if self._floating is not None else None
+        floating_id = int(floating_match.lastgroup[5:]) if floating_match is not None else len(self.rules)
+
+        if len(candidates) > 1:
+            candidates.sort()
+        for rule_id in candidates:
+            if rule_id > floating_id:
+                break
+            rule = self.rules[rule_id]
+            if rule.pattern is None:
+                return rule.apply(name, dir_path)
+            match = rule.pattern.fullmatch(name)
+            if match is not None:
+                return rule.apply(name, dir_path, match)
+
+        if floating_match is None:
+            return None
+        rule = self.rules[floating_id]
+        # Re-match on the rule's own expression to get its groups under their own names
+        return rule.apply(name, dir_path, rule.pattern.fullmatch(name))
+
+
+def _literal_lead(pattern: Pattern[str]) -> str:
+    """
+    Return the literal text every match of ``pattern`` must start with.
+
+    Conservative: any alternation, flag or escape ends the lead, and a
+    character followed by a quantifier is not part of it.
+    """
+    source = pattern.pattern
+    if pattern.flags & (re.IGNORECASE | re.VERBOSE) or "|" in source:
+        return ""
+    if source.startswith("^"):
+        source = source[1:]
+    lead = []
+    for char in source:
+        if char in _REGEX_METACHARACTERS:
+            if char in "*?{" and lead:
+                lead.pop()
+            break
+        lead.append(char)
+    return "".join(lead)
+
+
+def _required_literal(pattern: Pattern[str]) -> str:
+    """
+    Return the longest literal text every match of ``pattern`` must contain.
+
+    Only the top level of the expression is inspected: groups, classes,
+    escapes other than escaped punctuation, and characters made optional by
+    a quantifier all break the literal. An expression with a top-level
+    alternation has none.
+    """
+    if pattern.flags & (re.IGNORECASE | re.VERBOSE):
+        return ""
+    source = pattern.pattern
+    # One entry per top-level atom: its literal character, or None for anything else
+    atoms: List[Optional[str]] = []
+    position = 0
+    while position < len(source):
+        char = source[position]
+        if char == "\\":
+            escaped = source[position + 1:position + 2]
+            atoms.append(escaped if escaped and not escaped.isalnum() else None)
+            position += 2
+        elif char in "([":
+            position = _skip_group(source, position)
+            atoms.append(None)
+        elif char in "*?{+":
+            if char == "{":
+                position = source.find("}", position)
+                if position < 0:
+                    return ""
+            # The repeated atom is optional, except after '+' where only what follows is unknown
+            if char != "+" and atoms:
+                atoms[-1] = None
+            atoms.append(None)
+            position += 1
+            if source[position:position + 1] in ("?", "+"):  # lazy or possessive
+                position += 1
+        elif char == "|":
+            return ""
+        elif char in _REGEX_METACHARACTERS:
+            atoms.append(None)
+            position += 1
+        else:
+            atoms.append(char)
+            position += 1
+
+    best = ""
+    run: List[str] = []
+    for atom in atoms + [None]:
+        if atom is None:
+            if len(run) > len(best):
+                best = "".join(run)
+            run = []
+        else:
+            run.append(atom)
+    return best
+
+
+def _skip_group(source: str, position: int) -> int:
+    """Return the position just past the group or class starting at ``position``."""
+    depth = 0
+    in_class = False
+    while position < len(source):
+        char = source[position]
+        if char == "\\":
+            position += 2
+            continue
+        if in_class:
+            # A ']' right after '[' or '[^' is a literal member of the class
+            if char == "]" and source[position - 1] != "[" and source[position - 2:position] != "[^":
+                in_class = False
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if depth == 0 and not in_class:
+            return position + 1
+        position += 1
+    return position
+
+
+def _combinable(rule: RenameRule) -> Optional[str]:
+    """
+    Return the rule's expression as a named alternative of the combined expression.
+
+    Named groups are renamed so several rules can use the same names. Returns
+    None for expressions that refer to groups by number or carry global
+    inline flags, which would change meaning or fail inside the alternation.
+    """
+    source = rule.pattern.pattern
+    if _NUMBERED_GROUP_REFERENCE.search(source):
+        return None
+    if rule.pattern.flags & re.IGNORECASE:
+        source = f"(?i:{source})"
+    source = re.sub(r"\(\?P([<=])(\w+)", lambda m: f"(?P{m.group(1)}_r{rule.index}_{m.group(2)}", source)
+    alternative = f"(?P<_rule{rule.index}>{source})"
+    try:
+        re.compile(alternative)
+    except re.error:
+        return None
+    return alternative
+
+
+def compile_rules(spec: Any) -> RuleSet:
+    """
+    Compile a parsed rules document.
+
+    Args:
+        spec: Either a list of rule mappings or a mapping with a ``rules``
+            list and an optional ``suffix``
+
+    Returns:
+        Compiled rule set
+
+    Raises:
+        ValueError: If a rule is malformed
+    """
+    suffix = DEFAULT_SUFFIX
+    if isinstance(spec, dict):
+        suffix = spec.get("suffix", DEFAULT_SUFFIX)
+        spec = spec.get("rules")
+    if not isinstance(spec, list) or not spec:
+        raise ValueError("Rules file must contain a non-empty list of rules")
+    if not isinstance(suffix, str):
+        raise ValueError("suffix must be a string")
+    return RuleSet([_compile_rule(index, raw) for index, raw in enumerate(spec)], suffix)
+
+
+def _compile_rule(index: int, raw: Any) -> RenameRule:
+    """Validate and compile one rule mapping."""
+    where = f"Rule {index + 1}"
+    if not isinstance(raw, dict):
+        raise ValueError(f"{where}: must be a mapping")
+    unknown = set(raw) - {"prefix", "match", "ignore_case", "replace", "rewrite", "case"}
+    if unknown:
+        raise ValueError(f"{where}: unknown keys: {', '.join(sorted(unknown))}")
+    if ("prefix" in raw) == ("match" in raw):
+        raise ValueError(f"{where}: needs exactly one of 'prefix' or 'match'")
+    if "replace" in raw and "rewrite" in raw:
+        raise ValueError(f"{where}: 'replace' and 'rewrite' cannot be combined")
+    if "replace" in raw and "prefix" not in raw:
+        raise ValueError(f"{where}: 'replace' only applies to 'prefix' rules")
+    if raw.get("case") not in (None,) + CASE_MODES:
+        raise ValueError(f"{where}: case must be one of {', '.join(CASE_MODES)}")
+
+    rule = RenameRule(index, case=raw.get("case"))
+    fields = set(_BASE_FIELDS)
+    group_count = 0
+    if "prefix" in raw:
+        rule.prefix = str(raw["prefix"])
+        if not rule.prefix:
+            raise ValueError(f"{where}: prefix must not be empty")
+        fields.add("rest")
+    else:
+        try:
+            rule.pattern = re.compile(str(raw["match"]), re.IGNORECASE if raw.get("ignore_case") else 0)
+        except re.error as e:
+            raise ValueError(f"{where}: invalid match expression: {e}")
+        fields.update(rule.pattern.groupindex)
+        group_count = rule.pattern.groups
+
+    if "replace" in raw:
+        rule.replace = str(raw["replace"])
+    else:
+        rule.template = str(raw.get("rewrite", "{name}"))
+        rule.uses_mtime = _check_template(where, rule.template, fields, group_count)
+    return rule
+
+
+def _check_template(where: str, template: str, fields: Set[str], group_count: int) -> bool:
+    """
+    Check that a rewrite template only uses known fields and stays below its directory.
+
+    Returns:
+        Whether the template uses {mtime}
+    """
+    if template.startswith("/") or ".." in template.split("/"):
+        raise ValueError(f"{where}: rewrite must stay inside the file's directory")
+    uses_mtime = False
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError as e:
+        raise ValueError(f"{where}: invalid rewrite template: {e}")
+    for _, field_name, _, _ in parsed:
+        if field_name is None:
+            continue
+        base = re.split(r"[.\[]", field_name, maxsplit=1)[0]
+        if base == "":
+            raise ValueError(f"{where}: use numbered fields such as {{0}} instead of {{}}")
+        if base.isdigit():
+            if int(base) >= group_count:
+                raise ValueError(f"{where}: rewrite uses group {base} but the expression has {group_count}")
+        elif base not in fields:
+            raise ValueError(f"{where}: rewrite uses unknown field '{base}'")
+        uses_mtime = uses_mtime or base == "mtime"
+    return uses_mtime
+
+
+def load_rules(path: Path) -> RuleSet:
+    """
+    Load and compile a rules file; the format follows the extension.
+
+    JSON and TOML are read with the standard library (TOML needs Python 3.11
+    or the tomli package); YAML needs PyYAML.
+
+    Args:
+        path: Path to a .json, .toml, .yaml or .yml file
+
+    Returns:
+        Compiled rule set
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file or one of its rules is invalid
+    """
+    path = Path(path)
+    extension = path.suffix.lower()
+    if extension == ".json":
+        parse = json.loads
+    elif extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("Reading TOML rules needs Python 3.11+ or the tomli package")
+        parse = tomllib.loads
+    elif extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Reading YAML rules needs the PyYAML package")
+        parse = yaml.safe_load
+    else:
+        raise ValueError(f"Unsupported rules file type: {path.suffix} (use .json, .toml or .yaml)")
+
+    text = path.read_text(encoding="utf-8")
+    try:
+        spec = parse(text)
+    except Exception as e:  # every parser raises its own error type
+        raise ValueError(f"Cannot parse rules file {path}: {e}")
+    return compile_rules(spec)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Rename Watch
+
+Directory watchers for the renamer's --watch mode. On Linux the kernel's
+inotify interface (used through ctypes, no extra package) reports files as
+soon as they are written or moved in; elsewhere, or when inotify is not
+available, the directory is polled.
+
+Both watchers yield batches of new file paths. Events are debounced: a batch
+is closed once the directory has been quiet for the debounce interval, or
+when it grows large or old enough, so a burst of thousands of files is
+handled in a few large batches instead of one rename pass per file.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Set
+
+from rename_report import Reporter
+
+
+# Default quiet time that closes a batch of events, in seconds
+DEFAULT_DEBOUNCE = 0.05
+
+# A batch is closed at this many paths, even while events keep arriving
+WATCH_BATCH_LIMIT = 4096
+
+# ...or once its first event is this old, in seconds
+WATCH_MAX_DELAY = 0.5
+
+# Seconds between two scans of the polling watcher
+POLL_INTERVAL = 1.0
+
+# inotify event flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Files are reported once written and closed, or moved in complete
+_FILE_EVENTS = IN_CLOSE_WRITE | IN_MOVED_TO
+_WATCH_MASK = _FILE_EVENTS | IN_CREATE | IN_MOVE_SELF | IN_ONLYDIR
+
+
+def _walk_directories(directory: str) -> Iterator[str]:
+    """Yield ``directory`` and every directory below it (symlinks are not followed)."""
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        yield current
+        try:
+            with os.scandir(current) as entries:
+                pending.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+
+
+def _list_files(directory: str, suffix: str) -> List[str]:
+    """Return the paths of the files in ``directory`` whose names end with ``suffix``."""
+    try:
+        with os.scandir(directory) as entries:
+            return [entry.path for entry in entries if entry.name.endswith(suffix) and entry.is_file()]
+    except OSError:
+        return []
+
+
+class InotifyWatcher:
+    """
+    Watch a directory (tree) with Linux inotify.
+
+    A watch is added on every directory. New subdirectories are watched as
+    they appear and their contents are reported, since files can land in them
+    before the watch is in place. If the kernel's event queue overflows, the
+    whole tree is reported again.
+    """
+
+    def __init__(self, directory: str, suffix: str = ".txt", recursive: bool = False,
+                 debounce: float = DEFAULT_DEBOUNCE) -> None:
+        """
+        Start watching.
+
+        Raises:
+            OSError: If inotify is not available or the directory cannot be watched
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.directory = os.path.abspath(directory)
+        self.suffix = suffix
+        self.recursive = recursive
+        self.debounce = debounce
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._directories: Dict[int, str] = {}
+        try:
+            for path in self._tree(self.directory):
+                self._add_watch(path)
+        except OSError:
+            self.close()
+            raise
+
+    def _tree(self, directory: str) -> Iterator[str]:
+        return _walk_directories(directory) if self.recursive else iter([directory])
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Cannot watch '{path}': {os.strerror(errno)}")
+        self._directories[wd] = path
+
+    def close(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "InotifyWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def batches(self) -> Iterator[List[str]]:
+        """
+        Yield debounced batches of paths of new or changed files, forever.
+
+        Paths are unique within a batch and in the order their events arrived.
+        """
+        while True:
+            batch: Dict[str, None] = {}
+            select.select([self._fd], [], [])
+            first_event = time.monotonic()
+            while True:
+                self._read_events(batch)
+                if len(batch) >= WATCH_BATCH_LIMIT:
+                    break
+                wait = min(self.debounce, first_event + WATCH_MAX_DELAY - time.monotonic())
+                if wait <= 0 or not select.select([self._fd], [], [], wait)[0]:
+                    break
+            if batch:
+                yield list(batch)
+
+    def _read_events(self, batch: Dict[str, None]) -> None:
+        data = os.read(self._fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_length].rstrip(b"\0"))
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: report everything, the caller skips what needs no rename
+                for directory in self._tree(self.directory):
+                    batch.update(dict.fromkeys(_list_files(directory, self.suffix)))
+                continue
+            directory = self._directories.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._directories[wd]
+                continue
+            if mask & IN_MOVE_SELF:
+                # Moved within the tree, its watch already follows the new path; otherwise drop it
+                if not os.path.isdir(directory):
+                    self._libc.inotify_rm_watch(self._fd, wd)
+                    del self._directories[wd]
+                continue
+
+            path = directory + os.sep + name
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    for subdirectory in _walk_directories(path):
+                        try:
+                            self._add_watch(subdirectory)
+                        except OSError:
+                            continue
+                        batch.update(dict.fromkeys(_list_files(subdirectory, self.suffix)))
+            elif mask & _FILE_EVENTS and name.endswith(self.suffix):
+                batch[path] = None
+
+
+class PollingWatcher:
+    """
+    Watch a directory (tree) by listing it at a fixed interval.
+
+    Used where inotify is not available. Each scan costs a full directory
+    listing, so new files are noticed within ``interval`` seconds.
+    """
+
+    def __init__(self, directory: str, suffix: str = ".txt", recursive: bool = False,
+                 interval: float = POLL_INTERVAL) -> None:
+        self.directory = os.path.abspath(directory)
+        self.suffix = suffix
+        self.recursive = recursive
+        self.interval = interval
+        self._known = self._scan()
+
+    def _scan(self) -> Set[str]:
+        directories = _walk_directories(self.directory) if self.recursive else [self.directory]
+        return {path for directory in directories for path in _list_files(directory, self.suffix)}
+
+    def close(self) -> None:
+        """Nothing to release; present for symmetry with InotifyWatcher."""
+
+    def __enter__(self) -> "PollingWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def batches(self) -> Iterator[List[str]]:
+        """Yield the paths of the files that appeared since the previous scan, forever."""
+        while True:
+            time.sleep(self.interval)
+            current = self._scan()
+            new_paths = current - self._known
+            self._known = current
+            if new_paths:
+                yield sorted(new_paths)
+
+
+def open_watcher(directory: str, suffix: str = ".txt", recursive: bool = False,
+                 debounce: float = DEFAULT_DEBOUNCE, poll: bool = False, reporter: Optional[Reporter] = None):
+    """
+    Open the best watcher available for a directory.
+
+    Args:
+        directory: Directory to watch
+        suffix: Only files whose names end with this suffix are reported
+        recursive: Also watch all subdirectories
+        debounce: Quiet time that closes a batch of inotify events, in seconds
+        poll: Use the polling watcher even where inotify is available
+        reporter: Shown a note when inotify is unavailable; by default nothing is shown
+
+    Returns:
+        An InotifyWatcher, or a PollingWatcher if inotify cannot be used
+    """
+    if not poll:
+        try:
+            return InotifyWatcher(directory, suffix, recursive, debounce)
+        except (OSError, AttributeError) as e:  # AttributeError: libc without inotify
+            if reporter is not None:
+                reporter.message(f"inotify is not available ({e}), polling every {POLL_INTERVAL:g}s instead")
+    return PollingWatcher(directory, suffix, recursive)
@@ -0,0 +1,32 @@
+"""Tests for watch mode of the file renamer."""
+
+import os
+from contextlib import contextmanager
+
+import rename_claudecode
+from rename_rules import compile_rules
+
+
+class FakeWatcher:
+    """Watcher that reports every file in the directory as one batch, once."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def batches(self):
+        yield sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory))
+        raise KeyboardInterrupt
+
+
+def test_watch_skips_renames_of_the_first_pass(tmp_path, monkeypatch):
+    (tmp_path / "a_1.txt").write_text("one")
+
+    @contextmanager
+    def open_watcher(directory, *args, **kwargs):
+        yield FakeWatcher(directory)
+
+    monkeypatch.setattr(rename_claudecode, "open_watcher", open_watcher)
+    rules = compile_rules({"rules": [{"prefix": "a", "replace": "aa"}]})
+    rename_claudecode.watch_and_rename(tmp_path, rules)
+
+    assert sorted(os.listdir(tmp_path)) == ["aa_1.txt"]
@@ -0,0 +1,15 @@
+"""
+Columnar Output for the CSV Converter
+Compatibility shim: the module now lives in the csv2json package at the
+repository root (csv2json/columnar.py).
+"""
+
+import sys
+from pathlib import Path
+
+try:
+    import csv2json  # noqa: F401
+except ImportError:  # not installed: use the package from this checkout
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from csv2json.columnar import *  # noqa: F401,F403
@@ -7,7 +7,8 @@ Automate using the five AI coding templates in this folder.
 Features:
 - List available templates
 - Build a prompt from one or more templates
-- Replace placeholder `[your task description here]`
+- Fill named placeholders such as `{{task}}` or `{{language}}`; the legacy
+  `[your task description here]` / `[此处描述你的任务]` placeholders mean `{{task}}`
 - Output to stdout or save/append to a file
 
 Usage examples:
@@ -20,26 +21,96 @@ Usage examples:
   - Combine templates 2 and 4, write to prompt.md:
       python prompt_cli.py -t 2 -t 4 -d "parse log files and summarize errors" -o prompt.md
 
+  - Fill further named placeholders:
+      python prompt_cli.py -t 1 -d "parse logs" --var language=Go --var constraints="no third-party packages"
+
   - Interactive mode (select templates and enter description):
       python prompt_cli.py --interactive
 
+  - Keep templates loaded in a server and query it (see prompt_server.py):
+      python prompt_cli.py --serve &
+      python prompt_cli.py --connect -t 2 -d "parse log files"
+
+  - Render every entry of a JSON Lines manifest into one JSONL file:
+      python prompt_cli.py --batch tasks.jsonl -o prompts.jsonl --workers 4
+
 Notes:
 - Templates are auto-discovered by pattern `template*.md` in the current folder.
 - The CLI extracts the English instruction block inside the first triple-backtick code fence.
 - If a template has no placeholder, nothing is replaced (still useful as-is).
+- Each batch manifest line is an object such as
+  `{"id": "t1", "templates": [2, "template4_exception_handling.md"], "desc": "..."}`;
+  `-t`/`-d` provide defaults for missing keys, and an optional `"vars"` object of strings
+  fills named placeholders (merged over `--var`). Each output line holds the
+  entry's id (its line number if absent) and either `prompt` or `error`.
+  With `--shards N`, `-o` names a directory that receives N shard files.
+- Parsed titles and English blocks are kept in `.prompt_index.json` next to the
+  templates, keyed by file path, mtime and size; only new or changed templates
+  are re-read. Pass `--no-index` to parse every template afresh.
 """
 
 from __future__ import annotations
 
 import argparse
+import fnmatch
+import json
+import os
 import re
 import sys
-from dataclasses import dataclass
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
 
 
 TEMPLATE_GLOB = "template*.md"
+INDEX_FILE = ".prompt_index.json"
+INDEX_VERSION = 2
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}|\[your task description here\]|\[此处描述你的任务\]")
+BATCH_CHUNK_SIZE = 2000  # manifest lines rendered per task
+BATCH_WRITE_BUFFER = 1 << 20
+
+
+class CompiledTemplate:
+    """A template tokenized once into literal and slot segments.
+
+    ``render`` fills every slot in a single pass and joins the segments, so its
+    cost is linear in the output size. Values are inserted verbatim, never
+    scanned for further placeholders. A slot without a value keeps its
+    original placeholder text.
+    """
+
+    __slots__ = ("source", "slots", "_parts", "_slot_positions")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        parts: List[str] = []
+        positions: List[Tuple[int, str]] = []
+        last = 0
+        for m in PLACEHOLDER_RE.finditer(source):
+            parts.append(source[last:m.start()])
+            positions.append((len(parts), m.group(1) or "task"))
+            parts.append(m.group(0))
+            last = m.end()
+        parts.append(source[last:])
+        self._parts = tuple(parts)
+        self._slot_positions = tuple(positions)
+        self.slots = tuple(dict.fromkeys(name for _, name in positions))
+
+    def render(self, values: Dict[str, str]) -> str:
+        if not self._slot_positions or not values:
+            return self.source
+        parts = list(self._parts)
+        for pos, name in self._slot_positions:
+            value = values.get(name)
+            if value:
+                parts[pos] = value
+        return "".join(parts)
 
 
 @dataclass
@@ -48,24 +119,98 @@ class TemplateInfo:
     path: Path
     title: str
     english_block: str
-
-
-def find_templates(base: Path) -> List[TemplateInfo]:
-    files = sorted(base.glob(TEMPLATE_GLOB), key=_template_sort_key)
+    _compiled: Optional[CompiledTemplate] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def compiled(self) -> CompiledTemplate:
+        # Compiled on first use and kept for every later render
+        if self._compiled is None:
+            self._compiled = CompiledTemplate(self.english_block)
+        return self._compiled
+
+
+def find_templates(base: Path, use_index: bool = True) -> List[TemplateInfo]:
+    """Discover and parse the templates in ``base``.
+
+    With ``use_index``, templates whose path, mtime and size match the index file
+    in ``base`` are served from it without being read; the index is then updated
+    for new, changed and removed templates.
+    """
+    stats = {}
+    with os.scandir(base) as entries:
+        for entry in entries:
+            if fnmatch.fnmatchcase(entry.name, TEMPLATE_GLOB) and entry.is_file():
+                st = entry.stat()
+                stats[entry.name] = (st.st_mtime_ns, st.st_size)
+
+    index_path = base / INDEX_FILE
+    cached = _load_index(index_path) if use_index else {}
+    fresh = {}
     templates: List[TemplateInfo] = []
-    for i, p in enumerate(files, start=1):
-        text = p.read_text(encoding="utf-8", errors="ignore")
-        title = _extract_title(text) or p.stem
-        english = _extract_first_code_block(text) or text.strip()
-        templates.append(TemplateInfo(index=i, path=p, title=title, english_block=english.strip()))
+    key_prefix = os.path.join(os.path.abspath(base), "")
+    for i, name in enumerate(sorted(stats, key=_template_name_sort_key), start=1):
+        p = base / name
+        key = key_prefix + name
+        entry = cached.get(key)
+        if entry is None or entry[:2] != stats[name]:
+            entry = stats[name] + _parse_template(p)
+        fresh[key] = entry
+        templates.append(TemplateInfo(index=i, path=p, title=entry[2], english_block=entry[3]))
+
+    if use_index and fresh != cached:
+        _save_index(index_path, fresh)
     return templates
 
 
-def _template_sort_key(p: Path) -> Tuple[int, str]:
-    m = re.search(r"template(\d+)", p.stem)
+def _parse_template(p: Path) -> Tuple[str, str]:
+    text = p.read_text(encoding="utf-8", errors="ignore")
+    title = _extract_title(text) or p.stem
+    english = _extract_first_code_block(text) or text.strip()
+    return title, english.strip()
+
+
+def _load_index(index_path: Path) -> dict:
+    # Entries map absolute path -> (mtime_ns, size, title, english_block). The
+    # index sits in the working directory, so it is plain JSON (never pickle,
+    # which would run code from whoever wrote the file) and every entry is
+    # checked; a malformed one is simply re-parsed
+    try:
+        with index_path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):  # missing, unreadable, truncated or not JSON: rebuild it
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    entries = data.get("templates")
+    if not isinstance(entries, dict):
+        return {}
+    return {
+        key: tuple(entry) for key, entry in entries.items()
+        if isinstance(entry, list) and len(entry) == 4
+        and all(type(v) is int for v in entry[:2]) and all(isinstance(v, str) for v in entry[2:])
+    }
+
+
+def _save_index(index_path: Path, templates: dict) -> None:
+    # Write-then-rename so a concurrent run never sees a half-written index;
+    # a read-only template folder simply goes without one
+    tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "templates": templates}, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
+def _template_name_sort_key(name: str) -> Tuple[int, str]:
+    m = re.search(r"template(\d+)", os.path.splitext(name)[0])
     if m:
-        return (int(m.group(1)), p.name)
-    return (9999, p.name)
+        return (int(m.group(1)), name)
+    return (9999, name)
 
 
 def _extract_title(text: str) -> Optional[str]:
@@ -98,9 +243,7 @@ def _extract_first_code_block(text: str) -> Optional[str]:
 def replace_placeholder(english: str, description: Optional[str]) -> str:
     if not description:
         return english
-    return english.replace("[your task description here]", description).replace(
-        "[此处描述你的任务]", description
-    )
+    return CompiledTemplate(english).render({"task": description})
 
 
 def combine_blocks(blocks: Iterable[str]) -> str:
@@ -108,17 +251,72 @@ def combine_blocks(blocks: Iterable[str]) -> str:
     return "\n\n".join(parts)
 
 
-def build_prompt(templates: List[TemplateInfo], indices: List[int], desc: Optional[str]) -> str:
+def build_prompt(
+    templates: List[TemplateInfo],
+    indices: List[int],
+    desc: Optional[str],
+    values: Optional[Dict[str, str]] = None,
+) -> str:
     selected = []
     max_index = len(templates)
     for idx in indices:
         if idx < 1 or idx > max_index:
             raise ValueError(f"Template index {idx} is out of range 1..{max_index}")
         selected.append(templates[idx - 1])
-    replaced = [replace_placeholder(t.english_block, desc) for t in selected]
+    values = dict(values or {})
+    if desc:
+        values["task"] = desc
+    replaced = [t.compiled.render(values) for t in selected]
     return combine_blocks(replaced)
 
 
+def parse_vars(items: Optional[List[str]]) -> Dict[str, str]:
+    values: Dict[str, str] = {}
+    for item in items or []:
+        name, sep, value = item.partition("=")
+        name = name.strip()
+        if not sep or not re.fullmatch(r"\w+", name):
+            raise ValueError(f"Invalid --var {item!r}, expected NAME=VALUE")
+        values[name] = value
+    return values
+
+
+def request_fields(
+    desc: object, values: object, default_vars: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[str], Dict[str, str]]:
+    """Check the "desc" and "vars" of a manifest entry or server request.
+
+    Returns the description and the vars merged over ``default_vars``; raises
+    ValueError unless ``desc`` is a string or null and ``values`` is null or an
+    object whose values are all strings.
+    """
+    if desc is not None and not isinstance(desc, str):
+        raise ValueError("\"desc\" must be a string")
+    if values is None:
+        return desc, dict(default_vars or {})
+    if not isinstance(values, dict):
+        raise ValueError("\"vars\" must be a JSON object")
+    bad = [str(k) for k, v in values.items() if not isinstance(v, str)]
+    if bad:
+        raise ValueError(f"\"vars\" values must be strings: {', '.join(bad)}")
+    return desc, {**(default_vars or {}), **{str(k): v for k, v in values.items()}}
+
+
+def template_refs(refs: object) -> Optional[List[Union[str, int]]]:
+    """Check the "templates" of a manifest entry or server request.
+
+    Returns the references as a list; raises ValueError unless ``refs`` is
+    null, a string or integer, or a list of strings and integers.
+    """
+    if refs is None or isinstance(refs, list):
+        items = refs or []
+    else:
+        items = [refs]
+    if any(isinstance(ref, bool) or not isinstance(ref, (str, int)) for ref in items):
+        raise ValueError("\"templates\" must be a template reference or a list of them")
+    return None if refs is None else items
+
+
 def interactive_select(templates: List[TemplateInfo]) -> Tuple[List[int], Optional[str]]:
     print("Available templates:")
     for t in templates:
@@ -134,19 +332,33 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p.add_argument("--list", action="store_true", help="List available templates and exit")
     p.add_argument("-t", "--templates", action="append", help="Template index or filename; can repeat")
     p.add_argument("-d", "--desc", help="Task description to replace placeholder")
+    p.add_argument("--var", action="append", metavar="NAME=VALUE", help="Fill the {{NAME}} placeholder; can repeat")
     p.add_argument("-o", "--out", help="Write output to file instead of stdout")
     p.add_argument("--append", action="store_true", help="Append to output file if it exists")
     p.add_argument("--interactive", action="store_true", help="Interactive selection mode")
+    p.add_argument("--no-index", action="store_true", help=f"Parse every template instead of using {INDEX_FILE}")
+    p.add_argument("--batch", metavar="MANIFEST", help="Render every entry of a JSON Lines manifest to JSONL")
+    p.add_argument("--shards", type=int, default=0, help="With --batch, split output into N files in the -o directory")
+    p.add_argument("--workers", type=int, default=1, help="With --batch, render in N processes")
+    p.add_argument("--serve", action="store_true", help="Serve list/build requests, reloading changed templates")
+    p.add_argument("--connect", action="store_true", help="Send --list or -t/-d/--var to a running --serve")
+    p.add_argument("--socket", help="Unix socket for --serve/--connect (default: .prompt_cli.sock)")
+    p.add_argument("--port", type=int, help="Use TCP on 127.0.0.1:PORT instead of a Unix socket")
     return p.parse_args(argv)
 
 
-def resolve_template_indices(arg_values: Optional[List[str]], templates: List[TemplateInfo]) -> List[int]:
+def resolve_template_indices(
+    arg_values: Optional[List[str]],
+    templates: List[TemplateInfo],
+    name_to_index: Optional[Dict[str, int]] = None,
+) -> List[int]:
     if not arg_values:
         return []
     indices: List[int] = []
-    name_to_index = {t.path.name.lower(): t.index for t in templates}
+    if name_to_index is None:
+        name_to_index = _name_to_index(templates)
     for v in arg_values:
-        v = v.strip()
+        v = str(v).strip()
         if v.isdigit():
             indices.append(int(v))
         else:
@@ -158,10 +370,156 @@ def resolve_template_indices(arg_values: Optional[List[str]], templates: List[Te
     return indices
 
 
+def _name_to_index(templates: List[TemplateInfo]) -> Dict[str, int]:
+    return {t.path.name.lower(): t.index for t in templates}
+
+
+# Per-process batch state, set once by _init_batch_worker so tasks carry only manifest lines
+_batch_templates: List[TemplateInfo] = []
+_batch_names: Dict[str, int] = {}
+_batch_defaults: Tuple[Optional[List[str]], Optional[str], Dict[str, str]] = (None, None, {})
+
+
+def _init_batch_worker(
+    templates: List[TemplateInfo],
+    default_templates: Optional[List[str]],
+    default_desc: Optional[str],
+    default_vars: Optional[Dict[str, str]] = None,
+) -> None:
+    global _batch_templates, _batch_names, _batch_defaults
+    _batch_templates = templates
+    for t in templates:
+        t.compiled  # compile every template once per process, not per entry
+    _batch_names = _name_to_index(templates)
+    _batch_defaults = (default_templates, default_desc, default_vars or {})
+
+
+def render_manifest_line(line_no: int, line: str) -> Tuple[str, bool]:
+    """Render one manifest line to one output JSON line; returns (json_line, ok)."""
+    default_templates, default_desc, default_vars = _batch_defaults
+    entry_id: object = line_no
+    try:
+        entry = json.loads(line)
+        if not isinstance(entry, dict):
+            raise ValueError("manifest entry must be a JSON object")
+        entry_id = entry.get("id", line_no)
+        refs = template_refs(entry.get("templates", default_templates))
+        indices = resolve_template_indices(refs, _batch_templates, _batch_names)
+        if not indices:
+            raise ValueError("no templates selected")
+        desc, values = request_fields(entry.get("desc", default_desc), entry.get("vars"), default_vars)
+        prompt = build_prompt(_batch_templates, indices, desc, values)
+    except ValueError as e:  # includes json.JSONDecodeError
+        return json.dumps({"id": entry_id, "error": str(e)}, ensure_ascii=False), False
+    return json.dumps({"id": entry_id, "prompt": prompt}, ensure_ascii=False), True
+
+
+def _render_chunk(chunk: List[Tuple[int, str]]) -> Tuple[str, int, int]:
+    lines = []
+    errors = 0
+    for line_no, line in chunk:
+        rendered, ok = render_manifest_line(line_no, line)
+        lines.append(rendered)
+        errors += not ok
+    return "\n".join(lines) + "\n", len(lines), errors
+
+
+def _read_manifest_chunks(f: TextIO, chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    numbered = ((n, line) for n, line in enumerate(f, start=1) if line.strip())
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _ordered_map(pool: ProcessPoolExecutor, fn, items: Iterable, window: int) -> Iterator:
+    # Like pool.map, but keeps at most ``window`` tasks in flight instead of
+    # reading the whole manifest up front
+    pending: deque = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def run_batch(
+    templates: List[TemplateInfo],
+    manifest: Path,
+    out: Optional[Path] = None,
+    shards: int = 0,
+    workers: int = 1,
+    default_templates: Optional[List[str]] = None,
+    default_desc: Optional[str] = None,
+    default_vars: Optional[Dict[str, str]] = None,
+) -> Tuple[int, int]:
+    """Render every manifest entry; returns (rendered, errors).
+
+    Output is JSON Lines in manifest order, written to ``out`` (stdout if None)
+    in large buffered writes. With ``shards``, ``out`` is a directory and chunk k
+    of the manifest goes to shard k % shards. With ``workers`` > 1, chunks are
+    rendered in worker processes that each hold their own copy of the templates.
+    """
+    if shards and out is None:
+        raise ValueError("--shards needs -o/--out naming a directory")
+    rendered = errors = 0
+    outputs: List[TextIO] = []
+    pool = None
+    try:
+        if shards:
+            out.mkdir(parents=True, exist_ok=True)
+            outputs = [
+                (out / f"prompts-{k:05d}.jsonl").open("w", encoding="utf-8", buffering=BATCH_WRITE_BUFFER)
+                for k in range(shards)
+            ]
+        elif out is not None:
+            outputs = [out.open("w", encoding="utf-8", buffering=BATCH_WRITE_BUFFER)]
+
+        init_args = (templates, default_templates, default_desc, default_vars)
+        with manifest.open(encoding="utf-8") as f:
+            chunks = _read_manifest_chunks(f, BATCH_CHUNK_SIZE)
+            if workers > 1:
+                # Only --batch uses processes, so other commands do not pay for the import
+                from concurrent.futures import ProcessPoolExecutor
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=init_args)
+                results = _ordered_map(pool, _render_chunk, chunks, workers * 2)
+            else:
+                _init_batch_worker(*init_args)
+                results = map(_render_chunk, chunks)
+            for k, (text, count, failed) in enumerate(results):
+                (outputs[k % len(outputs)] if outputs else sys.stdout).write(text)
+                rendered += count
+                errors += failed
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        for f in outputs:
+            f.close()
+    return rendered, errors
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     args = parse_args(argv)
+    try:
+        values = parse_vars(args.var)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
     base = Path.cwd()
-    templates = find_templates(base)
+    socket_path = Path(args.socket) if args.socket else None
+    if args.serve:
+        from prompt_server import run_server
+        try:
+            return run_server(base, socket_path, args.port, use_index=not args.no_index)
+        except OSError as e:
+            print(str(e), file=sys.stderr)
+            return 2
+    if args.connect:
+        return _run_client(args, socket_path, values)
+
+    templates = find_templates(base, use_index=not args.no_index)
     if not templates:
         print("No templates found (expected files like template1_*.md)", file=sys.stderr)
         return 2
@@ -171,6 +529,24 @@ def main(argv: Optional[List[str]] = None) -> int:
             print(f"{t.index}. {t.title}\n   -> {t.path.name}")
         return 0
 
+    if args.batch:
+        if args.shards < 0 or args.workers < 1:
+            print("--shards must be >= 0 and --workers >= 1", file=sys.stderr)
+            return 2
+        start = time.perf_counter()
+        try:
+            rendered, errors = run_batch(
+                templates, Path(args.batch), Path(args.out) if args.out else None,
+                args.shards, args.workers, args.templates, args.desc, values,
+            )
+        except (OSError, ValueError) as e:
+            print(str(e), file=sys.stderr)
+            return 2
+        elapsed = time.perf_counter() - start
+        target = args.out or "stdout"
+        print(f"Rendered {rendered} prompts ({errors} errors) to {target} in {elapsed:.2f}s", file=sys.stderr)
+        return 1 if errors else 0
+
     indices: List[int]
     desc: Optional[str] = args.desc
 
@@ -184,11 +560,38 @@ def main(argv: Optional[List[str]] = None) -> int:
         return 2
 
     try:
-        prompt = build_prompt(templates, indices, desc)
+        prompt = build_prompt(templates, indices, desc, values)
     except ValueError as e:
         print(str(e), file=sys.stderr)
         return 2
 
+    _write_prompt(prompt, args)
+    return 0
+
+
+def _run_client(args: argparse.Namespace, socket_path: Optional[Path], values: Dict[str, str]) -> int:
+    from prompt_server import PromptClient
+    try:
+        with PromptClient(socket_path, args.port) as client:
+            if args.list:
+                for t in client.list():
+                    print(f"{t['index']}. {t['title']}\n   -> {t['file']}")
+                return 0
+            if not args.templates:
+                print("No templates selected. Use -t to choose.", file=sys.stderr)
+                return 2
+            prompt = client.build(args.templates, args.desc, values)
+    except OSError as e:
+        print(f"Cannot reach prompt server: {e}", file=sys.stderr)
+        return 2
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    _write_prompt(prompt, args)
+    return 0
+
+
+def _write_prompt(prompt: str, args: argparse.Namespace) -> None:
     if args.out:
         out_path = Path(args.out)
         mode = "a" if args.append else "w"
@@ -201,8 +604,6 @@ def main(argv: Optional[List[str]] = None) -> int:
     else:
         print(prompt)
 
-    return 0
-
 
 if __name__ == "__main__":
     raise SystemExit(main())
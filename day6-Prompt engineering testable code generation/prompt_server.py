@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Prompt Template Server
+
+Long-running companion to prompt_cli.py. The server keeps the templates in
+memory, reloads them when files change, and answers requests over a Unix
+socket (or a TCP port on 127.0.0.1 where Unix sockets are unavailable), so a
+prompt costs one round trip instead of an interpreter start.
+
+Protocol: one JSON object per line in each direction, any number of requests
+per connection.
+  {"op": "list"}
+      -> {"ok": true, "templates": [{"index": 1, "title": "...", "file": "template1_....md"}, ...]}
+  {"op": "build", "templates": [2, "template4_exception_handling.md"], "desc": "...", "vars": {...}}
+      -> {"ok": true, "prompt": "..."}
+  Failures answer {"ok": false, "error": "..."}.
+
+Usage:
+  python prompt_cli.py --serve                      # listens on .prompt_cli.sock
+  python prompt_cli.py --connect -t 2 -d "parse logs"
+  python prompt_cli.py --serve --port 8765          # TCP on 127.0.0.1 instead
+
+From Python, keep a PromptClient open to pay the connection cost once:
+  with PromptClient() as client:
+      prompt = client.build([2, 4], "parse logs", {"language": "Go"})
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from prompt_cli import (
+    TemplateInfo, build_prompt, find_templates, request_fields, resolve_template_indices, template_refs
+)
+
+
+DEFAULT_SOCKET = ".prompt_cli.sock"
+RELOAD_INTERVAL = 1.0  # seconds between checks for changed templates
+REQUEST_LIMIT = 1 << 24  # longest accepted request line, in bytes
+
+
+class PromptServer:
+    """Serve list/build requests from templates held in memory.
+
+    A background task re-runs ``find_templates`` every ``reload_interval``
+    seconds in a worker thread; with the template index that costs one stat per
+    template and re-parses only changed files. The template list is swapped
+    only when something changed, so compiled templates survive reloads.
+    """
+
+    def __init__(self, base: Path, use_index: bool = True, reload_interval: float = RELOAD_INTERVAL) -> None:
+        self.base = base
+        self.use_index = use_index
+        self.reload_interval = reload_interval
+        self.templates: List[TemplateInfo] = []
+        self._names: Dict[str, int] = {}
+        self._set_templates(find_templates(base, use_index=use_index))
+
+    def _set_templates(self, templates: List[TemplateInfo]) -> None:
+        self.templates = templates
+        self._names = {t.path.name.lower(): t.index for t in templates}
+
+    async def _reload_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                templates = await loop.run_in_executor(None, find_templates, self.base, self.use_index)
+            except OSError as e:
+                print(f"Reload failed: {e}", file=sys.stderr)
+                continue
+            if templates != self.templates:
+                self._set_templates(templates)
+                print(f"Reloaded {len(templates)} templates", file=sys.stderr)
+
+    def handle(self, request: Any) -> Dict[str, Any]:
+        """Answer one decoded request."""
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        op = request.get("op")
+        if op == "list":
+            return {"ok": True, "templates": [
+                {"index": t.index, "title": t.title, "file": t.path.name} for t in self.templates
+            ]}
+        if op == "build":
+            try:
+                refs = template_refs(request.get("templates"))
+                indices = resolve_template_indices(refs, self.templates, self._names)
+                if not indices:
+                    raise ValueError("no templates selected")
+                desc, values = request_fields(request.get("desc"), request.get("vars"))
+                prompt = build_prompt(self.templates, indices, desc, values)
+            except ValueError as e:
+                return {"ok": False, "error": str(e)}
+            return {"ok": True, "prompt": prompt}
+        return {"ok": False, "error": f"unknown op: {op!r}"}
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = self.handle(json.loads(line))
+                except ValueError as e:
+                    response = {"ok": False, "error": f"invalid JSON: {e}"}
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):  # ValueError: request line over REQUEST_LIMIT
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: Optional[Path] = None, port: Optional[int] = None) -> None:
+        """Serve until cancelled, on ``port`` if given, else on ``socket_path``."""
+        if port is not None:
+            server = await asyncio.start_server(self._serve_connection, "127.0.0.1", port, limit=REQUEST_LIMIT)
+            where = f"127.0.0.1:{port}"
+        else:
+            socket_path = Path(socket_path or DEFAULT_SOCKET)
+            _remove_stale_socket(socket_path)
+            server = await asyncio.start_unix_server(self._serve_connection, str(socket_path), limit=REQUEST_LIMIT)
+            where = str(socket_path)
+        print(f"Serving {len(self.templates)} templates on {where}", file=sys.stderr)
+        reloader = asyncio.create_task(self._reload_forever())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reloader.cancel()
+            if port is None:
+                try:
+                    os.unlink(socket_path)
+                except OSError:
+                    pass
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    # A socket file left by a crashed server refuses connections; a live one must not be stolen
+    if not socket_path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except (ConnectionRefusedError, FileNotFoundError):
+        socket_path.unlink()
+        return
+    finally:
+        probe.close()
+    raise OSError(f"A server is already listening on {socket_path}")
+
+
+def run_server(base: Path, socket_path: Optional[Path] = None, port: Optional[int] = None,
+               use_index: bool = True) -> int:
+    server = PromptServer(base, use_index=use_index)
+    if not server.templates:
+        print("No templates found (expected files like template1_*.md)", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(server.serve(socket_path, port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+class PromptClient:
+    """Blocking client for PromptServer; one connection serves many requests."""
+
+    def __init__(self, socket_path: Optional[Path] = None, port: Optional[int] = None, timeout: float = 10.0) -> None:
+        if port is not None:
+            self._sock = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(str(socket_path or DEFAULT_SOCKET))
+        self._file = self._sock.makefile("rb")
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self._sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return self._checked(self.request({"op": "list"}))["templates"]
+
+    def build(self, templates: List[Any], desc: Optional[str] = None, values: Optional[Dict[str, str]] = None) -> str:
+        payload: Dict[str, Any] = {"op": "build", "templates": templates, "desc": desc}
+        if values:
+            payload["vars"] = values
+        return self._checked(self.request(payload))["prompt"]
+
+    @staticmethod
+    def _checked(response: Dict[str, Any]) -> Dict[str, Any]:
+        if not response.get("ok"):
+            raise ValueError(response.get("error", "request failed"))
+        return response
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "PromptClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
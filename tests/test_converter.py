@@ -0,0 +1,43 @@
+"""Tests for the csv2json converter."""
+
+import pytest
+
+from csv2json.cli import main
+from csv2json.converter import make_json_dumps
+
+READ_MODES = ([], ["--stream"], ["--mmap"], ["--workers", "2"])
+
+
+def convert_in_modes(source, tmp_path, capsys):
+    outputs = []
+    for mode in READ_MODES:
+        output = tmp_path / f"out{'-'.join(mode)}.json"
+        main([str(source), str(output), "--indent", "0", *mode])
+        outputs.append(output.read_bytes())
+    capsys.readouterr()
+    return outputs
+
+
+def test_quoted_line_breaks_match_streaming(tmp_path, capsys):
+    source = tmp_path / "multiline.csv"
+    source.write_bytes(b'a,b\n1,"line\nbreak"\n2,x\n')
+    outputs = convert_in_modes(source, tmp_path, capsys)
+
+    assert outputs.count(outputs[0]) == len(READ_MODES)
+    assert b'"line\\nbreak"' in outputs[0]
+
+
+def test_quoted_crlf_matches_across_read_modes(tmp_path, capsys):
+    source = tmp_path / "crlf.csv"
+    source.write_bytes(b'a,b\r\n1,"cr\r\nlf"\r\n2,x\r\n')
+    outputs = convert_in_modes(source, tmp_path, capsys)
+
+    assert outputs.count(outputs[0]) == len(READ_MODES)
+    assert b'"cr\\r\\nlf"' in outputs[0]
+
+
+def test_orjson_keeps_non_finite_floats():
+    pytest.importorskip("orjson")
+    rows = [{"a": float("nan"), "b": None}, {"a": float("inf"), "b": [float("-inf")]}]
+
+    assert make_json_dumps("orjson")(rows) == make_json_dumps("stdlib")(rows)